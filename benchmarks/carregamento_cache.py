@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carregamento do cache (DatabaseSQLite._carregar_cache)
+
+Compara a leitura de pagamentos com uma consulta por empréstimo (padrão
+antigo, N+1) com a leitura única ordenada e agrupada, para 1k, 10k e 100k
+empréstimos.
+
+Uso:
+    python -m benchmarks.carregamento_cache [quantidade ...]
+"""
+import sys
+import time
+import random
+import tempfile
+from pathlib import Path
+from datetime import date, timedelta
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.database_sqlite import DatabaseSQLite
+
+PAGAMENTOS_POR_EMPRESTIMO = 3
+EMPRESTIMOS_POR_CLIENTE = 5
+
+
+def popular_banco(db: DatabaseSQLite, qtd_emprestimos: int):
+    """Insere dados sintéticos direto via SQL"""
+    rnd = random.Random(42)
+    hoje = date.today()
+    qtd_clientes = max(1, qtd_emprestimos // EMPRESTIMOS_POR_CLIENTE)
+
+    clientes = [
+        (f"CLI{i:08d}", f"Cliente {i}", f"{i:011d}", f"11{i:09d}", f"c{i}@ex.com", "Rua X", hoje.isoformat())
+        for i in range(qtd_clientes)
+    ]
+    emprestimos = []
+    pagamentos = []
+    for i in range(qtd_emprestimos):
+        inicio = hoje - timedelta(days=rnd.randint(0, 720))
+        valor = rnd.uniform(100, 20000)
+        emp_id = f"EMP{i:08d}"
+        emprestimos.append((
+            emp_id, f"CLI{i % qtd_clientes:08d}", valor, 0.03, inicio.isoformat(), 12,
+            (inicio + timedelta(days=360)).isoformat(), valor * 1.4, valor, 1, "", "compostos"
+        ))
+        for j in range(PAGAMENTOS_POR_EMPRESTIMO):
+            pagamentos.append((
+                f"PGT{i:08d}{j}", emp_id, (inicio + timedelta(days=30 * (j + 1))).isoformat(),
+                valor / 10, "Parcela", valor, ""
+            ))
+
+    with db.pool.conexao() as conn:
+        conn.executemany("""
+            INSERT INTO clientes (id, nome, cpf_cnpj, telefone, email, endereco, data_cadastro)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, clientes)
+        conn.executemany("""
+            INSERT INTO emprestimos (
+                id, cliente_id, valor_emprestado, taxa_juros, data_emprestimo, prazo_meses,
+                data_vencimento, valor_total, saldo_devedor, ativo, observacoes, metodo_calculo
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, emprestimos)
+        conn.executemany("""
+            INSERT INTO pagamentos (id, emprestimo_id, data, valor, tipo, saldo_anterior, metodo)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, pagamentos)
+        conn.commit()
+
+
+def pagamentos_n_mais_1(db: DatabaseSQLite) -> int:
+    """Padrão antigo: uma consulta de pagamentos por empréstimo"""
+    total = 0
+    with db.pool.conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM emprestimos")
+        for row in cursor.fetchall():
+            cursor.execute("SELECT * FROM pagamentos WHERE emprestimo_id = ?", (row['id'],))
+            pagamentos = []
+            for p in cursor.fetchall():
+                pag = {
+                    'id': p['id'],
+                    'valor': p['valor'],
+                    'data': p['data'],
+                    'tipo': p['tipo'] or 'Parcela',
+                    'saldo_anterior': p['saldo_anterior'] or 0
+                }
+                if p['metodo']:
+                    pag['metodo'] = p['metodo']
+                pagamentos.append(pag)
+            total += len(pagamentos)
+    return total
+
+
+def pagamentos_agrupados(db: DatabaseSQLite) -> int:
+    """Padrão novo: uma única passada ordenada"""
+    with db.pool.conexao() as conn:
+        agrupados = db._carregar_pagamentos_agrupados(conn)
+    return sum(len(lista) for lista in agrupados.values())
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def executar(qtd_emprestimos: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseSQLite(Path(tmp) / "bench.db", perfil_durabilidade='fast')
+        popular_banco(db, qtd_emprestimos)
+
+        t_antigo, n_antigo = cronometrar(pagamentos_n_mais_1, db)
+        t_novo, n_novo = cronometrar(pagamentos_agrupados, db)
+        assert n_antigo == n_novo
+
+        t_cache, _ = cronometrar(db._carregar_cache)
+        db.fechar()
+
+    print(f"{qtd_emprestimos:>8,} empréstimos | pagamentos N+1: {t_antigo:8.3f}s | "
+          f"agrupado: {t_novo:8.3f}s | ganho: {t_antigo / t_novo:5.1f}x | "
+          f"_carregar_cache completo: {t_cache:8.3f}s")
+
+
+if __name__ == "__main__":
+    quantidades = [int(q) for q in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print("=" * 100)
+    print("BENCHMARK - CARREGAMENTO DO CACHE")
+    print("=" * 100)
+    for qtd in quantidades:
+        executar(qtd)
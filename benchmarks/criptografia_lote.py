@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark de criptografia em lote (CryptoManager.encrypt_many/decrypt_many)
+
+Compara o laço em série (um campo por vez no processo atual) com o pool de
+processos, para 10k e 100k campos. O ganho depende do número de núcleos:
+numa máquina com um só núcleo o pool não tem como ser mais rápido.
+
+Uso:
+    python -m benchmarks.criptografia_lote [quantidade ...] [--workers N]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.database_sqlite import CryptoManager
+
+
+def gerar_campos(quantidade: int) -> list:
+    """Mistura de CPFs, telefones e e-mails sintéticos"""
+    modelos = ("{:011d}", "11{:09d}", "cliente{}@exemplo.com.br")
+    return [modelos[i % 3].format(i) for i in range(quantidade)]
+
+
+def cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    return time.perf_counter() - inicio, resultado
+
+
+def executar(crypto: CryptoManager, quantidade: int, workers: int):
+    campos = gerar_campos(quantidade)
+
+    t_cif_serie, tokens = cronometrar(crypto.encrypt_many, campos, workers=1)
+    t_cif_pool, tokens_pool = cronometrar(crypto.encrypt_many, campos, workers=workers)
+    t_dec_serie, textos = cronometrar(crypto.decrypt_many, tokens, workers=1)
+    t_dec_pool, textos_pool = cronometrar(crypto.decrypt_many, tokens_pool, workers=workers)
+
+    # Ordem preservada nos dois caminhos
+    assert textos == campos and textos_pool == campos
+
+    print(f"{quantidade:>8,} campos | cifrar série: {t_cif_serie:7.3f}s  pool: {t_cif_pool:7.3f}s "
+          f"({t_cif_serie / t_cif_pool:4.1f}x) | decifrar série: {t_dec_serie:7.3f}s  "
+          f"pool: {t_dec_pool:7.3f}s ({t_dec_serie / t_dec_pool:4.1f}x)")
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    workers = os.cpu_count() or 1
+    if "--workers" in argumentos:
+        posicao = argumentos.index("--workers")
+        workers = int(argumentos[posicao + 1])
+        del argumentos[posicao:posicao + 2]
+    quantidades = [int(q) for q in argumentos] or [10_000, 100_000]
+
+    # O benchmark mede o caminho paralelo mesmo abaixo do limite normal
+    CryptoManager.LIMITE_PARALELO = 0
+    crypto = CryptoManager("senha-benchmark")
+
+    print("=" * 110)
+    print(f"BENCHMARK - CRIPTOGRAFIA EM LOTE ({workers} processos)")
+    print("=" * 110)
+    for qtd in quantidades:
+        executar(crypto, qtd, workers)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cronograma de parcelas (Emprestimo.cronograma)
+
+Com os quatro métodos misturados, mede para toda a carteira:
+- gerar os cronogramas do zero (cache vazio) e a próxima parcela de cada um;
+- montar todas as linhas de todas as tabelas;
+- repetir a leitura com o cache cheio;
+- gerar de novo depois de um pagamento em 10% dos empréstimos (só esses são
+  refeitos).
+
+Uso:
+    python -m benchmarks.cronograma_carteira [qtd_emprestimos ...]
+"""
+import sys
+import time
+import random
+from pathlib import Path
+from datetime import date, timedelta
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.emprestimo import Emprestimo
+from utils.amortizacao import METODOS
+
+PRAZOS = (3, 6, 12, 24, 36)
+
+
+def gerar_carteira(qtd_emprestimos: int) -> list:
+    rnd = random.Random(42)
+    hoje = date.today()
+    return [
+        Emprestimo(f"CLI{i % 1000:08d}", rnd.randint(500, 50_000), rnd.choice((1.5, 2.5, 3.5, 5.0)),
+                   (hoje - timedelta(days=rnd.randint(0, 720))).isoformat(), rnd.choice(PRAZOS),
+                   id=f"EMP{i:08d}", metodo_calculo=METODOS[i % len(METODOS)])
+        for i in range(qtd_emprestimos)
+    ]
+
+
+def proximas_parcelas(emprestimos: list) -> int:
+    return sum(1 for emp in emprestimos if emp.cronograma().proxima_parcela() is not None)
+
+
+def todas_as_linhas(emprestimos: list) -> int:
+    return sum(len(list(emp.cronograma())) for emp in emprestimos)
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def executar(qtd_emprestimos: int):
+    emprestimos = gerar_carteira(qtd_emprestimos)
+
+    t_gerar, _ = cronometrar(proximas_parcelas, emprestimos)
+    t_linhas, parcelas = cronometrar(todas_as_linhas, emprestimos)
+    t_cache, _ = cronometrar(todas_as_linhas, emprestimos)
+    for emp in emprestimos[::10]:
+        emp.registrar_pagamento(emp.valor_parcela)
+    t_apos_pagamentos, _ = cronometrar(proximas_parcelas, emprestimos)
+
+    print(f"{qtd_emprestimos:>8,} empréstimos ({parcelas:,} parcelas) | gerar + próxima parcela: {t_gerar:6.3f}s | "
+          f"todas as linhas: {t_linhas:6.3f}s | em cache: {t_cache:6.3f}s | após pagar 10%: {t_apos_pagamentos:6.3f}s")
+
+
+if __name__ == "__main__":
+    quantidades = [int(q) for q in sys.argv[1:]] or [10_000, 100_000]
+    print("=" * 110)
+    print("BENCHMARK - CRONOGRAMA DE PARCELAS DA CARTEIRA")
+    print("=" * 110)
+    for qtd in quantidades:
+        executar(qtd)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória dos modelos (Cliente, Emprestimo e pagamentos)
+
+Compara a representação antiga (objetos com __dict__ por instância e cada
+pagamento num dict) com a atual (__slots__ e Pagamento), para a mesma
+carteira sintética. Os valores (textos, números) são compartilhados entre
+as duas versões: a diferença medida é só a dos contêineres.
+
+Uso:
+    python -m benchmarks.memoria_modelos [qtd_emprestimos ...]
+"""
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from datetime import date, timedelta
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.cliente import Cliente
+from models.emprestimo import Emprestimo
+from models.pagamento import Pagamento
+
+PAGAMENTOS_POR_EMPRESTIMO = 6
+EMPRESTIMOS_POR_CLIENTE = 5
+
+
+class ObjetoComDict:
+    """Como os modelos eram antes: atributos num __dict__ por instância"""
+
+    def __init__(self, atributos: dict):
+        self.__dict__.update(atributos)
+
+
+def gerar_carteira(qtd_emprestimos: int):
+    """Carteira na representação atual"""
+    hoje = date.today()
+    qtd_clientes = max(1, qtd_emprestimos // EMPRESTIMOS_POR_CLIENTE)
+    clientes = [
+        Cliente(f"Cliente {i}", f"{i:011d}", f"11{i:09d}", f"c{i}@ex.com", "Rua X", id=f"CLI{i:08d}")
+        for i in range(qtd_clientes)
+    ]
+    emprestimos = []
+    for i in range(qtd_emprestimos):
+        inicio = hoje - timedelta(days=i % 720)
+        emp = Emprestimo(f"CLI{i % qtd_clientes:08d}", 1000 + i % 5000, 5, inicio.isoformat(), 12,
+                         id=f"EMP{i:08d}")
+        emp.pagamentos = [
+            Pagamento(f"PGT{i:08d}{j:02d}", emp.valor_parcela, (inicio + timedelta(days=30 * (j + 1))).isoformat(),
+                      'Parcela', emp.valor_total - j * emp.valor_parcela)
+            for j in range(PAGAMENTOS_POR_EMPRESTIMO)
+        ]
+        emprestimos.append(emp)
+    return clientes, emprestimos
+
+
+def representacao_slots(clientes, emprestimos):
+    """Cópia rasa na representação atual (mesmos valores)"""
+    novos_clientes = []
+    for c in clientes:
+        novo = Cliente.__new__(Cliente)
+        for nome in Cliente.__slots__:
+            setattr(novo, nome, getattr(c, nome))
+        novos_clientes.append(novo)
+    novos_emprestimos = []
+    for e in emprestimos:
+        novo = Emprestimo.__new__(Emprestimo)
+        for nome in Emprestimo.__slots__:
+            setattr(novo, nome, getattr(e, nome))
+        novo.pagamentos = [Pagamento(p.id, p.valor, p.data, p.tipo, p.saldo_anterior) for p in e.pagamentos]
+        novos_emprestimos.append(novo)
+    return novos_clientes, novos_emprestimos
+
+
+def representacao_antiga(clientes, emprestimos):
+    """Cópia rasa na representação antiga (mesmos valores)"""
+    antigos_clientes = [ObjetoComDict({nome: getattr(c, nome) for nome in Cliente.__slots__}) for c in clientes]
+    antigos_emprestimos = []
+    for e in emprestimos:
+        antigo = ObjetoComDict({nome: getattr(e, nome) for nome in Emprestimo.__slots__})
+        antigo.pagamentos = [
+            {'id': p.id, 'valor': p.valor, 'data': p.data, 'tipo': p.tipo, 'saldo_anterior': p.saldo_anterior}
+            for p in e.pagamentos
+        ]
+        antigos_emprestimos.append(antigo)
+    return antigos_clientes, antigos_emprestimos
+
+
+def medir(funcao, *args):
+    """Bytes alocados (e ainda vivos) pelo resultado de funcao(*args)"""
+    gc.collect()
+    tracemalloc.start()
+    resultado = funcao(*args)
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return atual, resultado
+
+
+def executar(qtd_emprestimos: int):
+    clientes, emprestimos = gerar_carteira(qtd_emprestimos)
+    bytes_antigo, antigo = medir(representacao_antiga, clientes, emprestimos)
+    del antigo
+    bytes_slots, atual = medir(representacao_slots, clientes, emprestimos)
+    del atual
+
+    qtd_pagamentos = qtd_emprestimos * PAGAMENTOS_POR_EMPRESTIMO
+    print(f"{qtd_emprestimos:>8,} empréstimos ({len(clientes):,} clientes, {qtd_pagamentos:,} pagamentos) | "
+          f"__dict__/dict: {bytes_antigo / 2**20:8.1f} MiB | __slots__/Pagamento: {bytes_slots / 2**20:8.1f} MiB | "
+          f"redução: {1 - bytes_slots / bytes_antigo:5.1%}")
+
+
+if __name__ == "__main__":
+    quantidades = [int(q) for q in sys.argv[1:]] or [10_000, 100_000]
+    print("=" * 120)
+    print("BENCHMARK - MEMÓRIA DOS MODELOS")
+    print("=" * 120)
+    for qtd in quantidades:
+        executar(qtd)
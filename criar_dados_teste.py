@@ -60,19 +60,23 @@ def criar_dados_teste():
     ]
     
     clientes_criados = []
+    clientes_novos = []
     for dados in clientes_teste:
-        # Verificar se já existe
-        existe = any(c.cpf_cnpj == dados["cpf_cnpj"] for c in db.clientes)
-        if existe:
+        # Verificar se já existe (consulta indexada pelo CPF/CNPJ)
+        existente = db.buscar_cliente_por_documento(dados["cpf_cnpj"])
+        if existente:
             print(f"   ⚠️  {dados['nome'][:20]:20s} - Já existe")
-            cliente = next(c for c in db.clientes if c.cpf_cnpj == dados["cpf_cnpj"])
-            clientes_criados.append(cliente)
+            clientes_criados.append(existente)
         else:
             cliente = Cliente(**dados)
-            db.adicionar_cliente(cliente)
+            clientes_novos.append(cliente)
             clientes_criados.append(cliente)
             print(f"   ✅ {cliente.nome[:20]:20s} - Criado com sucesso")
     
+    if clientes_novos:
+        lote = db.adicionar_clientes_em_lote(clientes_novos)
+        print(f"   ⏱️  {lote['linhas']} clientes gravados ({lote['linhas_por_segundo']:,.0f} linhas/s)")
+    
     # Criar empréstimos de teste em diferentes estados
     print("\n2️⃣ Criando empréstimos de teste...")
     
@@ -163,6 +167,9 @@ def criar_dados_teste():
         }
     ]
     
+    # Empréstimos primeiro, depois todos os pagamentos de uma vez
+    emprestimos_novos = []
+    pagamentos_novos = []
     for dados in emprestimos_teste:
         cliente = dados["cliente"]
         
@@ -175,20 +182,21 @@ def criar_dados_teste():
             prazo_meses=dados["prazo_meses"],
             data_vencimento=dados["data_vencimento"]
         )
+        emprestimos_novos.append(emp)
         
-        # Adicionar pagamentos
+        # Pagamentos de empréstimo já quitado são ignorados pelo lote
         for pag in dados.get("pagamentos", []):
-            try:
-                emp.registrar_pagamento(pag["valor"], pag["data"])
-            except ValueError as e:
-                # Se já estiver quitado, ignorar
-                pass
-        
-        db.adicionar_emprestimo(emp)
-        
+            pagamentos_novos.append((emp, pag["valor"], pag["data"]))
+    
+    lote = db.adicionar_emprestimos_em_lote(emprestimos_novos)
+    print(f"   ⏱️  {lote['linhas']} empréstimos gravados ({lote['linhas_por_segundo']:,.0f} linhas/s)")
+    lote = db.registrar_pagamentos_em_lote(pagamentos_novos)
+    print(f"   ⏱️  {lote['linhas']} pagamentos gravados ({lote['linhas_por_segundo']:,.0f} linhas/s)")
+    
+    for dados, emp in zip(emprestimos_teste, emprestimos_novos):
         # Status visual
         status_badge = emp.get_status_badge()
-        print(f"   ✅ {cliente.nome[:20]:20s} - {dados['descricao']:35s} - {status_badge}")
+        print(f"   ✅ {dados['cliente'].nome[:20]:20s} - {dados['descricao']:35s} - {status_badge}")
     
     # Salvar
     print("\n3️⃣ Salvando dados...")
@@ -211,6 +219,8 @@ def criar_dados_teste():
     print(f"   • 🔄 Em dia: {em_dia}")
     print(f"   • ⚠️  Atrasados: {atrasados}")
     print(f"\n{'=' * 70}\n")
+    
+    db.fechar()
 
 if __name__ == "__main__":
     try:
@@ -1,18 +1,26 @@
 import customtkinter as ctk
 from views.login_view import LoginView
 from models.database_sqlite import DatabaseSQLite
+from models.database_async import AsyncDatabase
 from license_manager import LicenseManager
 from utils.json_migrator import executar_migracao_automatica, verificar_migracao_necessaria
 from utils.master_password import solicitar_senha_mestra
+from utils.derivacao_chave import bloquear_sessao
+from utils.ponte_async_tk import PonteAsyncTk
 from utils.logger_config import configurar_logging, log_operacao
 from tkinter import messagebox
 from pathlib import Path
 import logging
+import multiprocessing
 import sys
 
 # Configurar logging
 logger = configurar_logging()
 
+# Carteiras grandes: True = telas de clientes/empréstimos paginadas direto no banco,
+# sem carregar e descriptografar tudo na inicialização
+MODO_REPOSITORIO = False
+
 class App:
     def __init__(self):
         try:
@@ -45,7 +53,7 @@ class App:
             
             # Inicializar database SQLite com criptografia
             db_path = data_dir / "financepro.db"
-            self.db = DatabaseSQLite(db_path, senha_mestra)
+            self.db = DatabaseSQLite(db_path, senha_mestra, modo_repositorio=MODO_REPOSITORIO)
             
             logger.info("Sistema inicializado com sucesso")
             log_operacao(logger, "Inicialização", True, "Database carregado")
@@ -55,6 +63,10 @@ class App:
             self.root.geometry("1200x700")
             self.root.minsize(1000, 600)
             
+            # Consultas aguardáveis (await) sem travar o mainloop
+            self.ponte = PonteAsyncTk(self.root)
+            self.db_async = AsyncDatabase(self.db)
+            
             # Adicionar handler para fechar janela com segurança
             self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
             # Passar license_manager para login_view
@@ -71,8 +83,18 @@ class App:
             if hasattr(self, '_notifier') and self._notifier:
                 self._notifier.stop()
             
+            # Encerrar tarefas assíncronas antes do banco
+            self.ponte.fechar()
+            self.db_async.fechar()
+            
             # Salvar dados
             self.db.salvar_dados()
+            
+            # Fechar pool de conexões do banco
+            self.db.fechar()
+            
+            # Descartar chaves derivadas da senha mestra
+            bloquear_sessao()
             logger.info("Aplicativo fechado com sucesso")
             
             # Fechar janela
@@ -118,20 +140,25 @@ class App:
         self.root.after(2000, success_label.place_forget)
     
     def iniciar_sistema(self):
-        try:
-            self.login_view.destroy()
-            
-            logger.info("Carregando MainView...")
-            from views.main_view import MainView
-            self.main_view = MainView(self.root, self.db, self.license_manager)
-            
-            self._notifier = None
-            logger.info("Sistema principal carregado")
-            
-        except Exception as e:
-            logger.error(f"Erro ao iniciar sistema: {e}", exc_info=True)
-            messagebox.showerror("Erro", f"Erro ao carregar sistema:\n{e}")
-            raise
+        self.login_view.destroy()
+        self.mostrar_loading()
+        # Primeira carga do cache (leitura e descriptografia) fora da thread do Tk
+        self.ponte.agendar(self._carregar_sistema(), ao_falhar=self._falha_ao_iniciar)
+    
+    async def _carregar_sistema(self):
+        await self.db_async.carregar()
+        
+        logger.info("Carregando MainView...")
+        from views.main_view import MainView
+        self.main_view = MainView(self.root, self.db, self.license_manager)
+        
+        self._notifier = None
+        self.esconder_loading()
+        logger.info("Sistema principal carregado")
+    
+    def _falha_ao_iniciar(self, e):
+        logger.error(f"Erro ao iniciar sistema: {e}", exc_info=e)
+        messagebox.showerror("Erro", f"Erro ao carregar sistema:\n{e}")
         
     def run(self):
         try:
@@ -150,6 +177,8 @@ class App:
                 logger.error(f"Erro ao salvar dados: {e}", exc_info=True)
 
 if __name__ == "__main__":
+    # Executável (PyInstaller): processos do pool de criptografia não devem abrir outra janela
+    multiprocessing.freeze_support()
     try:
         print("=" * 60)
         print("FinancePro - Sistema de Empréstimos")
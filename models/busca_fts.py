@@ -0,0 +1,114 @@
+"""
+Índice de busca full-text de clientes (SQLite FTS5)
+Busca por nome sem diferenciar acentos ("joao" encontra "João") e por
+dígitos de CPF/CNPJ e telefone, com resultados ordenados por relevância
+"""
+import re
+import sqlite3
+import unicodedata
+import logging
+
+logger = logging.getLogger(__name__)
+
+# unicode61 + remove_diacritics 2: tokeniza por palavra e ignora acentos.
+# prefix='2 3' mantém índices de prefixo para buscas curtas ("jo*", "mar*").
+SQL_CRIAR_FTS = """
+    CREATE VIRTUAL TABLE clientes_fts USING fts5(
+        cliente_id UNINDEXED,
+        nome,
+        documentos,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+"""
+
+# Só dígitos; valores criptografados (tokens Fernet começam com 'gAAAAA')
+# não entram no índice, para não vazar nada do conteúdo protegido
+_SQL_DIGITOS = """
+    CASE WHEN {col} IS NULL OR {col} LIKE 'gAAAAA%' THEN ''
+    ELSE replace(replace(replace(replace(replace(replace(replace(
+        {col}, '.', ''), '-', ''), '/', ''), '(', ''), ')', ''), ' ', ''), '+', '')
+    END
+"""
+
+
+def _sql_documentos(prefixo: str) -> str:
+    """CPF/CNPJ, telefone e telefone sem DDD, só dígitos"""
+    cpf = _SQL_DIGITOS.format(col=f"{prefixo}cpf_cnpj")
+    tel = _SQL_DIGITOS.format(col=f"{prefixo}telefone")
+    return f"({cpf}) || ' ' || ({tel}) || ' ' || substr({tel}, 3)"
+
+
+# Triggers mantêm o índice em sincronia com a tabela clientes
+SQL_TRIGGERS_FTS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS clientes_fts_ai AFTER INSERT ON clientes BEGIN
+        INSERT INTO clientes_fts (cliente_id, nome, documentos)
+        VALUES (new.id, new.nome, {_sql_documentos('new.')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS clientes_fts_au AFTER UPDATE ON clientes BEGIN
+        DELETE FROM clientes_fts WHERE cliente_id = old.id;
+        INSERT INTO clientes_fts (cliente_id, nome, documentos)
+        VALUES (new.id, new.nome, {_sql_documentos('new.')});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS clientes_fts_ad AFTER DELETE ON clientes BEGIN
+        DELETE FROM clientes_fts WHERE cliente_id = old.id;
+    END
+    """,
+]
+
+
+def criar_indice_busca(cursor) -> bool:
+    """
+    Cria (e na primeira vez popula) o índice FTS5 de clientes
+
+    Returns:
+        True se o FTS5 está disponível; False se o SQLite foi compilado sem
+        ele (a busca cai para varredura linear)
+    """
+    existe = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clientes_fts'"
+    ).fetchone()
+
+    try:
+        if not existe:
+            cursor.execute(SQL_CRIAR_FTS)
+            cursor.execute(f"""
+                INSERT INTO clientes_fts (cliente_id, nome, documentos)
+                SELECT id, nome, {_sql_documentos('')} FROM clientes
+            """)
+            logger.info("Índice de busca FTS5 de clientes criado")
+        for sql in SQL_TRIGGERS_FTS:
+            cursor.execute(sql)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 indisponível, busca de clientes será linear: {e}")
+        return False
+    return True
+
+
+def montar_consulta_fts(termo: str):
+    """
+    Converte o texto digitado numa consulta FTS5 de prefixos (todas as palavras)
+
+    Ex.: 'joão  123.456' -> '"joão"* AND "123456"*'
+
+    Returns:
+        String MATCH, ou None se não sobrar nada pesquisável
+    """
+    partes = []
+    for palavra in termo.split():
+        # Pontuação de CPF/telefone some; aspas são escapadas
+        palavra = re.sub(r"[.\-/()+]", "", palavra).replace('"', '""')
+        if palavra:
+            partes.append(f'"{palavra}"*')
+    return " AND ".join(partes) or None
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas e sem acentos (usado na busca linear de fallback)"""
+    decomposto = unicodedata.normalize('NFKD', texto or "")
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).lower()
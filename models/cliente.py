@@ -1,7 +1,48 @@
 import json
 from datetime import datetime
 
+
+class ValorCifrado:
+    """Texto cifrado vindo do banco que ainda não precisou ser lido"""
+    __slots__ = ('token', 'decifrar')
+    
+    def __init__(self, token, decifrar):
+        self.token = token
+        self.decifrar = decifrar
+
+
+class CampoSensivel:
+    """
+    Atributo sensível (CPF/CNPJ, telefone, e-mail) decifrado só na leitura
+    
+    O objeto guarda o ValorCifrado no slot "_<nome>"; a cada acesso o texto é
+    obtido pela função de decifrar (que tem memória limitada), então clientes
+    que nunca são exibidos ou exportados nunca pagam a descriptografia.
+    """
+    
+    def __set_name__(self, owner, nome):
+        self.atributo = f"_{nome}"
+    
+    def __get__(self, obj, tipo=None):
+        if obj is None:
+            return self
+        valor = getattr(obj, self.atributo, "")
+        if isinstance(valor, ValorCifrado):
+            return valor.decifrar(valor.token)
+        return valor
+    
+    def __set__(self, obj, valor):
+        setattr(obj, self.atributo, valor)
+
+
 class Cliente:
+    __slots__ = ('id', 'nome', '_cpf_cnpj', '_telefone', '_email', 'endereco',
+                 'chave_pix', 'data_cadastro', 'ativo')
+    
+    cpf_cnpj = CampoSensivel()
+    telefone = CampoSensivel()
+    email = CampoSensivel()
+    
     def __init__(self, nome, cpf_cnpj, telefone, email, endereco, id=None, chave_pix=None):
         self.id = id or self.gerar_id()
         self.nome = nome
@@ -16,6 +57,10 @@ class Cliente:
     def gerar_id(self):
         return f"CLI{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
     
+    def valor_armazenado(self, campo):
+        """Valor interno de um campo sensível sem decifrar (texto ou ValorCifrado)"""
+        return getattr(self, f"_{campo}", "")
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -29,6 +74,29 @@ class Cliente:
             'ativo': self.ativo
         }
     
+    @classmethod
+    def from_row(cls, row, sensivel=None):
+        """
+        Monta o cliente direto das colunas gravadas, sem passar pelo __init__
+        
+        Args:
+            row: Linha da tabela clientes (sqlite3.Row ou dict)
+            sensivel: Função aplicada às colunas cpf_cnpj, telefone e email
+                (ex.: texto cifrado -> ValorCifrado); None = valores como estão
+        """
+        sensivel = sensivel or (lambda valor: valor)
+        cliente = cls.__new__(cls)
+        cliente.id = row['id']
+        cliente.nome = row['nome']
+        cliente.cpf_cnpj = sensivel(row['cpf_cnpj'])
+        cliente.telefone = sensivel(row['telefone'])
+        cliente.email = sensivel(row['email'])
+        cliente.endereco = row['endereco']
+        cliente.chave_pix = ""
+        cliente.data_cadastro = row['data_cadastro']
+        cliente.ativo = True
+        return cliente
+    
     @classmethod
     def from_dict(cls, data):
         cliente = cls(
@@ -0,0 +1,132 @@
+"""
+Fachada assíncrona do banco (AsyncDatabase)
+Os métodos de DatabaseSQLite rodam numa thread dedicada e são aguardados com
+await; a thread da interface continua redesenhando enquanto o SQLite e a
+descriptografia trabalham
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import logging
+
+from models.cliente import Cliente
+from models.emprestimo import Emprestimo
+from models.resumo import Resumo
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """
+    Versões aguardáveis das leituras e escritas de DatabaseSQLite
+
+    Uso (numa corrotina agendada pela PonteAsyncTk):
+        clientes = await db_async.buscar_cliente("maria")
+        await db_async.adicionar_cliente(cliente)
+        await db_async.salvar_dados()
+
+    Todas as chamadas passam por um executor de uma thread só: rodam na ordem
+    em que foram pedidas (um salvar_dados nunca passa na frente do
+    adicionar_cliente anterior) e o cache do banco é tocado por uma thread por
+    vez além da interface, que continua podendo usar o DatabaseSQLite direto.
+    """
+
+    def __init__(self, db, executor: ThreadPoolExecutor = None):
+        """
+        Args:
+            db: DatabaseSQLite já aberto (continua sendo fechado por quem o criou)
+            executor: Executor próprio; None = uma thread dedicada
+        """
+        self.db = db
+        self._executor_proprio = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="financepro-db")
+
+    async def executar(self, funcao, *args, **kwargs):
+        """Roda funcao(*args, **kwargs) no executor do banco e devolve o resultado"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(funcao, *args, **kwargs))
+
+    # ==================== LEITURAS ====================
+
+    async def carregar(self):
+        """
+        Carrega o cache (a primeira carga é a parte lenta: leitura e descriptografia)
+        
+        É a primeira carga da carteira na inicialização: a tela de login lê só
+        os usuários, então nada antes disto roda _carregar_cache na thread do Tk.
+        """
+        if not self.db.modo_repositorio:
+            await self.executar(self.db._garantir_cache)
+
+    async def clientes(self) -> List[Cliente]:
+        return await self.executar(lambda: self.db.clientes)
+
+    async def emprestimos(self) -> List[Emprestimo]:
+        return await self.executar(lambda: self.db.emprestimos)
+
+    async def buscar_cliente(self, termo: str, limite: int = None) -> List[Cliente]:
+        return await self.executar(self.db.buscar_cliente, termo, limite)
+
+    async def get_cliente_por_id(self, cliente_id: str) -> Optional[Cliente]:
+        return await self.executar(self.db.get_cliente_por_id, cliente_id)
+
+    async def get_emprestimo_por_id(self, emprestimo_id: str) -> Optional[Emprestimo]:
+        return await self.executar(self.db.get_emprestimo_por_id, emprestimo_id)
+
+    async def get_emprestimos_by_cliente(self, cliente_id: str) -> List[Emprestimo]:
+        return await self.executar(self.db.get_emprestimos_by_cliente, cliente_id)
+
+    async def get_overdue_emprestimos(self) -> List[Emprestimo]:
+        return await self.executar(self.db.get_overdue_emprestimos)
+
+    async def existe_cpf_cnpj(self, cpf_cnpj: str, ignorar_id: str = None) -> bool:
+        return await self.executar(self.db.existe_cpf_cnpj, cpf_cnpj, ignorar_id)
+
+    async def pagina_clientes(self, *args, **kwargs):
+        """Ver RepositorioPaginado.pagina_clientes"""
+        return await self.executar(self.db.repositorio.pagina_clientes, *args, **kwargs)
+
+    async def pagina_emprestimos(self, *args, **kwargs):
+        """Ver RepositorioPaginado.pagina_emprestimos"""
+        return await self.executar(self.db.repositorio.pagina_emprestimos, *args, **kwargs)
+
+    async def resumo(self, filtros: dict = None) -> Resumo:
+        return await self.executar(self.db.resumo, filtros)
+
+    async def historico_carteira(self, dias: int = 180) -> List[dict]:
+        return await self.executar(self.db.historico_carteira, dias)
+
+    # ==================== ESCRITAS ====================
+
+    async def adicionar_cliente(self, cliente: Cliente):
+        await self.executar(self.db.adicionar_cliente, cliente)
+
+    async def atualizar_cliente(self, cliente: Cliente):
+        await self.executar(self.db.atualizar_cliente, cliente)
+
+    async def remover_cliente(self, cliente: Cliente):
+        await self.executar(self.db.remover_cliente, cliente)
+
+    async def adicionar_emprestimo(self, emprestimo: Emprestimo):
+        await self.executar(self.db.adicionar_emprestimo, emprestimo)
+
+    async def atualizar_emprestimo(self, emprestimo: Emprestimo):
+        await self.executar(self.db.atualizar_emprestimo, emprestimo)
+
+    async def remover_emprestimo(self, emprestimo: Emprestimo):
+        await self.executar(self.db.remover_emprestimo, emprestimo)
+
+    async def registrar_pagamento(self, emprestimo: Emprestimo, valor: float, data: str = None,
+                                  tipo: str = "Parcela") -> dict:
+        return await self.executar(self.db.registrar_pagamento, emprestimo, valor, data, tipo)
+
+    async def salvar_dados(self) -> int:
+        return await self.executar(self.db.salvar_dados)
+
+    # ==================== ENCERRAMENTO ====================
+
+    def fechar(self):
+        """Espera as chamadas em andamento e encerra a thread (não fecha o banco)"""
+        if self._executor_proprio:
+            self._executor.shutdown(wait=True)
@@ -5,27 +5,78 @@ Substitui JSON por banco relacional seguro
 import sqlite3
 import json
 import threading
+import bisect
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, date, timedelta
+from typing import Iterable, List, Optional
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.backends import default_backend
 import base64
+import functools
+import hashlib
+import hmac
 import os
 import logging
 
-from models.cliente import Cliente
+from models.cliente import Cliente, ValorCifrado
 from models.emprestimo import Emprestimo
+from models.pagamento import Pagamento
 from models.usuario import Usuario
+from models.pool_conexoes import PoolConexoes, WAL_LIMITE_BYTES
+from models.repositorio import RepositorioPaginado
+from models.resumo import Resumo, FAIXAS_VALOR
+from utils.derivacao_chave import derivar_chave
+from models.migracoes import migrar
+from models.snapshots import (concluir_refazer, dias_pendentes, gravar_snapshot, historico,
+                              pendencias_refazer)
+from models.log_alteracoes import criar_log_alteracoes, corte_poda, ultimo_seq
+from models.busca_fts import criar_indice_busca, montar_consulta_fts, normalizar
 
 logger = logging.getLogger(__name__)
 
 
+# Cipher de cada processo do pool de criptografia em lote
+_cipher_worker = None
+
+
+def _iniciar_worker_crypto(chave: bytes):
+    """Initializer do pool: monta o Fernet uma vez por processo"""
+    global _cipher_worker
+    _cipher_worker = Fernet(chave)
+
+
+def _cifrar_bloco(bloco: List[str]) -> List[str]:
+    return [_cipher_worker.encrypt(d.encode()).decode() if d else "" for d in bloco]
+
+
+def _decifrar_bloco(bloco: List[str]) -> List[str]:
+    resultado = []
+    for token in bloco:
+        try:
+            resultado.append(_cipher_worker.decrypt(token.encode()).decode() if token else "")
+        except Exception as e:
+            logger.error(f"Erro ao descriptografar: {e}")
+            resultado.append("")
+    return resultado
+
+
 class CryptoManager:
     """Gerencia criptografia de dados sensíveis"""
     
+    # Quantos textos decifrados ficam em memória
+    MAX_DECIFRADOS_MEMO = 4096
+    
+    # Lotes menores que isto rodam em série: abrir os processos custa mais
+    # que o ganho. TAMANHO_BLOCO é quanto cada tarefa do pool processa.
+    LIMITE_PARALELO = 5000
+    TAMANHO_BLOCO = 2000
+    
     def __init__(self, senha_mestra: str, salt: bytes = None):
         """
         Inicializa o gerenciador de criptografia
@@ -39,16 +90,23 @@ class CryptoManager:
         
         self.salt = salt
         
-        # Derivar chave da senha usando PBKDF2HMAC
-        kdf = PBKDF2HMAC(
+        # Derivar chave da senha (PBKDF2, 100k iterações) uma vez por processo
+        chave_mestra = derivar_chave(senha_mestra, salt)
+        key = base64.urlsafe_b64encode(chave_mestra)
+        self.cipher = Fernet(key)
+        self._chave_fernet = key
+        
+        # Chave separada (HKDF) para os índices cegos: o HMAC nunca usa a chave de cifra
+        self._chave_indice = HKDF(
             algorithm=hashes.SHA256(),
             length=32,
-            salt=salt,
-            iterations=100000,
+            salt=None,
+            info=b"financepro-indice-cego",
             backend=default_backend()
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(senha_mestra.encode()))
-        self.cipher = Fernet(key)
+        ).derive(chave_mestra)
+        
+        # Memória limitada de valores já decifrados (leitura sob demanda dos clientes)
+        self.decrypt_memo = functools.lru_cache(maxsize=self.MAX_DECIFRADOS_MEMO)(self.decrypt)
     
     def encrypt(self, data: str) -> str:
         """Criptografa string"""
@@ -56,6 +114,59 @@ class CryptoManager:
             return ""
         return self.cipher.encrypt(data.encode()).decode()
     
+    def encrypt_many(self, dados: List[str], workers: Optional[int] = None) -> List[str]:
+        """
+        Criptografa uma lista de strings, em paralelo quando o lote é grande
+        
+        Args:
+            dados: Textos (vazios continuam vazios)
+            workers: Processos do pool (None = núcleos da máquina, 1 = em série)
+        
+        Returns:
+            Tokens na mesma ordem de dados
+        """
+        dados = list(dados)
+        if not self._usar_pool(dados, workers):
+            cipher = self.cipher
+            return [cipher.encrypt(d.encode()).decode() if d else "" for d in dados]
+        return self._em_paralelo(_cifrar_bloco, dados, workers)
+    
+    def decrypt_many(self, tokens: List[str], workers: Optional[int] = None) -> List[str]:
+        """
+        Descriptografa uma lista de tokens, em paralelo quando o lote é grande
+        
+        Args:
+            tokens: Tokens Fernet (vazios ou inválidos viram "")
+            workers: Processos do pool (None = núcleos da máquina, 1 = em série)
+        
+        Returns:
+            Textos na mesma ordem de tokens
+        """
+        tokens = list(tokens)
+        if not self._usar_pool(tokens, workers):
+            return [self.decrypt(t) for t in tokens]
+        return self._em_paralelo(_decifrar_bloco, tokens, workers)
+    
+    def _usar_pool(self, itens: list, workers: Optional[int]) -> bool:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        return workers > 1 and len(itens) >= self.LIMITE_PARALELO
+    
+    def _em_paralelo(self, funcao, itens: List[str], workers: Optional[int]) -> List[str]:
+        """Divide em blocos, processa num pool de processos e junta na ordem original"""
+        blocos = [itens[i:i + self.TAMANHO_BLOCO] for i in range(0, len(itens), self.TAMANHO_BLOCO)]
+        # spawn: os processos não herdam as threads (flush, Tk) do processo atual;
+        # no executável (PyInstaller) depende do freeze_support() em main.py
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker_crypto,
+                                 initargs=(self._chave_fernet,),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            # map devolve os resultados na ordem dos blocos
+            return [valor for bloco in pool.map(funcao, blocos) for valor in bloco]
+    
+    def indice_cego(self, valor: str) -> str:
+        """HMAC-SHA256 (hex) de um valor já normalizado, para busca exata sem decifrar"""
+        return hmac.new(self._chave_indice, valor.encode(), hashlib.sha256).hexdigest()
+    
     def decrypt(self, encrypted_data: str) -> str:
         """Descriptografa string"""
         if not encrypted_data:
@@ -70,13 +181,43 @@ class CryptoManager:
 class DatabaseSQLite:
     """Banco de dados SQLite com criptografia e thread-safe"""
     
-    def __init__(self, db_path: Path, senha_mestra: str = None):
+    # A cada N escritas, verificar se o -wal passou do limite e forçar checkpoint
+    ESCRITAS_POR_VERIFICACAO_WAL = 50
+    
+    # Intervalo padrão (segundos) da gravação periódica das alterações pendentes
+    INTERVALO_FLUSH_PADRAO = 5.0
+    
+    # Colunas de índice cego em clientes (HMAC do valor normalizado)
+    COLUNAS_INDICE_CEGO = ('cpf_cnpj_idx', 'telefone_idx', 'email_idx')
+    
+    # Buckets do índice de status de empréstimos
+    STATUS_EMPRESTIMO = ('em_dia', 'atrasado', 'quitado')
+    
+    # Acima de tantos registros alterados por fora, recarregar o cache inteiro
+    LIMITE_RECARGA_PARCIAL = 5000
+    
+    # Segundos entre regravações do snapshot do dia pela thread de background
+    INTERVALO_SNAPSHOT = 15 * 60
+    
+    def __init__(self, db_path: Path, senha_mestra: str = None, max_conexoes: int = 5,
+                 perfil_durabilidade: str = 'balanced',
+                 intervalo_flush: Optional[float] = INTERVALO_FLUSH_PADRAO,
+                 modo_repositorio: bool = False):
         """
         Inicializa o banco de dados
         
         Args:
             db_path: Caminho para o arquivo .db
             senha_mestra: Senha mestra para criptografia (None = sem criptografia)
+            max_conexoes: Tamanho máximo do pool de conexões
+            perfil_durabilidade: 'safe', 'balanced' (padrão) ou 'fast'
+                (ver PERFIS_DURABILIDADE em models/pool_conexoes.py)
+            intervalo_flush: Segundos entre gravações automáticas das alterações
+                pendentes e verificações de alterações externas (None ou 0 =
+                só em salvar_dados/fechar/verificar_alteracoes_externas)
+            modo_repositorio: Se True, buscas por ID e por cliente consultam o
+                banco (via self.repositorio) em vez de carregar tudo no cache;
+                as telas de listagem passam a pedir páginas
         """
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -84,6 +225,13 @@ class DatabaseSQLite:
         # Lock para operações thread-safe
         self.lock = threading.Lock()
         
+        # Pool de conexões persistentes (uma por thread em uso), em modo WAL
+        self.pool = PoolConexoes(db_path, max_conexoes=max_conexoes, perfil=perfil_durabilidade)
+        self._escritas_desde_verificacao = 0
+        
+        # Incrementado a cada commit; usado para invalidar páginas em cache
+        self.versao_dados = 0
+        
         # Gerenciador de criptografia
         self.crypto = None
         if senha_mestra:
@@ -102,92 +250,170 @@ class DatabaseSQLite:
         # Criar tabelas
         self._criar_tabelas()
         
+        # Acesso paginado (sempre disponível; obrigatório no modo repositório)
+        self.modo_repositorio = modo_repositorio
+        self.repositorio = RepositorioPaginado(self)
+        
         # Cache de dados
         self._clientes_cache = []
         self._emprestimos_cache = []
-        self._usuarios_cache = []
-        self._lembretes_cache = []
         self._cache_valido = False
+        # Usuários e lembretes têm consulta própria (o login não carrega a carteira)
+        self._usuarios_cache = None
+        self._lembretes_cache = None
+        
+        # Identity map: id -> objeto (lookups O(1), sempre em sincronia com as listas)
+        self._clientes_por_id = {}
+        self._emprestimos_por_id = {}
+        self._pagamentos_por_id = {}
+        
+        # Índices secundários de empréstimos (mantidos incrementalmente)
+        self._emprestimos_por_cliente = {}   # cliente_id -> {emp_id: emp}
+        self._emprestimos_por_status = {s: {} for s in self.STATUS_EMPRESTIMO}
+        self._vencimentos = []               # [(data_vencimento, emp_id)] ordenado
+        self._vencimentos_abertos = []       # idem, só não quitados (vencidos / a vencer)
+        self._indice_emprestimo = {}         # emp_id -> (cliente_id, status, vencimento)
+        self._dia_indices = date.today().isoformat()  # dia usado para classificar atrasados
+        
+        # Unidade de trabalho: (tabela, id) -> (operação, objeto), em ordem de chegada
+        self._pendentes = {}
+        # Blocos transaction() abertos em cada thread e as chaves alteradas
+        # dentro deles (flushes de outras threads não as gravam antes da hora)
+        self._transacoes = threading.local()
+        self._chaves_reservadas = set()
+        
+        # Alterações feitas por outros processos: conexão própria para o
+        # PRAGMA data_version e posição já lida do log_alteracoes
+        self._conn_monitor = self.pool._criar_conexao()
+        self._lock_monitor = threading.Lock()
+        self._data_version = self._conn_monitor.execute("PRAGMA data_version").fetchone()[0]
+        self._seq_visto = ultimo_seq(self._conn_monitor)
+        self._trechos_proprios = []   # [(seq_inicial, seq_final)] gravados por este processo
+        self._ouvintes_alteracoes = []
+        
+        # Último snapshot diário gravado (time.monotonic)
+        self._ultimo_snapshot = None
+        
+        # Gravação periódica em background
+        self.intervalo_flush = intervalo_flush
+        self._parar_flush = threading.Event()
+        self._thread_flush = None
+        if intervalo_flush:
+            self._thread_flush = threading.Thread(target=self._loop_flush, daemon=True)
+            self._thread_flush.start()
     
     def _criar_tabelas(self):
         """Cria as tabelas do banco"""
         with self.lock:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
+            with self.pool.conexao() as conn:
+                cursor = conn.cursor()
+            
+                # Tabela de clientes
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS clientes (
+                        id TEXT PRIMARY KEY,
+                        nome TEXT NOT NULL,
+                        cpf_cnpj TEXT NOT NULL,
+                        telefone TEXT NOT NULL,
+                        email TEXT NOT NULL,
+                        endereco TEXT,
+                        data_cadastro TEXT NOT NULL
+                    )
+                """)
+            
+                # Tabela de empréstimos
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS emprestimos (
+                        id TEXT PRIMARY KEY,
+                        cliente_id TEXT NOT NULL,
+                        valor_emprestado REAL NOT NULL,
+                        taxa_juros REAL NOT NULL,
+                        data_emprestimo TEXT NOT NULL,
+                        prazo_meses INTEGER NOT NULL,
+                        data_vencimento TEXT NOT NULL,
+                        valor_total REAL NOT NULL,
+                        saldo_devedor REAL NOT NULL,
+                        ativo INTEGER NOT NULL,
+                        observacoes TEXT,
+                        metodo_calculo TEXT,
+                        FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
+                    )
+                """)
+            
+                # Tabela de pagamentos
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS pagamentos (
+                        id TEXT PRIMARY KEY,
+                        emprestimo_id TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        valor REAL NOT NULL,
+                        tipo TEXT,
+                        saldo_anterior REAL,
+                        metodo TEXT,
+                        FOREIGN KEY (emprestimo_id) REFERENCES emprestimos(id) ON DELETE CASCADE
+                    )
+                """)
+            
+                # Tabela de usuários
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS usuarios (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        username TEXT UNIQUE NOT NULL,
+                        password_hash TEXT NOT NULL
+                    )
+                """)
+            
+                # Tabela de lembretes (bancos antigos são corrigidos pela migração 1)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS lembretes (
+                        id TEXT PRIMARY KEY,
+                        tipo TEXT NOT NULL,
+                        mensagem TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        concluido INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
             
-            # Tabela de clientes
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS clientes (
-                    id TEXT PRIMARY KEY,
-                    nome TEXT NOT NULL,
-                    cpf_cnpj TEXT NOT NULL,
-                    telefone TEXT NOT NULL,
-                    email TEXT NOT NULL,
-                    endereco TEXT,
-                    data_cadastro TEXT NOT NULL
-                )
-            """)
-            
-            # Tabela de empréstimos
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS emprestimos (
-                    id TEXT PRIMARY KEY,
-                    cliente_id TEXT NOT NULL,
-                    valor_emprestado REAL NOT NULL,
-                    taxa_juros REAL NOT NULL,
-                    data_emprestimo TEXT NOT NULL,
-                    prazo_meses INTEGER NOT NULL,
-                    data_vencimento TEXT NOT NULL,
-                    valor_total REAL NOT NULL,
-                    saldo_devedor REAL NOT NULL,
-                    ativo INTEGER NOT NULL,
-                    observacoes TEXT,
-                    metodo_calculo TEXT,
-                    FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # Tabela de pagamentos
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS pagamentos (
-                    id TEXT PRIMARY KEY,
-                    emprestimo_id TEXT NOT NULL,
-                    data TEXT NOT NULL,
-                    valor REAL NOT NULL,
-                    tipo TEXT,
-                    saldo_anterior REAL,
-                    metodo TEXT,
-                    FOREIGN KEY (emprestimo_id) REFERENCES emprestimos(id) ON DELETE CASCADE
-                )
-            """)
-            
-            # Tabela de usuários
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL
-                )
-            """)
-            
-            # Tabela de lembretes
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS lembretes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    titulo TEXT NOT NULL,
-                    descricao TEXT,
-                    data TEXT NOT NULL,
-                    concluido INTEGER NOT NULL DEFAULT 0
-                )
-            """)
-            
-            # Índices para performance
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_emprestimos_cliente ON emprestimos(cliente_id)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_emprestimos_ativo ON emprestimos(ativo)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pagamentos_emprestimo ON pagamentos(emprestimo_id)")
-            
-            conn.commit()
-            conn.close()
+                # Índices para performance (os mais novos vêm das migrações)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_emprestimos_cliente ON emprestimos(cliente_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_emprestimos_ativo ON emprestimos(ativo)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_pagamentos_emprestimo ON pagamentos(emprestimo_id)")
+            
+                conn.commit()
+                
+                # Colunas e índices novos, em passos versionados (PRAGMA user_version)
+                self.migracoes_aplicadas = migrar(conn, self)
+                
+                # Busca full-text de clientes (mantida por triggers)
+                self._fts_disponivel = criar_indice_busca(cursor)
+                
+                # Log de alterações (detecção de escritas de outros processos)
+                criar_log_alteracoes(cursor)
+                
+                conn.commit()
+    
+    def _apos_escrita(self):
+        """
+        Controle de crescimento do WAL em sessões longas
+        
+        O autocheckpoint do SQLite é passivo e não consegue reciclar o -wal
+        enquanto houver leitores ativos; periodicamente verificamos o tamanho
+        e forçamos um checkpoint RESTART quando passa do limite.
+        """
+        self.versao_dados += 1
+        self._escritas_desde_verificacao += 1
+        if self._escritas_desde_verificacao < self.ESCRITAS_POR_VERIFICACAO_WAL:
+            return
+        self._escritas_desde_verificacao = 0
+        
+        if self.pool.tamanho_wal() > WAL_LIMITE_BYTES:
+            self.checkpoint('RESTART')
+    
+    def checkpoint(self, modo: str = 'PASSIVE') -> tuple:
+        """Executa checkpoint do WAL (ver PoolConexoes.checkpoint)"""
+        resultado = self.pool.checkpoint(modo)
+        logger.debug(f"Checkpoint {modo}: {resultado}")
+        return resultado
     
     def _encrypt_sensitive(self, data: str) -> str:
         """Criptografa dado sensível se crypto estiver ativo"""
@@ -195,241 +421,1218 @@ class DatabaseSQLite:
             return self.crypto.encrypt(data)
         return data
     
+    def _encrypt_sensitive_lote(self, dados: List[str], workers: Optional[int] = None) -> List[str]:
+        """Criptografa uma lista de dados sensíveis se crypto estiver ativo"""
+        if self.crypto:
+            return self.crypto.encrypt_many(dados, workers=workers)
+        return list(dados)
+    
     def _decrypt_sensitive(self, data: str) -> str:
         """Descriptografa dado sensível se crypto estiver ativo"""
         if self.crypto:
             return self.crypto.decrypt(data)
         return data
     
+    def _decrypt_sensitive_lote(self, dados: List[str], workers: Optional[int] = None) -> List[str]:
+        """Descriptografa uma lista de dados sensíveis se crypto estiver ativo"""
+        if self.crypto:
+            return self.crypto.decrypt_many(dados, workers=workers)
+        return list(dados)
+    
+    def dados_sensiveis_clientes(self, clientes: List[Cliente]) -> List[tuple]:
+        """
+        (cpf_cnpj, telefone, email) em claro de vários clientes de uma vez
+        
+        Para exportações completas: decifra tudo num único lote (paralelo)
+        em vez de um campo por vez na leitura de cada atributo.
+        """
+        campos = ('cpf_cnpj', 'telefone', 'email')
+        valores = [c.valor_armazenado(campo) for c in clientes for campo in campos]
+        pendentes = [i for i, v in enumerate(valores) if isinstance(v, ValorCifrado)]
+        if pendentes:
+            decifrados = self._decrypt_sensitive_lote([valores[i].token for i in pendentes])
+            for i, texto in zip(pendentes, decifrados):
+                valores[i] = texto
+        return [tuple(valores[i:i + 3]) for i in range(0, len(valores), 3)]
+    
+    def _sensivel_sob_demanda(self, data: str):
+        """Valor para um campo sensível de Cliente: cifrado só é decifrado ao ser lido"""
+        if self.crypto and data:
+            return ValorCifrado(data, self.crypto.decrypt_memo)
+        return data
+    
+    def _cifrar_campo(self, cliente: Cliente, campo: str) -> str:
+        """Texto cifrado do campo; reaproveita o do banco se o campo não foi alterado"""
+        valor = cliente.valor_armazenado(campo)
+        if isinstance(valor, ValorCifrado):
+            return valor.token
+        return self._encrypt_sensitive(valor)
+    
+    # ==================== ÍNDICES CEGOS ====================
+    
+    @staticmethod
+    def _so_digitos(valor: str) -> str:
+        return "".join(c for c in (valor or "") if c.isdigit())
+    
+    def _indice_cego(self, valor: str) -> Optional[str]:
+        """
+        Valor da coluna de índice cego (None para valor vazio)
+        
+        Com criptografia é o HMAC com chave derivada da senha mestra; sem ela
+        os dados já estão em claro e o próprio valor normalizado é usado.
+        """
+        if not valor:
+            return None
+        if self.crypto:
+            return self.crypto.indice_cego(valor)
+        return valor
+    
+    def _indices_cegos_cliente(self, cliente: Cliente) -> tuple:
+        """(cpf_cnpj_idx, telefone_idx, email_idx) normalizados"""
+        return (
+            self._indice_cego(self._so_digitos(cliente.cpf_cnpj)),
+            self._indice_cego(self._so_digitos(cliente.telefone)),
+            self._indice_cego((cliente.email or "").strip().lower()),
+        )
+    
+    def _calcular_indices_cegos(self, rows) -> List[tuple]:
+        """
+        (cpf_cnpj_idx, telefone_idx, email_idx, id) de linhas da tabela clientes
+        
+        Usado pela migração que preenche clientes gravados antes das colunas
+        existirem; roda na inicialização, então fica em série (sem pool de processos).
+        """
+        textos = self._decrypt_sensitive_lote(
+            [row[campo] for row in rows for campo in ('cpf_cnpj', 'telefone', 'email')], workers=1
+        )
+        indices = []
+        for i, row in enumerate(rows):
+            cpf, telefone, email = textos[3 * i:3 * i + 3]
+            cliente = Cliente(nome="", cpf_cnpj=cpf, telefone=telefone, email=email, endereco="")
+            indices.append(self._indices_cegos_cliente(cliente) + (row['id'],))
+        return indices
+    
+    def _clientes_por_indice(self, coluna: str, valor: Optional[str]) -> List[Cliente]:
+        """Clientes cujo índice cego na coluna bate com o valor (consulta indexada)"""
+        if not valor:
+            return []
+        # Clientes ainda só em memória também precisam aparecer
+        self.salvar_dados()
+        with self.pool.conexao() as conn:
+            ids = [row[0] for row in conn.execute(
+                f"SELECT id FROM clientes WHERE {coluna} = ?", (valor,)
+            )]
+        return [c for c in map(self.get_cliente_por_id, ids) if c is not None]
+    
+    def buscar_cliente_por_documento(self, cpf_cnpj: str) -> Optional[Cliente]:
+        """Busca exata por CPF/CNPJ (com ou sem pontuação), sem decifrar nada"""
+        encontrados = self._clientes_por_indice(
+            'cpf_cnpj_idx', self._indice_cego(self._so_digitos(cpf_cnpj)))
+        return encontrados[0] if encontrados else None
+    
+    def buscar_clientes_por_telefone(self, telefone: str) -> List[Cliente]:
+        """Busca exata por telefone (só dígitos contam)"""
+        return self._clientes_por_indice('telefone_idx', self._indice_cego(self._so_digitos(telefone)))
+    
+    def buscar_cliente_por_email(self, email: str) -> Optional[Cliente]:
+        """Busca exata por e-mail (sem diferenciar maiúsculas)"""
+        encontrados = self._clientes_por_indice('email_idx', self._indice_cego(email.strip().lower()))
+        return encontrados[0] if encontrados else None
+    
+    def existe_cpf_cnpj(self, cpf_cnpj: str, ignorar_id: str = None) -> bool:
+        """Verifica unicidade de CPF/CNPJ (ignorar_id = o próprio cliente em edição)"""
+        encontrados = self._clientes_por_indice(
+            'cpf_cnpj_idx', self._indice_cego(self._so_digitos(cpf_cnpj)))
+        return any(c.id != ignorar_id for c in encontrados)
+    
     # ==================== CLIENTES ====================
     
     @property
     def clientes(self) -> List[Cliente]:
         """Lista de clientes (cache)"""
+        self._garantir_cache()
+        return self._clientes_cache
+    
+    def _garantir_cache(self):
+        """Carrega o cache na primeira necessidade"""
         if not self._cache_valido:
             self._carregar_cache()
-        return self._clientes_cache
+    
+    def _preparar_cache_para_escrita(self):
+        """
+        Carrega o cache antes de adicionar objetos, para o objeto adicionado
+        ser o mesmo que fica no cache (no modo repositório não há cache completo)
+        """
+        if not self.modo_repositorio:
+            self._garantir_cache()
     
     def _carregar_cache(self):
         """Carrega dados do banco para cache"""
         with self.lock:
-            conn = sqlite3.connect(str(self.db_path))
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            with self.pool.conexao() as conn:
+                cursor = conn.cursor()
             
-            # Carregar clientes
-            cursor.execute("SELECT * FROM clientes")
-            self._clientes_cache = []
-            for row in cursor.fetchall():
-                cliente = Cliente(
-                    nome=row['nome'],
-                    cpf_cnpj=self._decrypt_sensitive(row['cpf_cnpj']),
-                    telefone=self._decrypt_sensitive(row['telefone']),
-                    email=self._decrypt_sensitive(row['email']),
-                    endereco=row['endereco']
-                )
-                cliente.id = row['id']
-                cliente.data_cadastro = row['data_cadastro']
-                self._clientes_cache.append(cliente)
+                # Carregar clientes
+                cursor.execute("SELECT * FROM clientes")
+                self._clientes_cache = []
+                self._clientes_por_id = {}
+                for row in cursor.fetchall():
+                    cliente = self._cliente_de_row(row)
+                    self._clientes_cache.append(cliente)
+                    self._clientes_por_id[cliente.id] = cliente
             
-            # Carregar empréstimos
-            cursor.execute("SELECT * FROM emprestimos")
-            self._emprestimos_cache = []
-            for row in cursor.fetchall():
-                # Carregar pagamentos do empréstimo
-                cursor.execute("SELECT * FROM pagamentos WHERE emprestimo_id = ?", (row['id'],))
-                pagamentos = []
-                for p in cursor.fetchall():
-                    pag = {
-                        'id': p['id'],
-                        'valor': p['valor'],
-                        'data': p['data'],
-                        'tipo': p.get('tipo', 'Parcela'),
-                        'saldo_anterior': p.get('saldo_anterior', 0)
-                    }
-                    if p.get('metodo'):
-                        pag['metodo'] = p['metodo']
-                    pagamentos.append(pag)
-                
-                emprestimo = Emprestimo(
-                    cliente_id=row['cliente_id'],
-                    valor_emprestado=row['valor_emprestado'],
-                    taxa_juros=row['taxa_juros'],
-                    data_emprestimo=row['data_emprestimo'],
-                    prazo_meses=row['prazo_meses'],
-                    data_vencimento=row['data_vencimento'],
-                    metodo_calculo=row['metodo_calculo']
-                )
-                emprestimo.id = row['id']
-                emprestimo.valor_total = row['valor_total']
-                emprestimo.saldo_devedor = row['saldo_devedor']
-                emprestimo.ativo = bool(row['ativo'])
-                emprestimo.observacoes = row['observacoes']
-                emprestimo.pagamentos = pagamentos
-                self._emprestimos_cache.append(emprestimo)
-            
-            # Carregar usuários
-            cursor.execute("SELECT * FROM usuarios")
-            self._usuarios_cache = []
-            for row in cursor.fetchall():
-                usuario = Usuario(row['username'], "")
-                usuario.password_hash = row['password_hash']
-                self._usuarios_cache.append(usuario)
+                # Carregar pagamentos numa única passada ordenada, agrupados por empréstimo
+                pagamentos_por_emprestimo = self._carregar_pagamentos_agrupados(conn)
             
-            # Carregar lembretes
-            cursor.execute("SELECT * FROM lembretes")
-            self._lembretes_cache = []
-            for row in cursor.fetchall():
-                lembrete = {
-                    "id": row['id'],
-                    "tipo": row['tipo'],
-                    "mensagem": row['mensagem'],
-                    "data": row['data']
-                }
-                self._lembretes_cache.append(lembrete)
+                # Carregar empréstimos
+                cursor.execute("SELECT * FROM emprestimos")
+                self._emprestimos_cache = []
+                self._emprestimos_por_id = {}
+                self._pagamentos_por_id = {}
+                self._limpar_indices()
+                for row in cursor.fetchall():
+                    pagamentos = pagamentos_por_emprestimo.get(row['id'], [])
+                    emprestimo = self._emprestimo_de_row(row, pagamentos)
+                    self._emprestimos_cache.append(emprestimo)
+                    self._emprestimos_por_id[emprestimo.id] = emprestimo
+                    self._mapear_pagamentos(emprestimo)
+                    self._indexar_emprestimo(emprestimo, em_massa=True)
+                self._ordenar_vencimentos()
             
-            conn.close()
             self._cache_valido = True
     
+    def _cliente_de_row(self, row) -> Cliente:
+        """Monta Cliente a partir de uma linha da tabela clientes"""
+        return Cliente.from_row(row, self._sensivel_sob_demanda)
+    
+    def _emprestimo_de_row(self, row, pagamentos: list) -> Emprestimo:
+        """Monta Emprestimo a partir de uma linha da tabela emprestimos"""
+        return Emprestimo.from_row(row, pagamentos)
+    
+    def _mapear_pagamentos(self, emprestimo: Emprestimo):
+        """Registra os pagamentos do empréstimo no identity map"""
+        for pag in emprestimo.pagamentos:
+            if pag.get('id'):
+                self._pagamentos_por_id[pag['id']] = pag
+    
+    def _desmapear_pagamentos(self, emprestimo: Emprestimo):
+        """Remove os pagamentos do empréstimo do identity map"""
+        for pag in emprestimo.pagamentos:
+            self._pagamentos_por_id.pop(pag.get('id'), None)
+    
+    def _carregar_pagamentos_agrupados(self, conn, emprestimo_ids: list = None) -> dict:
+        """
+        Lê todos os pagamentos de uma vez (evita uma consulta por empréstimo)
+        
+        Args:
+            emprestimo_ids: Restringe aos pagamentos destes empréstimos
+                (None = todos)
+        
+        Returns:
+            Dict emprestimo_id -> lista de Pagamento em ordem de data
+        """
+        agrupados = {}
+        emprestimo_atual = None
+        lista = None
+        
+        # Tuplas simples em vez de sqlite3.Row: bem mais rápido em tabelas grandes
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        filtro = ""
+        if emprestimo_ids is not None:
+            filtro = f"WHERE emprestimo_id IN ({', '.join('?' * len(emprestimo_ids))})"
+        cursor.execute(f"""
+            SELECT emprestimo_id, id, valor, data, tipo, saldo_anterior, metodo
+            FROM pagamentos
+            {filtro}
+            ORDER BY emprestimo_id, data, rowid
+        """, list(emprestimo_ids or []))
+        for emprestimo_id, pag_id, valor, data, tipo, saldo_anterior, metodo in cursor:
+            if emprestimo_id != emprestimo_atual:
+                emprestimo_atual = emprestimo_id
+                lista = agrupados.setdefault(emprestimo_atual, [])
+            
+            lista.append(Pagamento(pag_id, valor, data, tipo, saldo_anterior, metodo))
+        return agrupados
+    
     def adicionar_cliente(self, cliente: Cliente):
-        """Adiciona novo cliente"""
+        """Adiciona novo cliente (gravado no próximo salvar_dados)"""
+        self._preparar_cache_para_escrita()
+        
         with self.lock:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
+            self._registrar_alteracao('clientes', cliente.id, 'inserir', cliente)
+            if not self.modo_repositorio:
+                self._clientes_cache.append(cliente)
+                self._clientes_por_id[cliente.id] = cliente
+            logger.info(f"Cliente {cliente.nome} adicionado")
+    
+    def atualizar_cliente(self, cliente: Cliente):
+        """Marca cliente editado para gravação no próximo salvar_dados"""
+        with self.lock:
+            self._registrar_alteracao('clientes', cliente.id, 'atualizar', cliente)
+    
+    def remover_cliente(self, cliente: Cliente):
+        """Remove cliente junto com seus empréstimos e pagamentos"""
+        emprestimos_cliente = self.get_emprestimos_by_cliente(cliente.id)
+        
+        with self.lock:
+            # FOREIGN KEY ... ON DELETE CASCADE não está ativo; remover em cascata aqui
+            for emp in emprestimos_cliente:
+                self._registrar_alteracao('emprestimos', emp.id, 'remover', emp)
+                self._remover_emprestimo_do_cache(emp)
+            self._registrar_alteracao('clientes', cliente.id, 'remover', cliente)
             
-            cursor.execute("""
-                INSERT INTO clientes (id, nome, cpf_cnpj, telefone, email, endereco, data_cadastro)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                cliente.id,
-                cliente.nome,
-                self._encrypt_sensitive(cliente.cpf_cnpj),
-                self._encrypt_sensitive(cliente.telefone),
-                self._encrypt_sensitive(cliente.email),
-                cliente.endereco,
-                cliente.data_cadastro
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            self._clientes_cache.append(cliente)
-            logger.info(f"Cliente {cliente.nome} adicionado ao banco")
-    
-    def buscar_cliente(self, termo: str) -> List[Cliente]:
-        """Busca clientes por nome, CPF ou telefone"""
-        termo = termo.lower()
-        return [c for c in self.clientes 
-                if termo in c.nome.lower() 
-                or termo in c.cpf_cnpj.lower() 
-                or termo in c.telefone.lower()]
+            self._clientes_por_id.pop(cliente.id, None)
+            if cliente in self._clientes_cache:
+                self._clientes_cache.remove(cliente)
+            logger.info(f"Cliente {cliente.id} removido")
+    
+    def buscar_cliente(self, termo: str, limite: int = None) -> List[Cliente]:
+        """
+        Busca clientes por nome, CPF ou telefone
+        
+        Usa o índice FTS5: não diferencia acentos ("joao" encontra "João"),
+        casa prefixos de palavras e devolve os mais relevantes primeiro.
+        Sem FTS5 disponível, cai para a varredura linear.
+        """
+        consulta = montar_consulta_fts(termo)
+        if consulta is None:
+            return []
+        if not self._fts_disponivel:
+            return self._buscar_cliente_linear(termo, limite)
+        
+        # Clientes que ainda estão só em memória não estão no índice
+        self.salvar_dados()
+        try:
+            with self.pool.conexao() as conn:
+                ids = [row[0] for row in conn.execute("""
+                    SELECT cliente_id FROM clientes_fts
+                    WHERE clientes_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                """, (consulta, limite if limite is not None else -1))]
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Consulta FTS inválida ({consulta!r}): {e}")
+            return self._buscar_cliente_linear(termo, limite)
+        
+        encontrados = [c for c in map(self.get_cliente_por_id, ids) if c is not None]
+        
+        # Com criptografia CPF/telefone/e-mail não vão para o FTS: busca exata
+        # pelos índices cegos (documento ou telefone completo, e-mail inteiro)
+        if self.crypto:
+            vistos = {c.id for c in encontrados}
+            digitos = self._so_digitos(termo)
+            exatos = []
+            if digitos:
+                exatos += self._clientes_por_indice('cpf_cnpj_idx', self._indice_cego(digitos))
+                exatos += self._clientes_por_indice('telefone_idx', self._indice_cego(digitos))
+            if '@' in termo:
+                exatos += self._clientes_por_indice('email_idx', self._indice_cego(termo.strip().lower()))
+            encontrados = [c for c in exatos if c.id not in vistos] + encontrados
+            if limite is not None:
+                encontrados = encontrados[:limite]
+        return encontrados
+    
+    def _buscar_cliente_linear(self, termo: str, limite: int = None) -> List[Cliente]:
+        """Busca por substring em todos os clientes do cache (sem acentos)"""
+        termo = normalizar(termo)
+        encontrados = [c for c in self.clientes 
+                       if termo in normalizar(c.nome) 
+                       or termo in normalizar(c.cpf_cnpj) 
+                       or termo in normalizar(c.telefone)]
+        return encontrados[:limite] if limite is not None else encontrados
+    
+    def nomes_clientes(self) -> List[tuple]:
+        """
+        (id, nome) de todos os clientes, em ordem de nome (filtros e seletores)
+        
+        No modo repositório vem de uma consulta só de duas colunas, sem
+        carregar nem descriptografar os clientes.
+        """
+        if self.modo_repositorio:
+            self.salvar_dados()
+            return self.repositorio.nomes_clientes()
+        return sorted(((c.id, c.nome) for c in self.clientes), key=lambda item: (item[1], item[0]))
     
     def get_cliente_por_id(self, cliente_id: str) -> Optional[Cliente]:
-        """Busca cliente por ID"""
-        for cliente in self.clientes:
-            if cliente.id == cliente_id:
-                return cliente
-        return None
+        """Busca cliente por ID (O(1) via identity map)"""
+        if self.modo_repositorio:
+            # Cliente novo ainda não gravado só existe na unidade de trabalho
+            operacao, pendente = self._pendentes.get(('clientes', cliente_id), (None, None))
+            if operacao == 'inserir':
+                return pendente
+            return self._clientes_por_id.get(cliente_id) or self.repositorio.cliente(cliente_id)
+        self._garantir_cache()
+        return self._clientes_por_id.get(cliente_id)
     
     # ==================== EMPRÉSTIMOS ====================
     
     @property
     def emprestimos(self) -> List[Emprestimo]:
         """Lista de empréstimos (cache)"""
-        if not self._cache_valido:
-            self._carregar_cache()
+        self._garantir_cache()
         return self._emprestimos_cache
     
     def adicionar_emprestimo(self, emprestimo: Emprestimo):
-        """Adiciona novo empréstimo"""
+        """Adiciona novo empréstimo (gravado no próximo salvar_dados)"""
+        self._preparar_cache_para_escrita()
+        
         with self.lock:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO emprestimos (
-                    id, cliente_id, valor_emprestado, taxa_juros,
-                    data_emprestimo, prazo_meses, data_vencimento, valor_total,
-                    saldo_devedor, ativo, observacoes, metodo_calculo
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                emprestimo.id,
-                emprestimo.cliente_id,
-                emprestimo.valor_emprestado,
-                emprestimo.taxa_juros,
-                emprestimo.data_emprestimo,
-                emprestimo.prazo_meses,
-                emprestimo.data_vencimento,
-                emprestimo.valor_total,
-                emprestimo.saldo_devedor,
-                1 if emprestimo.ativo else 0,
-                emprestimo.observacoes,
-                emprestimo.metodo_calculo
-            ))
-            
-            conn.commit()
-            conn.close()
+            # Histórico que já veio com o objeto (ex.: migração) precisa de ids estáveis
+            emprestimo.pagamentos = [Pagamento.de_dict(pag) for pag in emprestimo.pagamentos]
+            for pag in emprestimo.pagamentos:
+                if not pag.get('id'):
+                    pag['id'] = emprestimo.gerar_id_pagamento()
+            emprestimo.atualizar_agregados()
             
+            self._registrar_alteracao('emprestimos', emprestimo.id, 'inserir', emprestimo)
             self._emprestimos_cache.append(emprestimo)
-            logger.info(f"Empréstimo {emprestimo.id} adicionado ao banco")
+            self._emprestimos_por_id[emprestimo.id] = emprestimo
+            self._mapear_pagamentos(emprestimo)
+            self._indexar_emprestimo(emprestimo)
+            logger.info(f"Empréstimo {emprestimo.id} adicionado")
+    
+    def get_emprestimo_por_id(self, emprestimo_id: str) -> Optional[Emprestimo]:
+        """Busca empréstimo por ID (O(1) via identity map)"""
+        if self.modo_repositorio:
+            return self._emprestimos_por_id.get(emprestimo_id) or self.repositorio.emprestimo(emprestimo_id)
+        self._garantir_cache()
+        return self._emprestimos_por_id.get(emprestimo_id)
+    
+    def get_pagamento_por_id(self, pagamento_id: str) -> Optional[Pagamento]:
+        """Busca pagamento por ID (O(1) via identity map)"""
+        if self.modo_repositorio:
+            # Pagamentos ainda não gravados só existem no identity map
+            return self._pagamentos_por_id.get(pagamento_id) or self.repositorio.pagamento(pagamento_id)
+        self._garantir_cache()
+        return self._pagamentos_por_id.get(pagamento_id)
+    
+    def remover_emprestimo(self, emprestimo: Emprestimo):
+        """Remove empréstimo e seus pagamentos"""
+        with self.lock:
+            self._registrar_alteracao('emprestimos', emprestimo.id, 'remover', emprestimo)
+            self._remover_emprestimo_do_cache(emprestimo)
+            logger.info(f"Empréstimo {emprestimo.id} removido")
+    
+    def _remover_emprestimo_do_cache(self, emprestimo: Emprestimo):
+        """Tira o empréstimo da lista, do identity map e dos índices"""
+        self._desmapear_pagamentos(emprestimo)
+        self._desindexar_emprestimo(emprestimo)
+        self._emprestimos_por_id.pop(emprestimo.id, None)
+        if emprestimo in self._emprestimos_cache:
+            self._emprestimos_cache.remove(emprestimo)
     
     def atualizar_emprestimo(self, emprestimo: Emprestimo):
-        """Atualiza empréstimo existente"""
+        """Marca empréstimo alterado para gravação no próximo salvar_dados"""
         with self.lock:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
+            self._registrar_alteracao('emprestimos', emprestimo.id, 'atualizar', emprestimo)
+            # Pagamentos novos entram no identity map; saldo pode ter mudado o status
+            self._mapear_pagamentos(emprestimo)
+            self._indexar_emprestimo(emprestimo)
+    
+    def registrar_pagamento(self, emprestimo: Emprestimo, valor: float, data: str = None,
+                            tipo: str = "Parcela") -> dict:
+        """
+        Registra pagamento no empréstimo (gravado no próximo salvar_dados)
+        
+        Usar este método em vez de Emprestimo.registrar_pagamento direto,
+        para manter banco e índices em sincronia.
+        
+        Returns:
+            O pagamento registrado
+        """
+        with self.lock:
+            emprestimo.registrar_pagamento(valor, data=data, tipo=tipo)
+            pagamento = emprestimo.pagamentos[-1]
+            self._registrar_alteracao('emprestimos', emprestimo.id, 'atualizar', emprestimo)
+            self._pagamentos_por_id[pagamento['id']] = pagamento
+            self._indexar_emprestimo(emprestimo)
+        return pagamento
+    
+    # ==================== CARGA EM LOTE ====================
+    
+    def adicionar_clientes_em_lote(self, clientes: Iterable[Cliente], workers: Optional[int] = None) -> dict:
+        """
+        Insere muitos clientes numa única transação (executemany)
+        
+        Grava direto no banco, sem passar pela unidade de trabalho; o que
+        estiver pendente é gravado antes.
+        
+        Args:
+            clientes: Clientes a inserir
+            workers: Processos para cifrar os campos (ver CryptoManager.encrypt_many;
+                1 = em série, como na migração feita na inicialização)
+        
+        Returns:
+            Dict com 'linhas', 'segundos' e 'linhas_por_segundo'
+        """
+        self._preparar_cache_para_escrita()
+        self.salvar_dados()
+        clientes = list(clientes)
+        inicio = time.perf_counter()
+        
+        with self.lock:
+            cpfs = self._encrypt_sensitive_lote([c.cpf_cnpj for c in clientes], workers)
+            telefones = self._encrypt_sensitive_lote([c.telefone for c in clientes], workers)
+            emails = self._encrypt_sensitive_lote([c.email for c in clientes], workers)
             
-            cursor.execute("""
-                UPDATE emprestimos SET
-                    valor_total = ?,
-                    saldo_devedor = ?,
-                    ativo = ?,
-                    observacoes = ?
-                WHERE id = ?
-            """, (
-                emprestimo.valor_total,
-                emprestimo.saldo_devedor,
-                1 if emprestimo.ativo else 0,
-                emprestimo.observacoes,
-                emprestimo.id
-            ))
-            
-            # Atualizar pagamentos
-            cursor.execute("DELETE FROM pagamentos WHERE emprestimo_id = ?", (emprestimo.id,))
-            for pag in emprestimo.pagamentos:
+            with self.pool.conexao() as conn, self._escrita(conn):
+                conn.executemany("""
+                    INSERT INTO clientes (id, nome, cpf_cnpj, telefone, email, endereco, data_cadastro,
+                                          cpf_cnpj_idx, telefone_idx, email_idx)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (c.id, c.nome, cpf, tel, email, c.endereco, c.data_cadastro) + self._indices_cegos_cliente(c)
+                    for c, cpf, tel, email in zip(clientes, cpfs, telefones, emails)
+                ])
+            self._apos_escrita()
+            
+            if not self.modo_repositorio:
+                for cliente in clientes:
+                    self._clientes_cache.append(cliente)
+                    self._clientes_por_id[cliente.id] = cliente
+        
+        return self._relatorio_lote("clientes", len(clientes), inicio)
+    
+    def adicionar_emprestimos_em_lote(self, emprestimos: Iterable[Emprestimo]) -> dict:
+        """
+        Insere muitos empréstimos (e o histórico de pagamentos que já trazem)
+        numa única transação
+        
+        Returns:
+            Dict com 'linhas', 'pagamentos', 'segundos' e 'linhas_por_segundo'
+        """
+        self._preparar_cache_para_escrita()
+        self.salvar_dados()
+        emprestimos = list(emprestimos)
+        inicio = time.perf_counter()
+        
+        with self.lock:
+            for emp in emprestimos:
+                emp.pagamentos = [Pagamento.de_dict(pag) for pag in emp.pagamentos]
+                for pag in emp.pagamentos:
+                    if not pag.get('id'):
+                        pag['id'] = emp.gerar_id_pagamento()
+                emp.atualizar_agregados()
+            
+            with self.pool.conexao() as conn, self._escrita(conn):
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    INSERT INTO emprestimos (
+                        id, cliente_id, valor_emprestado, taxa_juros,
+                        data_emprestimo, prazo_meses, data_vencimento, valor_total,
+                        saldo_devedor, ativo, observacoes, metodo_calculo, data_criacao
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(
+                    emp.id,
+                    emp.cliente_id,
+                    emp.valor_emprestado,
+                    emp.taxa_juros,
+                    emp.data_emprestimo,
+                    emp.prazo_meses,
+                    emp.data_vencimento,
+                    emp.valor_total,
+                    emp.saldo_devedor,
+                    1 if emp.ativo else 0,
+                    emp.observacoes,
+                    emp.metodo_calculo,
+                    emp.data_criacao
+                ) for emp in emprestimos])
+                
+                total_pagamentos = 0
+                for emp in emprestimos:
+                    if emp.pagamentos:
+                        self._inserir_pagamentos(cursor, emp, emp.pagamentos)
+                        total_pagamentos += len(emp.pagamentos)
+            self._apos_escrita()
+            
+            for emp in emprestimos:
+                emp.marcar_pagamentos_salvos()
+                self._emprestimos_cache.append(emp)
+                self._emprestimos_por_id[emp.id] = emp
+                self._mapear_pagamentos(emp)
+                self._indexar_emprestimo(emp, em_massa=True)
+            self._ordenar_vencimentos()
+        
+        relatorio = self._relatorio_lote("empréstimos", len(emprestimos), inicio)
+        relatorio['pagamentos'] = total_pagamentos
+        return relatorio
+    
+    def registrar_pagamentos_em_lote(self, pagamentos: Iterable[tuple]) -> dict:
+        """
+        Registra muitos pagamentos numa única transação
+        
+        Args:
+            pagamentos: Tuplas (emprestimo, valor) ou (emprestimo, valor, data)
+                ou (emprestimo, valor, data, tipo)
+        
+        Pagamentos recusados pelo empréstimo (já quitado, valor inválido) são
+        ignorados e contados em 'rejeitados'.
+        
+        Returns:
+            Dict com 'linhas', 'rejeitados', 'segundos' e 'linhas_por_segundo'
+        """
+        self._preparar_cache_para_escrita()
+        self.salvar_dados()
+        inicio = time.perf_counter()
+        rejeitados = 0
+        
+        with self.lock:
+            alterados = {}
+            for emp, valor, *resto in pagamentos:
+                data = resto[0] if len(resto) > 0 else None
+                tipo = resto[1] if len(resto) > 1 else "Parcela"
+                try:
+                    emp.registrar_pagamento(valor, data=data, tipo=tipo)
+                except ValueError:
+                    rejeitados += 1
+                    continue
+                alterados[emp.id] = emp
+            
+            novos = [(emp, emp.pagamentos_pendentes()) for emp in alterados.values()]
+            try:
+                with self.pool.conexao() as conn, self._escrita(conn):
+                    cursor = conn.cursor()
+                    for emp, pendentes in novos:
+                        self._inserir_pagamentos(cursor, emp, pendentes)
+                    cursor.executemany("""
+                        UPDATE emprestimos SET valor_total = ?, saldo_devedor = ?, ativo = ?
+                        WHERE id = ?
+                    """, [
+                        (emp.valor_total, emp.saldo_devedor, 1 if emp.ativo else 0, emp.id)
+                        for emp in alterados.values()
+                    ])
+            except sqlite3.Error:
+                # Objetos em memória já receberam os pagamentos: recarregar do banco
+                self._cache_valido = False
+                raise
+            self._apos_escrita()
+            
+            for emp, pendentes in novos:
+                emp.marcar_pagamentos_salvos()
+                for pag in pendentes:
+                    self._pagamentos_por_id[pag['id']] = pag
+                self._indexar_emprestimo(emp)
+        
+        total = sum(len(pendentes) for _, pendentes in novos)
+        relatorio = self._relatorio_lote("pagamentos", total, inicio)
+        relatorio['rejeitados'] = rejeitados
+        return relatorio
+    
+    def _relatorio_lote(self, nome: str, linhas: int, inicio: float) -> dict:
+        """Monta (e registra no log) as métricas de uma carga em lote"""
+        segundos = time.perf_counter() - inicio
+        por_segundo = linhas / segundos if segundos > 0 else float(linhas)
+        logger.info(f"Lote de {nome}: {linhas} linhas em {segundos:.3f}s ({por_segundo:,.0f} linhas/s)")
+        return {'linhas': linhas, 'segundos': segundos, 'linhas_por_segundo': por_segundo}
+    
+    # ==================== UNIDADE DE TRABALHO ====================
+    
+    def _registrar_alteracao(self, tabela: str, obj_id: str, operacao: str, obj):
+        """
+        Enfileira uma alteração para o próximo flush (chamar com self.lock)
+        
+        Combina com o que já estava pendente para o mesmo objeto: alterações
+        em objeto ainda não gravado viram parte do INSERT, e remover um objeto
+        que nunca chegou ao banco simplesmente descarta a pendência.
+        """
+        chave = (tabela, obj_id)
+        if self._em_transacao():
+            # Só o próprio bloco grava esta alteração (ver transaction)
+            self._transacoes.chaves.add(chave)
+            self._chaves_reservadas.add(chave)
+        pendente = self._pendentes.get(chave)
+        if pendente is not None and pendente[0] == 'inserir':
+            if operacao == 'atualizar':
+                return
+            if operacao == 'remover':
+                del self._pendentes[chave]
+                return
+        self._pendentes[chave] = (operacao, obj)
+    
+    def _gravar(self, cursor, tabela: str, operacao: str, obj):
+        """Executa no banco uma alteração pendente"""
+        if tabela == 'clientes':
+            if operacao == 'inserir':
+                cursor.execute("""
+                    INSERT INTO clientes (id, nome, cpf_cnpj, telefone, email, endereco, data_cadastro,
+                                          cpf_cnpj_idx, telefone_idx, email_idx)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    obj.id,
+                    obj.nome,
+                    self._cifrar_campo(obj, 'cpf_cnpj'),
+                    self._cifrar_campo(obj, 'telefone'),
+                    self._cifrar_campo(obj, 'email'),
+                    obj.endereco,
+                    obj.data_cadastro
+                ) + self._indices_cegos_cliente(obj))
+            elif operacao == 'atualizar':
                 cursor.execute("""
-                    INSERT INTO pagamentos (id, emprestimo_id, data, valor, tipo, saldo_anterior, metodo)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    UPDATE clientes SET
+                        nome = ?,
+                        cpf_cnpj = ?,
+                        telefone = ?,
+                        email = ?,
+                        endereco = ?,
+                        cpf_cnpj_idx = ?,
+                        telefone_idx = ?,
+                        email_idx = ?
+                    WHERE id = ?
                 """, (
-                    pag.get('id', f"PGT{datetime.now().strftime('%Y%m%d%H%M%S%f')}"),
-                    emprestimo.id,
-                    pag['data'],
-                    pag['valor'],
-                    pag.get('tipo', 'Parcela'),
-                    pag.get('saldo_anterior', 0),
-                    pag.get('metodo', '')
+                    obj.nome,
+                    self._cifrar_campo(obj, 'cpf_cnpj'),
+                    self._cifrar_campo(obj, 'telefone'),
+                    self._cifrar_campo(obj, 'email'),
+                    obj.endereco
+                ) + self._indices_cegos_cliente(obj) + (obj.id,))
+            else:
+                cursor.execute("DELETE FROM clientes WHERE id = ?", (obj.id,))
+        
+        elif tabela == 'emprestimos':
+            if operacao == 'inserir':
+                cursor.execute("""
+                    INSERT INTO emprestimos (
+                        id, cliente_id, valor_emprestado, taxa_juros,
+                        data_emprestimo, prazo_meses, data_vencimento, valor_total,
+                        saldo_devedor, ativo, observacoes, metodo_calculo, data_criacao
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    obj.id,
+                    obj.cliente_id,
+                    obj.valor_emprestado,
+                    obj.taxa_juros,
+                    obj.data_emprestimo,
+                    obj.prazo_meses,
+                    obj.data_vencimento,
+                    obj.valor_total,
+                    obj.saldo_devedor,
+                    1 if obj.ativo else 0,
+                    obj.observacoes,
+                    obj.metodo_calculo,
+                    obj.data_criacao
+                ))
+                if obj.pagamentos:
+                    self._inserir_pagamentos(cursor, obj, obj.pagamentos)
+            elif operacao == 'atualizar':
+                # Pagamentos são append-only: só os registrados desde a última gravação
+                cursor.execute("""
+                    UPDATE emprestimos SET
+                        valor_total = ?,
+                        saldo_devedor = ?,
+                        ativo = ?,
+                        observacoes = ?
+                    WHERE id = ?
+                """, (
+                    obj.valor_total,
+                    obj.saldo_devedor,
+                    1 if obj.ativo else 0,
+                    obj.observacoes,
+                    obj.id
                 ))
+                novos = obj.pagamentos_pendentes()
+                if novos:
+                    self._inserir_pagamentos(cursor, obj, novos)
+            else:
+                cursor.execute("DELETE FROM pagamentos WHERE emprestimo_id = ?", (obj.id,))
+                cursor.execute("DELETE FROM emprestimos WHERE id = ?", (obj.id,))
+    
+    def _inserir_pagamentos(self, cursor, emprestimo: Emprestimo, pagamentos: list):
+        """INSERT dos pagamentos de um empréstimo"""
+        cursor.executemany("""
+            INSERT INTO pagamentos (id, emprestimo_id, data, valor, tipo, saldo_anterior, metodo)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(
+            pag['id'],
+            emprestimo.id,
+            pag['data'],
+            pag['valor'],
+            pag.get('tipo', 'Parcela'),
+            pag.get('saldo_anterior', 0),
+            pag.get('metodo', '')
+        ) for pag in pagamentos])
+    
+    def salvar_dados(self) -> int:
+        """
+        Grava todas as alterações pendentes numa única transação
+        
+        Na thread que está dentro de um bloco `with db.transaction():` não faz
+        nada; a gravação acontece ao final do bloco. Outras threads continuam
+        gravando, só sem as alterações feitas pelo bloco ainda aberto.
+        
+        Cada alteração roda num SAVEPOINT próprio: se uma falhar (ex.: id
+        repetido), só ela é desfeita e sai da fila, e o registro em memória
+        volta a ser o do banco; as demais são gravadas normalmente.
+        
+        Returns:
+            Quantidade de alterações gravadas
+        """
+        if self._em_transacao():
+            return 0
+        
+        rejeitadas = {}
+        with self.lock:
+            pendentes = {chave: alteracao for chave, alteracao in self._pendentes.items()
+                         if chave not in self._chaves_reservadas}
+            if not pendentes:
+                return 0
+            
+            with self.pool.conexao() as conn, self._escrita(conn):
+                cursor = conn.cursor()
+                for chave, (operacao, obj) in pendentes.items():
+                    cursor.execute("SAVEPOINT alteracao")
+                    try:
+                        self._gravar(cursor, chave[0], operacao, obj)
+                    except Exception as e:
+                        cursor.execute("ROLLBACK TO alteracao")
+                        rejeitadas[chave] = e
+                    cursor.execute("RELEASE alteracao")
+            
+            for chave, (operacao, obj) in pendentes.items():
+                del self._pendentes[chave]
+                if chave[0] == 'emprestimos' and operacao != 'remover' and chave not in rejeitadas:
+                    obj.marcar_pagamentos_salvos()
+            self._apos_escrita()
+        
+        if rejeitadas:
+            for (tabela, obj_id), erro in rejeitadas.items():
+                logger.error(f"Alteração descartada ({tabela} {obj_id} - {pendentes[(tabela, obj_id)][0]}): {erro}")
+            self._recarregar_chaves(rejeitadas)
+        
+        gravadas = len(pendentes) - len(rejeitadas)
+        logger.info(f"Dados salvos no SQLite ({gravadas} alterações)")
+        return gravadas
+    
+    def _em_transacao(self) -> bool:
+        """Se a thread atual está dentro de um bloco transaction()"""
+        return getattr(self._transacoes, 'abertas', 0) > 0
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Agrupa operações de várias etapas numa única transação
+        
+        Uso:
+            with db.transaction():
+                db.adicionar_cliente(cliente)
+                db.adicionar_emprestimo(emprestimo)
+        
+        Ao sair do bloco tudo é gravado de uma vez. Se o bloco levantar exceção,
+        as alterações feitas nele são descartadas e os registros afetados são
+        relidos do banco. O bloco vale para a thread que o abriu.
+        """
+        local = self._transacoes
+        externa = not self._em_transacao()
+        if externa:
+            # O que já estava pendente não deve depender do resultado do bloco
+            self.salvar_dados()
+            local.chaves = set()
+        
+        local.abertas = getattr(local, 'abertas', 0) + 1
+        try:
+            try:
+                yield self
+            finally:
+                local.abertas -= 1
+            if externa:
+                with self.lock:
+                    self._chaves_reservadas -= local.chaves
+                self.salvar_dados()
+        except BaseException:
+            if externa:
+                self._descartar_pendentes(local.chaves)
+            raise
+    
+    def _descartar_pendentes(self, chaves: set):
+        """Descarta as alterações não gravadas de um bloco e relê esses registros do banco"""
+        with self.lock:
+            for chave in chaves:
+                self._pendentes.pop(chave, None)
+            self._chaves_reservadas -= chaves
+        self._recarregar_chaves(chaves)
+        logger.warning(f"{len(chaves)} alterações pendentes descartadas; registros relidos do banco")
+    
+    def _recarregar_chaves(self, chaves):
+        """Relê do banco os registros de chaves (tabela, id) da unidade de trabalho"""
+        alterados = {'clientes': set(), 'emprestimos': set()}
+        for tabela, obj_id in chaves:
+            alterados[tabela].add(obj_id)
+        self._recarregar_registros(alterados)
+    
+    def tem_alteracoes_pendentes(self) -> bool:
+        """Indica se há alterações ainda não gravadas no banco"""
+        return bool(self._pendentes)
+    
+    def _loop_flush(self):
+        """Thread de gravação periódica das alterações pendentes"""
+        while not self._parar_flush.wait(self.intervalo_flush):
+            try:
+                self.salvar_dados()
+            except Exception as e:
+                logger.error(f"Erro na gravação periódica: {e}")
+            try:
+                self.verificar_alteracoes_externas()
+            except Exception as e:
+                logger.error(f"Erro ao verificar alterações externas: {e}")
+            try:
+                self.podar_log_alteracoes()
+            except Exception as e:
+                logger.error(f"Erro ao podar log de alterações: {e}")
+            if (self._ultimo_snapshot is None
+                    or time.monotonic() - self._ultimo_snapshot >= self.INTERVALO_SNAPSHOT):
+                try:
+                    self.registrar_snapshots()
+                except Exception as e:
+                    logger.error(f"Erro ao gravar snapshot da carteira: {e}")
+    
+    # ==================== ALTERAÇÕES EXTERNAS ====================
+    
+    @contextmanager
+    def _escrita(self, conn):
+        """
+        Transação de escrita que anota o trecho do log_alteracoes gerado por ela
+        
+        BEGIN IMMEDIATE garante que nenhum outro processo grava entre a leitura
+        do seq inicial e o commit, então todo o trecho é deste processo e a
+        verificação de alterações externas pode ignorá-lo. O trecho é anotado
+        sob _lock_monitor antes do commit: a verificação nunca vê as linhas
+        gravadas sem já saber que são nossas.
+        """
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            inicio = ultimo_seq(conn)
+            yield
+            fim = ultimo_seq(conn)
+            with self._lock_monitor:
+                if fim > inicio:
+                    self._trechos_proprios.append((inicio, fim))
+                try:
+                    conn.commit()
+                except BaseException:
+                    if fim > inicio:
+                        self._trechos_proprios.remove((inicio, fim))
+                    raise
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    def adicionar_ouvinte_alteracoes(self, callback):
+        """
+        Registra função chamada após recarregar registros alterados por fora
+        
+        O callback recebe o conjunto de tabelas afetadas ({'clientes',
+        'emprestimos'}) e roda na thread que fez a verificação (em geral a de
+        gravação periódica); telas Tk devem repassar por uma fila lida na
+        thread principal, já que o Tk não pode ser chamado de outra thread.
+        """
+        self._ouvintes_alteracoes.append(callback)
+    
+    def verificar_alteracoes_externas(self) -> set:
+        """
+        Atualiza o cache com o que outros processos gravaram no banco
+        
+        Custa um PRAGMA data_version quando nada mudou. Se mudou, lê só as
+        entradas novas do log_alteracoes e recarrega apenas os clientes e
+        empréstimos citados (mantendo os mesmos objetos em memória).
+        
+        Returns:
+            Tabelas afetadas (vazio se não houve alteração externa)
+        """
+        if self.pool.fechado:
+            return set()
+        
+        with self._lock_monitor:
+            conn = self._conn_monitor
+            versao = conn.execute("PRAGMA data_version").fetchone()[0]
+            if versao == self._data_version:
+                return set()
+            self._data_version = versao
             
-            conn.commit()
-            conn.close()
-            logger.info(f"Empréstimo {emprestimo.id} atualizado")
+            menor = conn.execute("SELECT MIN(seq) FROM log_alteracoes").fetchone()[0]
+            perdeu_entradas = menor is not None and menor > self._seq_visto + 1
+            
+            alterados = {'clientes': set(), 'emprestimos': set()}
+            ultimo = self._seq_visto
+            for seq, tabela, registro_id in conn.execute("""
+                SELECT seq, tabela, registro_id FROM log_alteracoes
+                WHERE seq > ? ORDER BY seq
+            """, (self._seq_visto,)):
+                ultimo = seq
+                if not any(inicio < seq <= fim for inicio, fim in self._trechos_proprios):
+                    alterados[tabela].add(registro_id)
+            self._seq_visto = ultimo
+            self._trechos_proprios = [t for t in self._trechos_proprios if t[1] > ultimo]
+        
+        tabelas = {tabela for tabela, ids in alterados.items() if ids}
+        if perdeu_entradas:
+            # Log já foi podado além do que lemos: não dá para saber o que mudou
+            tabelas = set(alterados)
+            with self.lock:
+                self._cache_valido = False
+        elif tabelas:
+            self._recarregar_registros(alterados)
+        else:
+            return set()
+        
+        self.versao_dados += 1
+        logger.info(f"Alterações externas em {', '.join(sorted(tabelas))}; cache atualizado")
+        for callback in list(self._ouvintes_alteracoes):
+            try:
+                callback(tabelas)
+            except Exception as e:
+                logger.error(f"Erro em ouvinte de alterações: {e}")
+        return tabelas
+    
+    def podar_log_alteracoes(self) -> int:
+        """
+        Descarta entradas antigas do log_alteracoes em sessões longas
+        
+        Chamado pela gravação periódica; só abre transação quando o log
+        passou do limite com folga (ver corte_poda).
+        
+        Returns:
+            Entradas removidas
+        """
+        with self._lock_monitor:
+            lido_ate = self._seq_visto
+        
+        with self.pool.conexao() as conn:
+            corte = corte_poda(conn, lido_ate)
+            if corte is None:
+                return 0
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                removidas = conn.execute("DELETE FROM log_alteracoes WHERE seq <= ?", (corte,)).rowcount
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        
+        logger.debug(f"Log de alterações podado: {removidas} entradas")
+        return removidas
+    
+    def _recarregar_registros(self, alterados: dict):
+        """Relê do banco só os clientes/empréstimos alterados por outro processo"""
+        with self.lock:
+            if not self._cache_valido:
+                # Nada carregado ainda: a próxima leitura já vem atualizada
+                return
+            if sum(len(ids) for ids in alterados.values()) > self.LIMITE_RECARGA_PARCIAL:
+                self._cache_valido = False
+                return
+            
+            # Alterações locais ainda não gravadas prevalecem
+            for tabela, ids in alterados.items():
+                ids.difference_update(obj_id for (t, obj_id) in self._pendentes if t == tabela)
+            
+            with self.pool.conexao() as conn:
+                for bloco in self._em_blocos(alterados['clientes']):
+                    rows = conn.execute(
+                        f"SELECT * FROM clientes WHERE id IN ({', '.join('?' * len(bloco))})", bloco
+                    ).fetchall()
+                    novos = {row['id']: self._cliente_de_row(row) for row in rows}
+                    for cliente_id in bloco:
+                        self._sincronizar_cliente(cliente_id, novos.get(cliente_id))
+                
+                for bloco in self._em_blocos(alterados['emprestimos']):
+                    rows = conn.execute(
+                        f"SELECT * FROM emprestimos WHERE id IN ({', '.join('?' * len(bloco))})", bloco
+                    ).fetchall()
+                    pagamentos = self._carregar_pagamentos_agrupados(conn, [row['id'] for row in rows])
+                    novos = {row['id']: self._emprestimo_de_row(row, pagamentos.get(row['id'], []))
+                             for row in rows}
+                    for emprestimo_id in bloco:
+                        self._sincronizar_emprestimo(emprestimo_id, novos.get(emprestimo_id))
+    
+    @staticmethod
+    def _em_blocos(ids: set, tamanho: int = 500) -> list:
+        """Divide ids em blocos (limite de parâmetros do SQLite)"""
+        ids = list(ids)
+        return [ids[i:i + tamanho] for i in range(0, len(ids), tamanho)]
+    
+    @staticmethod
+    def _copiar_estado(destino, origem):
+        """Copia os atributos de origem para destino (telas seguram a referência antiga)"""
+        for nome in type(origem).__slots__:
+            setattr(destino, nome, getattr(origem, nome))
+    
+    def _sincronizar_cliente(self, cliente_id: str, novo: Optional[Cliente]):
+        """Aplica no cache a versão do banco de um cliente (None = foi removido)"""
+        atual = self._clientes_por_id.get(cliente_id)
+        if novo is None:
+            if atual is not None:
+                del self._clientes_por_id[cliente_id]
+                self._clientes_cache.remove(atual)
+        elif atual is None:
+            self._clientes_cache.append(novo)
+            self._clientes_por_id[cliente_id] = novo
+        else:
+            self._copiar_estado(atual, novo)
+    
+    def _sincronizar_emprestimo(self, emprestimo_id: str, novo: Optional[Emprestimo]):
+        """Aplica no cache a versão do banco de um empréstimo (None = foi removido)"""
+        atual = self._emprestimos_por_id.get(emprestimo_id)
+        if novo is None:
+            if atual is not None:
+                self._remover_emprestimo_do_cache(atual)
+        elif atual is None:
+            self._emprestimos_cache.append(novo)
+            self._emprestimos_por_id[emprestimo_id] = novo
+            self._mapear_pagamentos(novo)
+            self._indexar_emprestimo(novo)
+        else:
+            self._desmapear_pagamentos(atual)
+            self._copiar_estado(atual, novo)
+            self._mapear_pagamentos(atual)
+            self._indexar_emprestimo(atual)
+    
+    # ==================== ÍNDICES SECUNDÁRIOS ====================
+    
+    def _limpar_indices(self):
+        """Zera os índices secundários (antes de recarregar o cache)"""
+        self._emprestimos_por_cliente = {}
+        self._emprestimos_por_status = {s: {} for s in self.STATUS_EMPRESTIMO}
+        self._vencimentos = []
+        self._vencimentos_abertos = []
+        self._indice_emprestimo = {}
+        self._dia_indices = date.today().isoformat()
+    
+    @staticmethod
+    def _chave_vencimento(emprestimo: Emprestimo) -> Optional[str]:
+        """Data de vencimento normalizada (YYYY-MM-DD), ou None se inválida"""
+        # O modelo já guarda a data interpretada
+        ordinal = emprestimo.vencimento_ordinal
+        return date.fromordinal(ordinal).isoformat() if ordinal is not None else None
+    
+    def _indexar_emprestimo(self, emprestimo: Emprestimo, em_massa: bool = False):
+        """
+        Insere ou atualiza o empréstimo nos índices, mexendo só no que mudou
+        
+        em_massa: para empréstimos que ainda não estão nos índices (carga do
+        cache, inserção em lote); só acrescenta ao fim das listas de vencimento
+        e quem chama ordena uma vez no final (_ordenar_vencimentos), em vez de
+        um insort por empréstimo
+        """
+        vencimento = self._chave_vencimento(emprestimo)
+        # Mesma situação que a tela mostra (calculada uma vez por dia no modelo)
+        novo = (emprestimo.cliente_id, emprestimo.situacao()[0], vencimento)
+        antigo = self._indice_emprestimo.get(emprestimo.id)
+        if antigo == novo:
+            return
+        cliente_ant, status_ant, venc_ant = antigo or (None, None, None)
+        cliente_id, status, vencimento = novo
+        
+        if cliente_ant != cliente_id:
+            if antigo:
+                self._tirar_do_cliente(cliente_ant, emprestimo.id)
+            self._emprestimos_por_cliente.setdefault(cliente_id, {})[emprestimo.id] = emprestimo
+        
+        if status_ant != status:
+            if antigo:
+                self._emprestimos_por_status[status_ant].pop(emprestimo.id, None)
+            self._emprestimos_por_status[status][emprestimo.id] = emprestimo
+        
+        if venc_ant != vencimento:
+            if venc_ant:
+                self._tirar_vencimento(self._vencimentos, venc_ant, emprestimo.id)
+            if vencimento:
+                if em_massa:
+                    self._vencimentos.append((vencimento, emprestimo.id))
+                else:
+                    bisect.insort(self._vencimentos, (vencimento, emprestimo.id))
+        
+        # Em aberto: entra ao ser criado, sai ao ser quitado
+        aberto_ant = bool(venc_ant) and status_ant not in (None, 'quitado')
+        aberto = bool(vencimento) and status != 'quitado'
+        if (aberto_ant, venc_ant) != (aberto, vencimento):
+            if aberto_ant:
+                self._tirar_vencimento(self._vencimentos_abertos, venc_ant, emprestimo.id)
+            if aberto:
+                if em_massa:
+                    self._vencimentos_abertos.append((vencimento, emprestimo.id))
+                else:
+                    bisect.insort(self._vencimentos_abertos, (vencimento, emprestimo.id))
+        
+        self._indice_emprestimo[emprestimo.id] = novo
+    
+    def _ordenar_vencimentos(self):
+        """Fecha uma indexação em massa"""
+        self._vencimentos.sort()
+        self._vencimentos_abertos.sort()
+    
+    def _desindexar_emprestimo(self, emprestimo: Emprestimo):
+        """Remove o empréstimo de todos os índices secundários"""
+        entrada = self._indice_emprestimo.pop(emprestimo.id, None)
+        if entrada is None:
+            return
+        cliente_id, status, vencimento = entrada
+        self._tirar_do_cliente(cliente_id, emprestimo.id)
+        self._emprestimos_por_status[status].pop(emprestimo.id, None)
+        if vencimento:
+            self._tirar_vencimento(self._vencimentos, vencimento, emprestimo.id)
+            if status != 'quitado':
+                self._tirar_vencimento(self._vencimentos_abertos, vencimento, emprestimo.id)
+    
+    def _tirar_do_cliente(self, cliente_id: str, emprestimo_id: str):
+        do_cliente = self._emprestimos_por_cliente.get(cliente_id)
+        if do_cliente is not None:
+            do_cliente.pop(emprestimo_id, None)
+            if not do_cliente:
+                del self._emprestimos_por_cliente[cliente_id]
+    
+    @staticmethod
+    def _tirar_vencimento(vencimentos: list, vencimento: str, emprestimo_id: str):
+        chave = (vencimento, emprestimo_id)
+        i = bisect.bisect_left(vencimentos, chave)
+        if i < len(vencimentos) and vencimentos[i] == chave:
+            del vencimentos[i]
+    
+    def _garantir_indices(self):
+        """
+        Carrega o cache e, na virada do dia, move para 'atrasado' os empréstimos
+        em dia cujo vencimento passou (só percorre o trecho vencido do índice)
+        """
+        self._garantir_cache()
+        hoje = date.today().isoformat()
+        if hoje == self._dia_indices:
+            return
+        
+        with self.lock:
+            self._dia_indices = hoje
+            em_dia = self._emprestimos_por_status['em_dia']
+            fim = bisect.bisect_left(self._vencimentos_abertos, (hoje,))
+            vencidos = [em_dia[emp_id] for _, emp_id in self._vencimentos_abertos[:fim] if emp_id in em_dia]
+            for emp in vencidos:
+                self._indexar_emprestimo(emp)
     
     # ==================== USUÁRIOS ====================
     
     @property
     def usuarios(self) -> List[Usuario]:
-        """Lista de usuários"""
-        if not self._cache_valido:
-            self._carregar_cache()
+        """Lista de usuários (lida à parte, sem carregar clientes e empréstimos)"""
+        if self._usuarios_cache is None:
+            with self.pool.conexao() as conn:
+                rows = conn.execute("SELECT username, password_hash FROM usuarios").fetchall()
+            usuarios = []
+            for row in rows:
+                usuario = Usuario(row['username'], "")
+                usuario.password_hash = row['password_hash']
+                usuarios.append(usuario)
+            self._usuarios_cache = usuarios
         return self._usuarios_cache
     
     # ==================== LEMBRETES ====================
     
     @property
     def lembretes(self) -> List[dict]:
-        """Lista de lembretes"""
-        if not self._cache_valido:
-            self._carregar_cache()
+        """Lista de lembretes (lida à parte, sem carregar clientes e empréstimos)"""
+        if self._lembretes_cache is None:
+            with self.pool.conexao() as conn:
+                rows = conn.execute("SELECT id, tipo, mensagem, data FROM lembretes").fetchall()
+            self._lembretes_cache = [
+                {"id": row['id'], "tipo": row['tipo'], "mensagem": row['mensagem'], "data": row['data']}
+                for row in rows
+            ]
         return self._lembretes_cache
     
     def adicionar_lembrete(self, tipo: str, mensagem: str, data: str = None):
@@ -438,21 +1641,22 @@ class DatabaseSQLite:
             data = datetime.now().isoformat()
         
         with self.lock:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
+            with self.pool.conexao() as conn:
+                cursor = conn.cursor()
             
-            lembrete_id = f"LEM{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+                lembrete_id = f"LEM{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
             
-            cursor.execute("""
-                INSERT INTO lembretes (id, tipo, mensagem, data)
-                VALUES (?, ?, ?, ?)
-            """, (lembrete_id, tipo, mensagem, data))
+                cursor.execute("""
+                    INSERT INTO lembretes (id, tipo, mensagem, data)
+                    VALUES (?, ?, ?, ?)
+                """, (lembrete_id, tipo, mensagem, data))
             
-            conn.commit()
-            conn.close()
+                conn.commit()
+            self._apos_escrita()
             
             lembrete = {"id": lembrete_id, "tipo": tipo, "mensagem": mensagem, "data": data}
-            self._lembretes_cache.append(lembrete)
+            if self._lembretes_cache is not None:
+                self._lembretes_cache.append(lembrete)
             logger.info(f"Lembrete adicionado: {tipo}")
         
         return lembrete
@@ -460,53 +1664,317 @@ class DatabaseSQLite:
     def remover_lembrete(self, lembrete_id: str):
         """Remove um lembrete"""
         with self.lock:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
+            with self.pool.conexao() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute("DELETE FROM lembretes WHERE id = ?", (lembrete_id,))
+                cursor.execute("DELETE FROM lembretes WHERE id = ?", (lembrete_id,))
             
-            conn.commit()
-            conn.close()
+                conn.commit()
+            self._apos_escrita()
             
-            self._lembretes_cache = [l for l in self._lembretes_cache if l.get('id') != lembrete_id]
+            if self._lembretes_cache is not None:
+                self._lembretes_cache = [l for l in self._lembretes_cache if l.get('id') != lembrete_id]
             logger.info(f"Lembrete removido: {lembrete_id}")
     
     def adicionar_usuario(self, usuario: Usuario):
         """Adiciona novo usuário"""
         with self.lock:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
+            with self.pool.conexao() as conn:
+                cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT INTO usuarios (username, password_hash)
-                VALUES (?, ?)
-            """, (usuario.username, usuario.password_hash))
+                cursor.execute("""
+                    INSERT INTO usuarios (username, password_hash)
+                    VALUES (?, ?)
+                """, (usuario.username, usuario.password_hash))
             
-            conn.commit()
-            conn.close()
+                conn.commit()
+            self._apos_escrita()
             
-            self._usuarios_cache.append(usuario)
+            if self._usuarios_cache is not None:
+                self._usuarios_cache.append(usuario)
             logger.info(f"Usuário {usuario.username} adicionado")
     
-    def salvar_dados(self):
-        """Salva alterações no banco (já persistido automaticamente)"""
-        logger.info("Dados salvos no SQLite")
-    
     def get_overdue_emprestimos(self):
-        """Retorna empréstimos atrasados (vencidos e não quitados)"""
-        atrasados = []
-        for emp in self.emprestimos:
-            if emp.esta_atrasado():
-                atrasados.append(emp)
-        return atrasados
+        """Retorna empréstimos atrasados (vencidos e não quitados), do vencimento mais antigo"""
+        return self.get_emprestimos_vencidos()
+    
+    def get_emprestimos_vencidos(self, em: str = None) -> List[Emprestimo]:
+        """
+        Empréstimos em aberto que estão vencidos na data (vencimento anterior a ela)
+        
+        Percorre só o trecho vencido do índice ordenado dos empréstimos em aberto.
+        
+        Args:
+            em: Data de referência (YYYY-MM-DD); None = hoje
+        """
+        return self._abertos_por_vencimento(None, em or date.today().isoformat())
+    
+    def get_emprestimos_a_vencer(self, dias: int = 7, desde: str = None) -> List[Emprestimo]:
+        """
+        Empréstimos em aberto que vencem nos próximos N dias, por data
+        
+        Args:
+            dias: Tamanho da janela (desde + dias, inclusivo)
+            desde: Primeiro dia da janela (YYYY-MM-DD); None = hoje
+        """
+        inicio = date.fromisoformat(desde) if desde else date.today()
+        return self._abertos_por_vencimento(inicio.isoformat(), (inicio + timedelta(days=dias + 1)).isoformat())
+    
+    def _abertos_por_vencimento(self, desde: Optional[str], antes_de: Optional[str]) -> List[Emprestimo]:
+        """Não quitados com vencimento em [desde, antes_de) (None = sem limite)"""
+        if self.modo_repositorio:
+            self.salvar_dados()
+            return self.repositorio.emprestimos_abertos_por_vencimento(desde, antes_de)
+        self._garantir_indices()
+        abertos = self._vencimentos_abertos
+        inicio = bisect.bisect_left(abertos, (desde,)) if desde else 0
+        fim = bisect.bisect_left(abertos, (antes_de,)) if antes_de else len(abertos)
+        return [self._emprestimos_por_id[emp_id] for _, emp_id in abertos[inicio:fim]]
     
     def get_emprestimos_by_cliente(self, cliente_id: str):
         """Retorna todos empréstimos de um cliente específico"""
-        return [emp for emp in self.emprestimos if emp.cliente_id == cliente_id]
+        if self.modo_repositorio:
+            # Consultas do banco não enxergam o que ainda está só em memória
+            self.salvar_dados()
+            return self.repositorio.emprestimos_filtrados(cliente_id=cliente_id)
+        self._garantir_indices()
+        return list(self._emprestimos_por_cliente.get(cliente_id, {}).values())
+    
+    def situacao_clientes(self, cliente_ids: List[str]) -> dict:
+        """
+        Resumo dos empréstimos de vários clientes de uma vez (listagens)
+        
+        No modo repositório é uma consulta agrupada só; fora dele vem do
+        índice de empréstimos por cliente.
+        
+        Returns:
+            cliente_id -> (qtd_emprestimos, qtd_em_aberto, total_devido); clientes
+            sem empréstimos ficam de fora
+        """
+        if self.modo_repositorio:
+            self.salvar_dados()
+            return self.repositorio.situacao_clientes(cliente_ids)
+        self._garantir_indices()
+        situacao = {}
+        for cliente_id in cliente_ids:
+            emprestimos = self._emprestimos_por_cliente.get(cliente_id)
+            if emprestimos:
+                abertos = [e.saldo_devedor for e in emprestimos.values() if e.ativo and e.saldo_devedor > 0]
+                situacao[cliente_id] = (len(emprestimos), len(abertos), sum(abertos))
+        return situacao
     
     def get_emprestimos_ativos(self):
         """Retorna apenas empréstimos ativos (não quitados)"""
-        return [emp for emp in self.emprestimos if emp.ativo and not emp.esta_quitado()]
+        if self.modo_repositorio:
+            self.salvar_dados()
+            return self.repositorio.emprestimos_ativos()
+        self._garantir_indices()
+        return [emp for status in ('em_dia', 'atrasado')
+                for emp in self._emprestimos_por_status[status].values() if emp.ativo]
+    
+    def get_emprestimos_quitados(self):
+        """Retorna empréstimos quitados (saldo devedor zerado)"""
+        if self.modo_repositorio:
+            self.salvar_dados()
+            return self.repositorio.emprestimos_filtrados(status='quitado')
+        self._garantir_indices()
+        return list(self._emprestimos_por_status['quitado'].values())
+    
+    def contar_emprestimos_por_status(self) -> dict:
+        """Quantidade de empréstimos em cada bucket ('em_dia', 'atrasado', 'quitado')"""
+        if self.modo_repositorio:
+            self.salvar_dados()
+            return self.repositorio.contar_por_status()
+        self._garantir_indices()
+        return {status: len(emps) for status, emps in self._emprestimos_por_status.items()}
+    
+    def get_emprestimos_por_vencimento(self, ate: str = None, desde: str = None):
+        """
+        Empréstimos ordenados por data de vencimento (via índice ordenado)
+        
+        Args:
+            ate: Data limite inclusiva (YYYY-MM-DD); None = sem limite
+            desde: Data inicial inclusiva (YYYY-MM-DD); None = desde o início
+        """
+        if self.modo_repositorio:
+            self.salvar_dados()
+            antes_de = (date.fromisoformat(ate) + timedelta(days=1)).isoformat() if ate else None
+            return self.repositorio.emprestimos_por_vencimento(desde, antes_de)
+        self._garantir_indices()
+        inicio = bisect.bisect_left(self._vencimentos, (desde,)) if desde else 0
+        # chr(0x10FFFF) ordena depois de qualquer id: inclui todos os do dia 'ate'
+        fim = bisect.bisect_right(self._vencimentos, (ate, chr(0x10FFFF))) if ate else len(self._vencimentos)
+        return [self._emprestimos_por_id[emp_id] for _, emp_id in self._vencimentos[inicio:fim]]
+    
+    # ==================== AGREGAÇÕES ====================
+    
+    def resumo(self, filtros: dict = None) -> Resumo:
+        """
+        Totais, contagens e histograma de valores calculados no SQLite
+        
+        Args:
+            filtros: Dict opcional com
+                'cliente_id': só empréstimos deste cliente
+                'data_inicio' / 'data_fim': intervalo (YYYY-MM-DD, inclusivo)
+                    sobre a data de criação do registro (data_criacao), como
+                    o filtro de datas do dashboard sempre fez
+        
+        Returns:
+            Resumo com contagens por status, somas de valores e faixas_valor
+        """
+        filtros = filtros or {}
+        
+        # Agregações leem o banco: gravar antes o que ainda está só em memória
+        self.salvar_dados()
+        
+        condicoes, params = [], []
+        if filtros.get('cliente_id'):
+            condicoes.append("e.cliente_id = ?")
+            params.append(filtros['cliente_id'])
+        if filtros.get('data_inicio'):
+            condicoes.append("e.data_criacao >= ?")
+            params.append(filtros['data_inicio'])
+        if filtros.get('data_fim'):
+            # data_criacao tem hora: comparar até o fim do dia
+            condicoes.append("substr(e.data_criacao, 1, 10) <= ?")
+            params.append(filtros['data_fim'])
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        
+        faixas = []
+        for i, (_, limite) in enumerate(FAIXAS_VALOR):
+            if limite is None:
+                faixas.append(f"ELSE {i}")
+            else:
+                faixas.append(f"WHEN e.valor_emprestado < {limite} THEN {i}")
+        
+        with self.pool.conexao() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            
+            cursor.execute(f"""
+                SELECT
+                    COUNT(*),
+                    COUNT(DISTINCT e.cliente_id),
+                    TOTAL(CASE WHEN e.ativo THEN 1 ELSE 0 END),
+                    TOTAL(CASE WHEN e.saldo_devedor <= 0 THEN 1 ELSE 0 END),
+                    TOTAL(CASE WHEN e.saldo_devedor > 0
+                               AND substr(e.data_vencimento, 1, 10) < ? THEN 1 ELSE 0 END),
+                    TOTAL(e.valor_emprestado),
+                    TOTAL(e.saldo_devedor),
+                    TOTAL(e.valor_total - e.valor_emprestado),
+                    TOTAL(e.total_pago)
+                FROM emprestimos e {where}
+            """, [date.today().isoformat()] + params)
+            (total, com_emprestimo, ativos, quitados, atrasados,
+             emprestado, saldo, juros, total_pago) = cursor.fetchone()
+            
+            cursor.execute(f"""
+                SELECT CASE {' '.join(faixas)} END AS faixa, COUNT(*)
+                FROM emprestimos e {where}
+                GROUP BY faixa
+            """, params)
+            por_faixa = dict(cursor.fetchall())
+            
+            if filtros.get('cliente_id'):
+                cursor.execute("SELECT COUNT(*) FROM clientes WHERE id = ?", (filtros['cliente_id'],))
+            else:
+                cursor.execute("SELECT COUNT(*) FROM clientes")
+            total_clientes = cursor.fetchone()[0]
+        
+        return Resumo(
+            total_clientes=total_clientes,
+            clientes_com_emprestimo=com_emprestimo,
+            total_emprestimos=total,
+            ativos=int(ativos),
+            quitados=int(quitados),
+            atrasados=int(atrasados),
+            total_emprestado=emprestado,
+            saldo_devedor=saldo,
+            total_pago=total_pago,
+            total_juros=juros,
+            faixas_valor={rotulo: por_faixa.get(i, 0) for i, (rotulo, _) in enumerate(FAIXAS_VALOR)}
+        )
+    
+    # ==================== HISTÓRICO ====================
+    
+    def registrar_snapshots(self) -> int:
+        """
+        Grava o snapshot de hoje (e os dias que faltarem desde o último)
+        
+        Roda na thread de background a cada INTERVALO_SNAPSHOT (com
+        intervalo_flush desligado, quem usa o banco deve chamar). Cada dia
+        parte do snapshot da véspera e grava numa transação própria, então
+        a reconstrução inicial não segura o lock de escrita de uma vez só.
+        Lançamentos com data passada (anotados em snapshots_refazer) fazem
+        os dias desde aquela data serem gravados de novo.
+        
+        Returns:
+            Quantidade de dias gravados
+        """
+        self.salvar_dados()
+        with self.pool.conexao() as conn:
+            refazer_desde, ate_seq = pendencias_refazer(conn)
+            dias = dias_pendentes(conn, refazer_desde=refazer_desde)
+            for dia in dias:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    gravar_snapshot(conn, dia)
+                    if dia == dias[-1]:
+                        concluir_refazer(conn, ate_seq)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+        if len(dias) > 1:
+            logger.info(f"Snapshots da carteira gravados: {dias[0]} a {dias[-1]}")
+        self._ultimo_snapshot = time.monotonic()
+        return len(dias)
+    
+    def historico_carteira(self, dias: int = 180) -> List[dict]:
+        """
+        Snapshots diários dos últimos N dias, em ordem de data
+        
+        Só lê o que já foi gravado (ver registrar_snapshots); logo depois da
+        primeira abertura a lista pode estar vazia.
+        
+        Returns:
+            Lista de dicts com data, total_emprestado, saldo_devedor,
+            valor_atrasado, qtd_atrasados, recebido_dia e emprestimos_ativos
+        """
+        desde = (date.today() - timedelta(days=dias)).isoformat()
+        with self.pool.conexao() as conn:
+            return historico(conn, desde)
+    
+    def metricas_pool(self) -> dict:
+        """Retorna métricas do pool de conexões (hits, esperas, abertas...)"""
+        return self.pool.metricas()
+    
+    def fechar(self):
+        """Grava o que estiver pendente e fecha as conexões (chamar ao encerrar o aplicativo)"""
+        if self.pool.fechado:
+            return
+        
+        self._parar_flush.set()
+        if self._thread_flush is not None:
+            self._thread_flush.join(timeout=self.pool.timeout)
+        try:
+            self.salvar_dados()
+        except sqlite3.Error as e:
+            logger.error(f"Falha ao gravar alterações pendentes ao fechar: {e}")
+        
+        try:
+            # Zerar o -wal ao sair para não deixar o arquivo crescido no disco
+            self.checkpoint('TRUNCATE')
+        except sqlite3.Error as e:
+            logger.warning(f"Falha no checkpoint ao fechar: {e}")
+        metricas = self.pool.metricas()
+        with self._lock_monitor:
+            self._conn_monitor.close()
+        self.pool.fechar()
+        logger.info(
+            f"Banco fechado - conexões criadas: {metricas['criadas']}, "
+            f"reaproveitadas: {metricas['hits']}, esperas: {metricas['esperas']}"
+        )
     
     def fazer_backup(self):
         """Cria backup do banco de dados"""
@@ -516,9 +1984,18 @@ class DatabaseSQLite:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         backup_file = backup_dir / f"backup_{timestamp}.db"
         
+        # O backup deve incluir o que ainda está só em memória
+        self.salvar_dados()
+        
+        # Em modo WAL o arquivo .db sozinho pode não conter os últimos commits;
+        # a API de backup do SQLite gera uma cópia consistente
         with self.lock:
-            import shutil
-            shutil.copy2(self.db_path, backup_file)
+            with self.pool.conexao() as conn:
+                destino = sqlite3.connect(str(backup_file))
+                try:
+                    conn.backup(destino)
+                finally:
+                    destino.close()
         
         logger.info(f"Backup criado: {backup_file}")
         return backup_file
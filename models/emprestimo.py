@@ -1,7 +1,44 @@
-from datetime import datetime, timedelta
-from utils.calculos import calcular_juros_compostos
+from datetime import datetime, date, timedelta
+import time
+from utils.amortizacao import totais, gerar_cronograma
+from models.pagamento import Pagamento
+
+# Dia de hoje (ordinal) e o instante (time.time) em que ele deixa de valer
+_hoje_ordinal = 0
+_hoje_valido_ate = 0.0
+
+
+def hoje_ordinal():
+    """date.today().toordinal(), recalculado só na virada do dia"""
+    global _hoje_ordinal, _hoje_valido_ate
+    agora = time.time()
+    if agora >= _hoje_valido_ate:
+        hoje = date.today()
+        _hoje_ordinal = hoje.toordinal()
+        _hoje_valido_ate = datetime.combine(hoje + timedelta(days=1), datetime.min.time()).timestamp()
+    return _hoje_ordinal
+
+
+def ordinal_da_data(valor):
+    """Ordinal (date.toordinal) de uma data ISO, date ou datetime; None se inválida"""
+    if isinstance(valor, datetime):
+        return valor.toordinal()
+    if isinstance(valor, date):
+        return valor.toordinal()
+    try:
+        return datetime.fromisoformat(valor).toordinal()
+    except (TypeError, ValueError):
+        return None
+
 
 class Emprestimo:
+    __slots__ = ('id', 'cliente_id', 'valor_emprestado', 'taxa_juros', 'data_emprestimo',
+                 'prazo_meses', '_data_vencimento', '_vencimento_ordinal', '_situacao',
+                 'data_criacao', 'ativo', 'pagamentos',
+                 '_pagamentos_pendentes', 'total_pago', 'parcelas_pagas',
+                 'data_ultimo_pagamento', 'metodo_calculo', 'observacoes',
+                 'valor_total', 'valor_parcela', 'saldo_devedor', 'total_juros', '_cronograma')
+    
     def __init__(self, cliente_id, valor_emprestado, taxa_juros, data_emprestimo, prazo_meses, id=None, data_vencimento=None, metodo_calculo='compostos'):
         self.id = id or self.gerar_id()
         self.cliente_id = cliente_id
@@ -13,12 +50,35 @@ class Emprestimo:
         self.data_criacao = datetime.now().isoformat()
         self.ativo = True
         self.pagamentos = []
+        self._pagamentos_pendentes = []  # Registrados mas ainda não gravados no banco
+        
+        # Agregados dos pagamentos (no banco, colunas mantidas por triggers)
+        self.total_pago = 0.0
+        self.parcelas_pagas = 0
+        self.data_ultimo_pagamento = None
         self.metodo_calculo = metodo_calculo
         self.observacoes = ""
+        self._cronograma = None
         
         # Calcular valores iniciais
         self.calcular_valores()
     
+    @property
+    def data_vencimento(self):
+        return self._data_vencimento
+    
+    @data_vencimento.setter
+    def data_vencimento(self, valor):
+        # Data interpretada uma vez só; a situação do dia é refeita na próxima consulta
+        self._data_vencimento = valor
+        self._vencimento_ordinal = ordinal_da_data(valor)
+        self._situacao = None
+    
+    @property
+    def vencimento_ordinal(self):
+        """Vencimento como date.toordinal() (None se a data for inválida)"""
+        return self._vencimento_ordinal
+    
     def _calcular_data_vencimento(self):
         """Calcula automaticamente a data de vencimento baseado na data de empréstimo e prazo."""
         try:
@@ -32,14 +92,16 @@ class Emprestimo:
     def gerar_id(self):
         return f"EMP{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
     
+    def gerar_id_pagamento(self):
+        # Microssegundos + posição no histórico: pagamentos seguidos não colidem
+        return f"PGT{datetime.now().strftime('%Y%m%d%H%M%S%f')}{len(self.pagamentos):03d}"
+    
     def calcular_valores(self):
-        # Valor total com juros compostos
-        self.valor_total = calcular_juros_compostos(
-            self.valor_emprestado, self.taxa_juros, self.prazo_meses
+        # Valor total e parcela pelo método do empréstimo (no SAC, a primeira parcela)
+        self.valor_total, self.valor_parcela = totais(
+            self.metodo_calculo, self.valor_emprestado, self.taxa_juros, self.prazo_meses
         )
-        
-        # Valor da parcela mensal
-        self.valor_parcela = self.valor_total / self.prazo_meses
+        self._cronograma = None
         
         # Saldo devedor inicial
         self.saldo_devedor = self.valor_total
@@ -56,15 +118,18 @@ class Emprestimo:
         if valor <= 0:
             raise ValueError("O valor do pagamento deve ser maior que zero.")
         
-        pagamento = {
-            'id': f"PGT{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            'valor': float(valor),
-            'data': data or datetime.now().isoformat(),
-            'tipo': tipo,
-            'saldo_anterior': self.saldo_devedor
-        }
+        pagamento = Pagamento(
+            id=self.gerar_id_pagamento(),
+            valor=float(valor),
+            data=data or datetime.now().isoformat(),
+            tipo=tipo,
+            saldo_anterior=self.saldo_devedor
+        )
         
         self.pagamentos.append(pagamento)
+        self._pagamentos_pendentes.append(pagamento)
+        self._somar_aos_agregados(pagamento)
+        self._cronograma = None
         self.saldo_devedor -= valor
         
         # Recalcular se pagamento exceder o saldo
@@ -74,47 +139,96 @@ class Emprestimo:
         if self.saldo_devedor <= 0:
             self.ativo = False
     
+    def pagamentos_pendentes(self):
+        """Pagamentos registrados desde a última gravação no banco"""
+        return list(self._pagamentos_pendentes)
+    
+    def marcar_pagamentos_salvos(self):
+        """Chamado pelo banco após gravar os pagamentos pendentes"""
+        self._pagamentos_pendentes.clear()
+    
+    def _somar_aos_agregados(self, pagamento):
+        self.total_pago += float(pagamento.get('valor', 0.0))
+        if pagamento.get('tipo', 'Parcela') == 'Parcela':
+            self.parcelas_pagas += 1
+        data = pagamento.get('data')
+        if data and (self.data_ultimo_pagamento is None or data > self.data_ultimo_pagamento):
+            self.data_ultimo_pagamento = data
+    
+    def atualizar_agregados(self):
+        """Recalcula total pago, parcelas pagas e último pagamento a partir da lista"""
+        self.total_pago = 0.0
+        self.parcelas_pagas = 0
+        self.data_ultimo_pagamento = None
+        self._cronograma = None
+        for pagamento in self.pagamentos:
+            self._somar_aos_agregados(pagamento)
+    
+    def cronograma(self):
+        """
+        Tabela de parcelas (utils.amortizacao.Cronograma) pelo método do empréstimo
+        
+        Criada na primeira consulta e guardada no objeto até o próximo
+        pagamento (que muda quais parcelas estão pagas) ou recálculo; as
+        linhas só são montadas quando alguém as lê.
+        """
+        if self._cronograma is None:
+            inicio = ordinal_da_data(self.data_emprestimo) or hoje_ordinal()
+            self._cronograma = gerar_cronograma(
+                self.metodo_calculo, self.valor_emprestado, self.taxa_juros, self.prazo_meses,
+                inicio, self.parcelas_pagas
+            )
+        return self._cronograma
+    
     def get_historico_pagamentos(self):
         return sorted(self.pagamentos, key=lambda x: x['data'])
     
     def get_proxima_parcela(self):
-        parcelas_pagas = len([p for p in self.pagamentos if p['tipo'] == 'Parcela'])
-        return parcelas_pagas + 1 if parcelas_pagas < self.prazo_meses else None
+        return self.parcelas_pagas + 1 if self.parcelas_pagas < self.prazo_meses else None
     
     def esta_quitado(self):
         """Verifica se o empréstimo está quitado (saldo devedor zerado)"""
         return self.saldo_devedor <= 0
     
+    def situacao(self):
+        """
+        Status ('em_dia', 'atrasado' ou 'quitado') e dias de atraso
+        
+        Calculado uma vez por dia: só é refeito na virada do dia ou quando
+        o saldo devedor (ou o vencimento) muda.
+        
+        Returns:
+            Tupla (status, dias_atraso)
+        """
+        hoje = hoje_ordinal()
+        guardada = self._situacao
+        if guardada is not None and guardada[0] == hoje and guardada[1] == self.saldo_devedor:
+            return guardada[2], guardada[3]
+        
+        vencimento = self._vencimento_ordinal
+        if self.saldo_devedor <= 0:
+            status, dias = 'quitado', 0
+        elif vencimento is not None and hoje > vencimento:
+            status, dias = 'atrasado', hoje - vencimento
+        else:
+            status, dias = 'em_dia', 0
+        self._situacao = (hoje, self.saldo_devedor, status, dias)
+        return status, dias
+    
     def esta_atrasado(self):
         """Verifica se o empréstimo tem parcelas atrasadas"""
-        if self.esta_quitado():
-            return False
-        
-        try:
-            data_venc = datetime.fromisoformat(self.data_vencimento).date() if isinstance(self.data_vencimento, str) else self.data_vencimento
-            hoje = datetime.now().date()
-            return hoje > data_venc
-        except:
-            return False
+        return self.situacao()[0] == 'atrasado'
     
     def dias_atraso(self):
         """Retorna quantidade de dias de atraso (0 se não estiver atrasado)"""
-        if not self.esta_atrasado():
-            return 0
-        
-        try:
-            data_venc = datetime.fromisoformat(self.data_vencimento).date() if isinstance(self.data_vencimento, str) else self.data_vencimento
-            hoje = datetime.now().date()
-            return (hoje - data_venc).days
-        except:
-            return 0
+        return self.situacao()[1]
     
     def get_status_badge(self):
         """Retorna badge formatado com emoji e texto do status"""
-        if self.esta_quitado():
+        status, dias = self.situacao()
+        if status == 'quitado':
             return "✅ QUITADO"
-        elif self.esta_atrasado():
-            dias = self.dias_atraso()
+        elif status == 'atrasado':
             return f"⚠️ ATRASADO ({dias} dias)"
         else:
             return "🔄 EM DIA"
@@ -134,9 +248,55 @@ class Emprestimo:
             'valor_parcela': self.valor_parcela,
             'saldo_devedor': self.saldo_devedor,
             'total_juros': self.total_juros,
-            'pagamentos': self.pagamentos
+            'total_pago': self.total_pago,
+            'parcelas_pagas': self.parcelas_pagas,
+            'data_ultimo_pagamento': self.data_ultimo_pagamento,
+            'pagamentos': [pag.to_dict() if isinstance(pag, Pagamento) else pag for pag in self.pagamentos]
         }
     
+    @classmethod
+    def from_row(cls, row, pagamentos=None):
+        """
+        Monta o empréstimo direto das colunas gravadas, sem passar pelo __init__
+        
+        Nada é recalculado: taxa_juros já está em decimal no banco, valor_total
+        e saldo vêm da linha e os agregados de pagamentos das colunas mantidas
+        por triggers.
+        
+        Args:
+            row: Linha da tabela emprestimos (sqlite3.Row ou dict)
+            pagamentos: Lista de Pagamento do empréstimo
+        """
+        emprestimo = cls.__new__(cls)
+        emprestimo.id = row['id']
+        emprestimo.cliente_id = row['cliente_id']
+        emprestimo.valor_emprestado = row['valor_emprestado']
+        emprestimo.taxa_juros = row['taxa_juros']
+        emprestimo.data_emprestimo = row['data_emprestimo']
+        emprestimo.prazo_meses = row['prazo_meses']
+        emprestimo.data_vencimento = row['data_vencimento']
+        # Bancos anteriores à coluna: a data do empréstimo é a melhor aproximação
+        emprestimo.data_criacao = row['data_criacao'] or row['data_emprestimo']
+        emprestimo.ativo = bool(row['ativo'])
+        emprestimo.pagamentos = pagamentos if pagamentos is not None else []
+        emprestimo._pagamentos_pendentes = []
+        emprestimo.total_pago = row['total_pago']
+        emprestimo.parcelas_pagas = row['parcelas_pagas']
+        emprestimo.data_ultimo_pagamento = row['data_ultimo_pagamento']
+        emprestimo.metodo_calculo = row['metodo_calculo']
+        emprestimo.observacoes = row['observacoes'] or ""
+        emprestimo.valor_total = row['valor_total']
+        if emprestimo.metodo_calculo == 'sac':
+            # Parcelas decrescentes: valor_parcela é a primeira, como em calcular_valores
+            emprestimo.valor_parcela = totais('sac', emprestimo.valor_emprestado, emprestimo.taxa_juros,
+                                              emprestimo.prazo_meses)[1]
+        else:
+            emprestimo.valor_parcela = emprestimo.valor_total / emprestimo.prazo_meses if emprestimo.prazo_meses else emprestimo.valor_total
+        emprestimo.saldo_devedor = row['saldo_devedor']
+        emprestimo.total_juros = emprestimo.valor_total - emprestimo.valor_emprestado
+        emprestimo._cronograma = None
+        return emprestimo
+    
     @classmethod
     def from_dict(cls, data):
         emprestimo = cls(
@@ -151,7 +311,8 @@ class Emprestimo:
         
         emprestimo.data_criacao = data['data_criacao']
         emprestimo.ativo = data['ativo']
-        emprestimo.pagamentos = data['pagamentos']
+        emprestimo.pagamentos = [Pagamento.de_dict(pag) for pag in data['pagamentos']]
+        emprestimo.atualizar_agregados()
         
         # Manter valores calculados do JSON
         emprestimo.valor_total = data['valor_total']
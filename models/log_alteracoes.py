@@ -0,0 +1,86 @@
+"""
+Log de alterações do banco (detecção de escritas de outros processos)
+Triggers anotam o id de cada cliente/empréstimo alterado; quem tem cache em
+memória lê só as entradas novas e recarrega apenas aqueles registros
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Entradas mantidas no log; quem ficou mais atrás que isso recarrega tudo
+MAX_ENTRADAS_LOG = 10000
+# Excedente que justifica uma poda durante a sessão (evita uma transação por gravação)
+FOLGA_PODA = 1000
+
+SQL_CRIAR_LOG = """
+    CREATE TABLE IF NOT EXISTS log_alteracoes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabela TEXT NOT NULL,
+        registro_id TEXT NOT NULL
+    )
+"""
+
+
+def _triggers(tabela: str, alvo: str, coluna: str) -> list:
+    """Triggers de INSERT/UPDATE/DELETE em `tabela` que anotam `coluna` como registro de `alvo`"""
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS log_{tabela}_ai AFTER INSERT ON {tabela} BEGIN
+            INSERT INTO log_alteracoes (tabela, registro_id) VALUES ('{alvo}', new.{coluna});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS log_{tabela}_au AFTER UPDATE ON {tabela} BEGIN
+            INSERT INTO log_alteracoes (tabela, registro_id) VALUES ('{alvo}', new.{coluna});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS log_{tabela}_ad AFTER DELETE ON {tabela} BEGIN
+            INSERT INTO log_alteracoes (tabela, registro_id) VALUES ('{alvo}', old.{coluna});
+        END
+        """,
+    ]
+
+
+# Pagamentos são anotados como alteração do empréstimo (que é recarregado
+# junto com o histórico)
+SQL_TRIGGERS_LOG = (
+    _triggers('clientes', 'clientes', 'id')
+    + _triggers('emprestimos', 'emprestimos', 'id')
+    + _triggers('pagamentos', 'emprestimos', 'emprestimo_id')
+)
+
+
+def criar_log_alteracoes(cursor):
+    """Cria tabela e triggers do log e descarta entradas antigas"""
+    cursor.execute(SQL_CRIAR_LOG)
+    for sql in SQL_TRIGGERS_LOG:
+        cursor.execute(sql)
+    cursor.execute(
+        "DELETE FROM log_alteracoes WHERE seq <= (SELECT MAX(seq) FROM log_alteracoes) - ?",
+        (MAX_ENTRADAS_LOG,)
+    )
+
+
+def ultimo_seq(conn) -> int:
+    """Número da entrada mais recente do log (0 se vazio)"""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM log_alteracoes").fetchone()[0]
+
+
+def corte_poda(conn, lido_ate: int):
+    """
+    Maior seq que pode ser descartado do log durante a sessão
+    
+    Mantém as MAX_ENTRADAS_LOG entradas mais recentes e nada depois de
+    lido_ate (o que este processo ainda não leu fica).
+    
+    Returns:
+        seq de corte, ou None se o excedente ainda não chegou a FOLGA_PODA
+    """
+    menor, maior = conn.execute("SELECT MIN(seq), MAX(seq) FROM log_alteracoes").fetchone()
+    if menor is None:
+        return None
+    corte = min(maior - MAX_ENTRADAS_LOG, lido_ate)
+    if corte - menor + 1 < FOLGA_PODA:
+        return None
+    return corte
@@ -0,0 +1,296 @@
+"""
+Migrações versionadas do esquema (PRAGMA user_version)
+Cada passo roda uma única vez por banco, em ordem e na própria transação;
+o número da versão só avança quando o passo termina
+"""
+import time
+import logging
+
+from models.snapshots import SQL_CRIAR_SNAPSHOTS, SQL_CRIAR_REFAZER, SQL_TRIGGERS_REFAZER
+
+logger = logging.getLogger(__name__)
+
+# Linhas por transação nos preenchimentos em lote
+TAMANHO_LOTE = 5000
+
+
+class Migracao:
+    """Um passo de migração"""
+
+    def __init__(self, versao: int, descricao: str, funcao, em_lotes: bool = False):
+        """
+        Args:
+            versao: Versão do esquema depois do passo (1, 2, 3...)
+            descricao: Texto para o log
+            funcao: funcao(conn, db) que aplica o passo
+            em_lotes: Se True, o passo controla os próprios commits (preenchimentos
+                grandes, sem segurar o banco numa transação só); precisa poder ser
+                repetido do início se for interrompido
+        """
+        self.versao = versao
+        self.descricao = descricao
+        self.funcao = funcao
+        self.em_lotes = em_lotes
+
+
+MIGRACOES = []
+
+
+def migracao(versao: int, descricao: str, em_lotes: bool = False):
+    """Decorador que registra um passo em MIGRACOES"""
+    def registrar(funcao):
+        MIGRACOES.append(Migracao(versao, descricao, funcao, em_lotes))
+        MIGRACOES.sort(key=lambda m: m.versao)
+        return funcao
+    return registrar
+
+
+def versao_atual(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def versao_final() -> int:
+    """Versão do esquema esperada pelo código"""
+    return MIGRACOES[-1].versao if MIGRACOES else 0
+
+
+def migrar(conn, db) -> list:
+    """
+    Aplica em ordem as migrações que o banco ainda não tem
+
+    Args:
+        conn: Conexão fora de transação
+        db: DatabaseSQLite (para passos que precisam de criptografia etc.)
+
+    Returns:
+        Lista de dicts {'versao', 'descricao', 'segundos'} dos passos aplicados
+    """
+    aplicadas = []
+    atual = versao_atual(conn)
+    for passo in MIGRACOES:
+        if passo.versao <= atual:
+            continue
+
+        inicio = time.perf_counter()
+        if passo.em_lotes:
+            passo.funcao(conn, db)
+            conn.execute("BEGIN IMMEDIATE")
+            _concluir(conn, passo)
+        else:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                passo.funcao(conn, db)
+                _concluir(conn, passo)
+            except BaseException:
+                conn.rollback()
+                raise
+        segundos = time.perf_counter() - inicio
+
+        logger.info(f"Migração {passo.versao} ({passo.descricao}) aplicada em {segundos:.3f}s")
+        aplicadas.append({'versao': passo.versao, 'descricao': passo.descricao, 'segundos': segundos})
+        atual = passo.versao
+    return aplicadas
+
+
+def _concluir(conn, passo: Migracao):
+    # user_version faz parte da transação: só avança junto com o passo
+    conn.execute(f"PRAGMA user_version = {int(passo.versao)}")
+    conn.commit()
+
+
+def colunas(conn, tabela: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+
+
+def preencher_em_lotes(conn, sql_pendentes: str, calcular, sql_atualizar: str,
+                       tamanho: int = TAMANHO_LOTE) -> int:
+    """
+    Preenche uma coluna derivada em lotes, com um commit por lote
+
+    Args:
+        sql_pendentes: SELECT das linhas a preencher, com rowid como primeira
+            coluna, filtrando rowid > ? e terminando em ORDER BY rowid LIMIT ?
+        calcular: Função que recebe a lista de linhas e devolve as tuplas de
+            parâmetros de sql_atualizar
+        sql_atualizar: UPDATE executado com executemany
+
+    Returns:
+        Total de linhas preenchidas
+    """
+    total = 0
+    ultimo = -1
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            linhas = conn.execute(sql_pendentes, (ultimo, tamanho)).fetchall()
+            if linhas:
+                conn.executemany(sql_atualizar, calcular(linhas))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        total += len(linhas)
+        if len(linhas) < tamanho:
+            return total
+        # Avança pela chave: linhas que continuarem sem valor não voltam
+        ultimo = linhas[-1][0]
+        logger.debug(f"Preenchimento em lote: {total} linhas")
+
+
+# ==================== PASSOS ====================
+
+@migracao(1, "lembretes com id texto, tipo e mensagem")
+def _corrigir_lembretes(conn, db):
+    # Esquema antigo (titulo/descricao) nunca bateu com o código
+    if 'titulo' not in colunas(conn, 'lembretes'):
+        return
+    conn.execute("""
+        CREATE TABLE lembretes_nova (
+            id TEXT PRIMARY KEY,
+            tipo TEXT NOT NULL,
+            mensagem TEXT NOT NULL,
+            data TEXT NOT NULL,
+            concluido INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        INSERT INTO lembretes_nova (id, tipo, mensagem, data, concluido)
+        SELECT 'LEM' || id, titulo, COALESCE(descricao, titulo), data, concluido FROM lembretes
+    """)
+    conn.execute("DROP TABLE lembretes")
+    conn.execute("ALTER TABLE lembretes_nova RENAME TO lembretes")
+
+
+@migracao(2, "índices de carregamento, paginação e agregações")
+def _indices_desempenho(conn, db):
+    # Cobre o carregamento ordenado dos pagamentos (emprestimo_id, data)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagamentos_emprestimo_data ON pagamentos(emprestimo_id, data)")
+    # Paginação por chave (modo repositório): ORDER BY nome, id / data_vencimento, id
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes(nome, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_emprestimos_vencimento ON emprestimos(data_vencimento, id)")
+    # Filtro por período das agregações (resumo)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_emprestimos_data ON emprestimos(data_emprestimo)")
+
+
+@migracao(3, "colunas de índice cego em clientes")
+def _colunas_indice_cego(conn, db):
+    existentes = colunas(conn, 'clientes')
+    for coluna in db.COLUNAS_INDICE_CEGO:
+        if coluna not in existentes:
+            conn.execute(f"ALTER TABLE clientes ADD COLUMN {coluna} TEXT")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_clientes_{coluna} ON clientes({coluna})")
+
+
+@migracao(4, "preenche índices cegos dos clientes existentes", em_lotes=True)
+def _preencher_indices_cegos(conn, db):
+    total = preencher_em_lotes(
+        conn,
+        """
+        SELECT rowid, id, cpf_cnpj, telefone, email FROM clientes
+        WHERE rowid > ? AND cpf_cnpj_idx IS NULL AND telefone_idx IS NULL AND email_idx IS NULL
+        ORDER BY rowid LIMIT ?
+        """,
+        db._calcular_indices_cegos,
+        "UPDATE clientes SET cpf_cnpj_idx = ?, telefone_idx = ?, email_idx = ? WHERE id = ?"
+    )
+    if total:
+        logger.info(f"Índices cegos calculados para {total} clientes")
+
+
+# Agregados dos pagamentos de cada empréstimo. Inserção (o caso comum) só
+# soma o pagamento novo; alteração/remoção de pagamento recalcula o empréstimo.
+_SQL_RECALCULAR_AGREGADOS = """
+    UPDATE emprestimos SET
+        total_pago = (SELECT TOTAL(valor) FROM pagamentos WHERE emprestimo_id = {alvo}),
+        parcelas_pagas = (SELECT COUNT(*) FROM pagamentos
+                          WHERE emprestimo_id = {alvo} AND COALESCE(tipo, 'Parcela') = 'Parcela'),
+        data_ultimo_pagamento = (SELECT MAX(data) FROM pagamentos WHERE emprestimo_id = {alvo})
+    WHERE id = {alvo}
+"""
+
+SQL_TRIGGERS_AGREGADOS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS agregados_pagamentos_ai AFTER INSERT ON pagamentos BEGIN
+        UPDATE emprestimos SET
+            total_pago = total_pago + new.valor,
+            parcelas_pagas = parcelas_pagas + (COALESCE(new.tipo, 'Parcela') = 'Parcela'),
+            data_ultimo_pagamento = CASE
+                WHEN data_ultimo_pagamento IS NULL OR new.data > data_ultimo_pagamento THEN new.data
+                ELSE data_ultimo_pagamento END
+        WHERE id = new.emprestimo_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS agregados_pagamentos_au AFTER UPDATE ON pagamentos BEGIN
+        {_SQL_RECALCULAR_AGREGADOS.format(alvo='old.emprestimo_id')};
+        {_SQL_RECALCULAR_AGREGADOS.format(alvo='new.emprestimo_id')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS agregados_pagamentos_ad AFTER DELETE ON pagamentos BEGIN
+        {_SQL_RECALCULAR_AGREGADOS.format(alvo='old.emprestimo_id')};
+    END
+    """,
+]
+
+
+@migracao(5, "colunas de agregados de pagamentos em emprestimos")
+def _colunas_agregados(conn, db):
+    existentes = colunas(conn, 'emprestimos')
+    for coluna, tipo in (('total_pago', 'REAL NOT NULL DEFAULT 0'),
+                         ('parcelas_pagas', 'INTEGER NOT NULL DEFAULT 0'),
+                         ('data_ultimo_pagamento', 'TEXT')):
+        if coluna not in existentes:
+            conn.execute(f"ALTER TABLE emprestimos ADD COLUMN {coluna} {tipo}")
+    for sql in SQL_TRIGGERS_AGREGADOS:
+        conn.execute(sql)
+
+
+@migracao(6, "preenche agregados de pagamentos dos empréstimos existentes", em_lotes=True)
+def _preencher_agregados(conn, db):
+    total = preencher_em_lotes(
+        conn,
+        "SELECT rowid, id FROM emprestimos WHERE rowid > ? ORDER BY rowid LIMIT ?",
+        lambda linhas: [{'id': linha['id']} for linha in linhas],
+        _SQL_RECALCULAR_AGREGADOS.format(alvo=':id')
+    )
+    logger.info(f"Agregados de pagamentos calculados para {total} empréstimos")
+
+
+@migracao(7, "tabela de snapshots diários da carteira")
+def _tabela_snapshots(conn, db):
+    conn.execute(SQL_CRIAR_SNAPSHOTS)
+    # Recebido no dia: pagamentos por intervalo de data
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pagamentos_data ON pagamentos(data)")
+
+
+@migracao(8, "data de criação dos empréstimos", em_lotes=True)
+def _coluna_data_criacao(conn, db):
+    # Fora de transação: o ALTER é aplicado sozinho e o passo pode ser refeito
+    if 'data_criacao' not in colunas(conn, 'emprestimos'):
+        conn.execute("ALTER TABLE emprestimos ADD COLUMN data_criacao TEXT")
+    # Criação nunca foi gravada antes: a data do empréstimo é a melhor aproximação
+    total = preencher_em_lotes(
+        conn,
+        """
+        SELECT rowid, data_emprestimo FROM emprestimos
+        WHERE rowid > ? AND data_criacao IS NULL
+        ORDER BY rowid LIMIT ?
+        """,
+        lambda linhas: [(linha['data_emprestimo'], linha['rowid']) for linha in linhas],
+        "UPDATE emprestimos SET data_criacao = ? WHERE rowid = ?"
+    )
+    if total:
+        logger.info(f"Data de criação preenchida para {total} empréstimos")
+
+
+@migracao(9, "dias de snapshot a refazer após alterações retroativas")
+def _refazer_snapshots(conn, db):
+    conn.execute(SQL_CRIAR_REFAZER)
+    for sql in SQL_TRIGGERS_REFAZER:
+        conn.execute(sql)
+    # Snapshots gravados antes disto podem já ter perdido lançamentos retroativos
+    conn.execute("""
+        INSERT OR REPLACE INTO snapshots_refazer (dia)
+        SELECT data FROM snapshots_carteira ORDER BY data LIMIT 1
+    """)
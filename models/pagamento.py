@@ -0,0 +1,71 @@
+"""
+Registro compacto de pagamento
+Um objeto com __slots__ no lugar do dict de cinco/seis chaves por pagamento;
+continua aceitando pag['valor'], pag.get('tipo', ...) e pag['id'] = ...
+"""
+
+
+class Pagamento:
+    """Pagamento de um empréstimo, com acesso por atributo ou no estilo dict"""
+    __slots__ = ('id', 'valor', 'data', 'tipo', 'saldo_anterior', 'metodo')
+
+    def __init__(self, id, valor, data, tipo='Parcela', saldo_anterior=0, metodo=None):
+        self.id = id
+        self.valor = valor
+        self.data = data
+        self.tipo = tipo or 'Parcela'
+        self.saldo_anterior = saldo_anterior or 0
+        self.metodo = metodo or None
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Converte um pagamento em dict (JSON antigo, chamadores externos); Pagamento passa direto"""
+        if isinstance(dados, cls):
+            return dados
+        return cls(dados.get('id'), dados['valor'], dados['data'], dados.get('tipo'),
+                   dados.get('saldo_anterior'), dados.get('metodo'))
+
+    # ----- Acesso no estilo dict (como os pagamentos eram guardados antes) -----
+    # 'metodo' só "existe" quando preenchido, como a chave opcional do dict
+
+    def __getitem__(self, chave):
+        if chave not in self.__slots__:
+            raise KeyError(chave)
+        valor = getattr(self, chave)
+        if chave == 'metodo' and valor is None:
+            raise KeyError(chave)
+        return valor
+
+    def __setitem__(self, chave, valor):
+        if chave not in self.__slots__:
+            raise KeyError(chave)
+        setattr(self, chave, valor)
+
+    def __contains__(self, chave):
+        return chave in self.__slots__ and (chave != 'metodo' or self.metodo is not None)
+
+    def get(self, chave, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
+
+    def keys(self):
+        return [chave for chave in self.__slots__ if chave in self]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def items(self):
+        return [(chave, getattr(self, chave)) for chave in self.keys()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, outro):
+        if isinstance(outro, (Pagamento, dict)):
+            return self.to_dict() == dict(outro.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Pagamento({self.to_dict()!r})"
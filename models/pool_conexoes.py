@@ -0,0 +1,228 @@
+"""
+Pool de conexões SQLite
+Mantém conexões abertas entre chamadas em vez de abrir/fechar o arquivo
+a cada operação do banco
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Perfis de durabilidade: cada um ajusta os PRAGMAs de desempenho em conjunto.
+# Todos usam journal WAL (leitores não bloqueiam atrás de escritas).
+#   safe     - fsync a cada commit, sem mmap (máxima segurança contra queda de energia)
+#   balanced - fsync só nos checkpoints; commits recentes podem se perder numa queda
+#              de energia, mas o banco nunca corrompe (padrão)
+#   fast     - sem fsync; indicado apenas para cargas em lote/dados de teste
+PERFIS_DURABILIDADE = {
+    'safe': {
+        'synchronous': 'FULL',
+        'cache_size': -8000,         # KiB (~8 MB)
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+    'balanced': {
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,        # ~16 MB
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+    'fast': {
+        'synchronous': 'OFF',
+        'cache_size': -64000,        # ~64 MB
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+# Checkpoint automático a cada N páginas no WAL e tamanho máximo mantido
+# no arquivo -wal após um checkpoint
+WAL_AUTOCHECKPOINT_PAGINAS = 1000
+WAL_LIMITE_BYTES = 16 * 1024 * 1024
+
+
+class PoolConexoes:
+    """Pool de conexões SQLite thread-safe
+
+    Cada thread usa uma única conexão por vez: chamadas aninhadas na mesma
+    thread reaproveitam a conexão já emprestada, e conexões nunca são
+    compartilhadas entre threads ao mesmo tempo.
+    """
+
+    def __init__(self, db_path: Path, max_conexoes: int = 5, timeout: float = 30.0,
+                 perfil: str = 'balanced'):
+        """
+        Args:
+            db_path: Caminho para o arquivo .db
+            max_conexoes: Número máximo de conexões abertas simultaneamente
+            timeout: Segundos de espera por uma conexão livre (ou por um lock
+                do SQLite) antes de falhar
+            perfil: Perfil de durabilidade ('safe', 'balanced' ou 'fast')
+        """
+        if perfil not in PERFIS_DURABILIDADE:
+            raise ValueError(
+                f"Perfil de durabilidade inválido: {perfil!r} "
+                f"(use {', '.join(PERFIS_DURABILIDADE)})"
+            )
+
+        self.db_path = db_path
+        self.max_conexoes = max_conexoes
+        self.timeout = timeout
+        self.perfil = perfil
+
+        self._livres = []
+        self._abertas = 0
+        self._fechado = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+        # Métricas
+        self._hits = 0
+        self._criadas = 0
+        self._esperas = 0
+
+    def _criar_conexao(self) -> sqlite3.Connection:
+        """Abre uma nova conexão configurada"""
+        conn = sqlite3.connect(str(self.db_path), timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        self._configurar(conn)
+        return conn
+
+    def _configurar(self, conn: sqlite3.Connection):
+        """Aplica journal WAL e os PRAGMAs do perfil de durabilidade"""
+        # journal_mode é persistente no arquivo; nas conexões seguintes é só uma checagem
+        modo = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if modo.lower() != 'wal':
+            logger.warning(f"Não foi possível ativar WAL (journal_mode={modo})")
+
+        for pragma, valor in PERFIS_DURABILIDADE[self.perfil].items():
+            conn.execute(f"PRAGMA {pragma}={valor}")
+
+        conn.execute(f"PRAGMA wal_autocheckpoint={WAL_AUTOCHECKPOINT_PAGINAS}")
+        conn.execute(f"PRAGMA journal_size_limit={WAL_LIMITE_BYTES}")
+
+    def _obter(self) -> sqlite3.Connection:
+        """Retira uma conexão do pool (ou cria uma nova se houver vaga)"""
+        with self._cond:
+            if self._fechado:
+                raise sqlite3.ProgrammingError("Pool de conexões já foi fechado")
+
+            if self._livres:
+                self._hits += 1
+                return self._livres.pop()
+
+            if self._abertas >= self.max_conexoes:
+                self._esperas += 1
+                if not self._cond.wait_for(lambda: self._livres or self._fechado, timeout=self.timeout):
+                    raise sqlite3.OperationalError("Tempo esgotado aguardando conexão livre no pool")
+                if self._fechado:
+                    raise sqlite3.ProgrammingError("Pool de conexões já foi fechado")
+                self._hits += 1
+                return self._livres.pop()
+
+            self._abertas += 1
+            self._criadas += 1
+
+        try:
+            return self._criar_conexao()
+        except Exception:
+            with self._cond:
+                self._abertas -= 1
+                self._cond.notify()
+            raise
+
+    def _devolver(self, conn: sqlite3.Connection):
+        """Devolve a conexão ao pool"""
+        if conn.in_transaction:
+            # Nunca devolver conexão com transação pendurada
+            conn.rollback()
+
+        with self._cond:
+            if self._fechado:
+                self._abertas -= 1
+                conn.close()
+            else:
+                self._livres.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão para a thread atual
+
+        Uso:
+            with pool.conexao() as conn:
+                conn.execute(...)
+        """
+        atual = getattr(self._local, 'conn', None)
+        if atual is not None:
+            # Chamada aninhada na mesma thread: reaproveitar conexão
+            self._local.profundidade += 1
+            try:
+                yield atual
+            finally:
+                self._local.profundidade -= 1
+            return
+
+        conn = self._obter()
+        self._local.conn = conn
+        self._local.profundidade = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.profundidade = 0
+            self._devolver(conn)
+
+    def checkpoint(self, modo: str = 'PASSIVE') -> tuple:
+        """
+        Transfere o conteúdo do WAL para o arquivo principal
+
+        Args:
+            modo: 'PASSIVE' (não bloqueia ninguém), 'RESTART' ou 'TRUNCATE'
+                (aguardam leitores e reiniciam/zeram o arquivo -wal)
+
+        Returns:
+            (ocupado, paginas_no_wal, paginas_transferidas)
+        """
+        modo = modo.upper()
+        if modo not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Modo de checkpoint inválido: {modo}")
+        with self.conexao() as conn:
+            return tuple(conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchone())
+
+    def tamanho_wal(self) -> int:
+        """Tamanho atual do arquivo -wal em bytes (0 se não existir)"""
+        try:
+            return Path(f"{self.db_path}-wal").stat().st_size
+        except OSError:
+            return 0
+
+    def fechar(self):
+        """Fecha todas as conexões livres; as emprestadas fecham ao serem devolvidas"""
+        with self._cond:
+            if self._fechado:
+                return
+            self._fechado = True
+            while self._livres:
+                self._livres.pop().close()
+                self._abertas -= 1
+            self._cond.notify_all()
+        logger.info("Pool de conexões fechado")
+
+    @property
+    def fechado(self) -> bool:
+        return self._fechado
+
+    def metricas(self) -> dict:
+        """Retorna métricas de uso do pool"""
+        with self._cond:
+            return {
+                'hits': self._hits,
+                'criadas': self._criadas,
+                'esperas': self._esperas,
+                'abertas': self._abertas,
+                'livres': len(self._livres),
+            }
@@ -0,0 +1,321 @@
+"""
+Repositório paginado (modo repositório)
+Consulta clientes e empréstimos por páginas direto no SQLite, em vez de
+carregar e descriptografar o banco inteiro na memória
+"""
+from collections import OrderedDict
+from datetime import date
+from typing import List, Optional
+import threading
+import logging
+
+from models.cliente import Cliente
+from models.emprestimo import Emprestimo
+from models.pagamento import Pagamento
+from models.busca_fts import montar_consulta_fts
+
+logger = logging.getLogger(__name__)
+
+# Tamanho padrão de página e quantas páginas ficam em memória
+TAMANHO_PAGINA = 50
+MAX_PAGINAS_CACHE = 8
+
+
+class Pagina:
+    """Uma página de resultados da paginação por chave (keyset)"""
+
+    def __init__(self, itens: list, cursor_proximo: Optional[tuple]):
+        """
+        Args:
+            itens: Objetos da página
+            cursor_proximo: (chave de ordenação, id) do último item, para pedir
+                a página seguinte; None se esta é a última página
+        """
+        self.itens = itens
+        self.cursor_proximo = cursor_proximo
+
+    @property
+    def tem_proxima(self) -> bool:
+        return self.cursor_proximo is not None
+
+    def __iter__(self):
+        return iter(self.itens)
+
+    def __len__(self):
+        return len(self.itens)
+
+
+class RepositorioPaginado:
+    """
+    Acesso paginado a clientes e empréstimos
+
+    Usa paginação por chave: WHERE (ordem, id) > (?, ?) ORDER BY ordem, id
+    LIMIT n. O custo de cada página não depende de quantas vieram antes
+    (diferente de OFFSET). Só as páginas mais recentes ficam em memória, num
+    LRU limitado que é descartado sempre que o banco grava alterações.
+    """
+
+    def __init__(self, db, max_paginas: int = MAX_PAGINAS_CACHE):
+        """
+        Args:
+            db: DatabaseSQLite de onde vêm conexões, criptografia e gravações
+            max_paginas: Máximo de páginas (e de registros avulsos) em cache
+        """
+        self.db = db
+        self.max_paginas = max_paginas
+        self._paginas = OrderedDict()
+        self._avulsos = OrderedDict()
+        self._versao = db.versao_dados
+        self._lock = threading.Lock()
+
+    # ==================== CACHE ====================
+
+    def _do_cache(self, cache: OrderedDict, chave):
+        with self._lock:
+            if self._versao != self.db.versao_dados:
+                # Banco gravou algo desde que as páginas foram lidas
+                self._paginas.clear()
+                self._avulsos.clear()
+                self._versao = self.db.versao_dados
+                return None
+            valor = cache.get(chave)
+            if valor is not None:
+                cache.move_to_end(chave)
+            return valor
+
+    def _guardar(self, cache: OrderedDict, chave, valor):
+        with self._lock:
+            cache[chave] = valor
+            cache.move_to_end(chave)
+            while len(cache) > self.max_paginas:
+                cache.popitem(last=False)
+
+    def invalidar(self):
+        """Descarta todas as páginas em memória"""
+        with self._lock:
+            self._paginas.clear()
+            self._avulsos.clear()
+
+    # ==================== CLIENTES ====================
+
+    def pagina_clientes(self, apos: tuple = None, limite: int = TAMANHO_PAGINA,
+                        busca: str = None) -> Pagina:
+        """
+        Página de clientes em ordem de nome
+
+        Args:
+            apos: cursor_proximo da página anterior (None = primeira página)
+            limite: Clientes por página
+            busca: Filtra pelo índice FTS (prefixos de nome, CPF/telefone
+                quando o banco não está criptografado); sem FTS, por LIKE
+        """
+        chave = ('clientes', apos, limite, busca)
+        pagina = self._do_cache(self._paginas, chave)
+        if pagina is not None:
+            return pagina
+
+        condicoes, params = [], []
+        consulta = montar_consulta_fts(busca) if busca else None
+        if consulta and self.db._fts_disponivel:
+            condicoes.append("id IN (SELECT cliente_id FROM clientes_fts WHERE clientes_fts MATCH ?)")
+            params.append(consulta)
+        elif busca:
+            termo = f"%{busca}%"
+            if self.db.crypto:
+                condicoes.append("nome LIKE ?")
+                params.append(termo)
+            else:
+                condicoes.append("(nome LIKE ? OR cpf_cnpj LIKE ? OR telefone LIKE ?)")
+                params += [termo, termo, termo]
+        if apos is not None:
+            condicoes.append("(nome, id) > (?, ?)")
+            params += list(apos)
+
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        with self.db.pool.conexao() as conn:
+            rows = conn.execute(f"""
+                SELECT * FROM clientes {where}
+                ORDER BY nome, id
+                LIMIT ?
+            """, params + [limite + 1]).fetchall()
+
+        pagina = self._montar_pagina(
+            [self.db._cliente_de_row(row) for row in rows], limite,
+            lambda c: (c.nome, c.id)
+        )
+        self._guardar(self._paginas, chave, pagina)
+        return pagina
+
+    def nomes_clientes(self) -> List[tuple]:
+        """(id, nome) de todos os clientes em ordem de nome, sem montar objetos nem descriptografar"""
+        with self.db.pool.conexao() as conn:
+            rows = conn.execute("SELECT id, nome FROM clientes ORDER BY nome, id").fetchall()
+        return [(row['id'], row['nome']) for row in rows]
+
+    def cliente(self, cliente_id: str) -> Optional[Cliente]:
+        """Busca um cliente por ID sem carregar os demais"""
+        chave = ('cliente', cliente_id)
+        cliente = self._do_cache(self._avulsos, chave)
+        if cliente is not None:
+            return cliente
+
+        with self.db.pool.conexao() as conn:
+            row = conn.execute("SELECT * FROM clientes WHERE id = ?", (cliente_id,)).fetchone()
+        if row is None:
+            return None
+        cliente = self.db._cliente_de_row(row)
+        self._guardar(self._avulsos, chave, cliente)
+        return cliente
+
+    # ==================== EMPRÉSTIMOS ====================
+
+    def pagina_emprestimos(self, apos: tuple = None, limite: int = TAMANHO_PAGINA,
+                           cliente_id: str = None, status: str = None,
+                           busca_cliente: str = None) -> Pagina:
+        """
+        Página de empréstimos em ordem de vencimento
+
+        Args:
+            apos: cursor_proximo da página anterior (None = primeira página)
+            limite: Empréstimos por página
+            cliente_id: Só empréstimos deste cliente
+            status: 'em_dia', 'atrasado' ou 'quitado'
+            busca_cliente: Trecho do nome do cliente
+        """
+        chave = ('emprestimos', apos, limite, cliente_id, status, busca_cliente)
+        pagina = self._do_cache(self._paginas, chave)
+        if pagina is not None:
+            return pagina
+
+        condicoes, params = self._filtros_emprestimo(cliente_id, status, busca_cliente)
+        if apos is not None:
+            condicoes.append("(e.data_vencimento, e.id) > (?, ?)")
+            params += list(apos)
+
+        emprestimos = self._consultar_emprestimos(condicoes, params, limite + 1)
+        pagina = self._montar_pagina(emprestimos, limite, lambda e: (e.data_vencimento, e.id))
+        self._guardar(self._paginas, chave, pagina)
+        return pagina
+
+    def emprestimo(self, emprestimo_id: str) -> Optional[Emprestimo]:
+        """Busca um empréstimo (com pagamentos) por ID sem carregar os demais"""
+        chave = ('emprestimo', emprestimo_id)
+        emprestimo = self._do_cache(self._avulsos, chave)
+        if emprestimo is not None:
+            return emprestimo
+
+        encontrados = self._consultar_emprestimos(["e.id = ?"], [emprestimo_id], 1)
+        if not encontrados:
+            return None
+        self._guardar(self._avulsos, chave, encontrados[0])
+        return encontrados[0]
+
+    def emprestimos_filtrados(self, cliente_id: str = None, status: str = None) -> List[Emprestimo]:
+        """Todos os empréstimos que passam no filtro (sem paginar nem guardar em cache)"""
+        condicoes, params = self._filtros_emprestimo(cliente_id, status, None)
+        return self._consultar_emprestimos(condicoes, params, None)
+
+    def emprestimos_abertos_por_vencimento(self, desde: str = None, antes_de: str = None) -> List[Emprestimo]:
+        """
+        Empréstimos não quitados com vencimento em [desde, antes_de), por data
+        
+        Compara a coluna direto (sem substr) para usar idx_emprestimos_vencimento.
+        """
+        return self.emprestimos_por_vencimento(desde, antes_de, ["e.saldo_devedor > 0"])
+
+    def emprestimos_por_vencimento(self, desde: str = None, antes_de: str = None,
+                                   condicoes: list = None) -> List[Emprestimo]:
+        """Empréstimos com vencimento em [desde, antes_de), por data (None = sem limite)"""
+        condicoes, params = list(condicoes or []), []
+        if desde is not None:
+            condicoes.append("e.data_vencimento >= ?")
+            params.append(desde)
+        if antes_de is not None:
+            condicoes.append("e.data_vencimento < ?")
+            params.append(antes_de)
+        return self._consultar_emprestimos(condicoes, params, None)
+
+    def emprestimos_ativos(self) -> List[Emprestimo]:
+        """Empréstimos ativos com saldo devedor (em dia ou atrasados)"""
+        return self._consultar_emprestimos(["e.saldo_devedor > 0", "e.ativo"], [], None)
+
+    def contar_por_status(self) -> dict:
+        """Quantidade de empréstimos em cada status, numa consulta só (sem montar objetos)"""
+        with self.db.pool.conexao() as conn:
+            row = conn.execute("""
+                SELECT TOTAL(saldo_devedor > 0 AND NOT (substr(data_vencimento, 1, 10) < ?)),
+                       TOTAL(saldo_devedor > 0 AND substr(data_vencimento, 1, 10) < ?),
+                       TOTAL(saldo_devedor <= 0)
+                FROM emprestimos
+            """, (date.today().isoformat(),) * 2).fetchone()
+        return {'em_dia': int(row[0]), 'atrasado': int(row[1]), 'quitado': int(row[2])}
+
+    def pagamento(self, pagamento_id: str) -> Optional[Pagamento]:
+        """Busca um pagamento por ID sem carregar o empréstimo"""
+        with self.db.pool.conexao() as conn:
+            row = conn.execute("""
+                SELECT id, valor, data, tipo, saldo_anterior, metodo
+                FROM pagamentos WHERE id = ?
+            """, (pagamento_id,)).fetchone()
+        return Pagamento(*row) if row is not None else None
+
+    def situacao_clientes(self, cliente_ids: List[str]) -> dict:
+        """cliente_id -> (qtd_emprestimos, qtd_em_aberto, total_devido), numa consulta agrupada"""
+        situacao = {}
+        with self.db.pool.conexao() as conn:
+            for bloco in self.db._em_blocos(set(cliente_ids)):
+                for row in conn.execute(f"""
+                    SELECT cliente_id, COUNT(*),
+                           TOTAL(ativo AND saldo_devedor > 0),
+                           TOTAL(CASE WHEN ativo AND saldo_devedor > 0 THEN saldo_devedor ELSE 0 END)
+                    FROM emprestimos
+                    WHERE cliente_id IN ({', '.join('?' * len(bloco))})
+                    GROUP BY cliente_id
+                """, bloco):
+                    situacao[row[0]] = (row[1], int(row[2]), row[3])
+        return situacao
+
+    def _filtros_emprestimo(self, cliente_id, status, busca_cliente):
+        condicoes, params = [], []
+        if cliente_id is not None:
+            condicoes.append("e.cliente_id = ?")
+            params.append(cliente_id)
+        if status == 'quitado':
+            condicoes.append("e.saldo_devedor <= 0")
+        elif status == 'atrasado':
+            condicoes.append("e.saldo_devedor > 0 AND substr(e.data_vencimento, 1, 10) < ?")
+            params.append(date.today().isoformat())
+        elif status == 'em_dia':
+            condicoes.append("e.saldo_devedor > 0 AND NOT (substr(e.data_vencimento, 1, 10) < ?)")
+            params.append(date.today().isoformat())
+        elif status is not None:
+            raise ValueError(f"Status inválido: {status!r}")
+        if busca_cliente:
+            condicoes.append("e.cliente_id IN (SELECT id FROM clientes WHERE nome LIKE ?)")
+            params.append(f"%{busca_cliente}%")
+        return condicoes, params
+
+    def _consultar_emprestimos(self, condicoes: list, params: list, limite: Optional[int]) -> List[Emprestimo]:
+        """SELECT dos empréstimos + uma consulta para os pagamentos de todos eles"""
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        sql_limite = "LIMIT ?" if limite is not None else ""
+        if limite is not None:
+            params = params + [limite]
+
+        with self.db.pool.conexao() as conn:
+            rows = conn.execute(f"""
+                SELECT e.* FROM emprestimos e {where}
+                ORDER BY e.data_vencimento, e.id
+                {sql_limite}
+            """, params).fetchall()
+            pagamentos = self.db._carregar_pagamentos_agrupados(conn, [row['id'] for row in rows])
+
+        return [self.db._emprestimo_de_row(row, pagamentos.get(row['id'], [])) for row in rows]
+
+    @staticmethod
+    def _montar_pagina(itens: list, limite: int, chave_ordem) -> Pagina:
+        """Usa o item extra (limite + 1) só para saber se existe próxima página"""
+        if len(itens) > limite:
+            itens = itens[:limite]
+            return Pagina(itens, chave_ordem(itens[-1]))
+        return Pagina(itens, None)
@@ -0,0 +1,54 @@
+"""
+Resultado das agregações da carteira (DatabaseSQLite.resumo)
+"""
+from typing import Dict
+
+# Faixas do histograma de valor emprestado: (rótulo, limite superior exclusivo)
+FAIXAS_VALOR = (
+    ("0-500", 500),
+    ("500-1k", 1000),
+    ("1k-5k", 5000),
+    ("5k-10k", 10000),
+    ("10k+", None),
+)
+
+
+class Resumo:
+    """Totais, contagens e histograma calculados no SQLite"""
+
+    def __init__(self, total_clientes: int = 0, clientes_com_emprestimo: int = 0,
+                 total_emprestimos: int = 0, ativos: int = 0, quitados: int = 0,
+                 atrasados: int = 0, total_emprestado: float = 0.0,
+                 saldo_devedor: float = 0.0, total_pago: float = 0.0,
+                 total_juros: float = 0.0, faixas_valor: Dict[str, int] = None):
+        self.total_clientes = total_clientes
+        self.clientes_com_emprestimo = clientes_com_emprestimo
+        self.total_emprestimos = total_emprestimos
+        self.ativos = ativos
+        self.quitados = quitados
+        self.atrasados = atrasados
+        self.total_emprestado = total_emprestado
+        self.saldo_devedor = saldo_devedor
+        self.total_pago = total_pago
+        self.total_juros = total_juros
+        self.faixas_valor = faixas_valor or {rotulo: 0 for rotulo, _ in FAIXAS_VALOR}
+
+    @property
+    def inativos(self) -> int:
+        """Empréstimos marcados como inativos"""
+        return self.total_emprestimos - self.ativos
+
+    @property
+    def em_dia(self) -> int:
+        """Ativos que não estão atrasados"""
+        return max(self.ativos - self.atrasados, 0)
+
+    def to_dict(self) -> dict:
+        dados = dict(vars(self))
+        dados['inativos'] = self.inativos
+        dados['em_dia'] = self.em_dia
+        return dados
+
+    def __repr__(self):
+        return (f"Resumo(emprestimos={self.total_emprestimos}, "
+                f"emprestado={self.total_emprestado:.2f}, saldo={self.saldo_devedor:.2f})")
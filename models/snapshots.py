@@ -0,0 +1,232 @@
+"""
+Fotografias diárias da carteira (tabela snapshots_carteira)
+Uma linha por dia com totais emprestado, em aberto, em atraso, recebido no
+dia e empréstimos ativos; o dashboard desenha meses de histórico a partir
+de poucas centenas de linhas
+"""
+from datetime import date, timedelta
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Na primeira execução, quantos dias para trás reconstruir
+DIAS_HISTORICO_INICIAL = 90
+
+CAMPOS_SNAPSHOT = (
+    'total_emprestado', 'saldo_devedor', 'valor_atrasado',
+    'qtd_atrasados', 'recebido_dia', 'emprestimos_ativos',
+)
+
+SQL_CRIAR_SNAPSHOTS = """
+    CREATE TABLE IF NOT EXISTS snapshots_carteira (
+        data TEXT PRIMARY KEY,
+        total_emprestado REAL NOT NULL,
+        saldo_devedor REAL NOT NULL,
+        valor_atrasado REAL NOT NULL,
+        qtd_atrasados INTEGER NOT NULL,
+        recebido_dia REAL NOT NULL,
+        emprestimos_ativos INTEGER NOT NULL
+    )
+"""
+
+# Dias cujo snapshot ficou desatualizado. Os triggers anotam o dia mais antigo
+# que cada alteração afeta (empréstimo com data retroativa, pagamento com data
+# passada, edição ou remoção) e registrar_snapshots refaz a partir dele. Um dia
+# é anotado uma vez só; o REPLACE dá seq novo a um dia já anotado, para a
+# anotação não ser descartada por uma gravação de snapshots já em andamento.
+SQL_CRIAR_REFAZER = """
+    CREATE TABLE IF NOT EXISTS snapshots_refazer (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        dia TEXT NOT NULL UNIQUE
+    )
+"""
+
+
+def _trigger_refazer(nome: str, evento: str, dia: str, quando: str = "") -> str:
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS snapshots_refazer_{nome} {evento} {quando} BEGIN
+            INSERT OR REPLACE INTO snapshots_refazer (dia) VALUES (substr({dia}, 1, 10));
+        END
+    """
+
+
+# Pagamento novo só muda o saldo do empréstimo (já coberto pela data do
+# pagamento); edições de valor ou datas afetam desde a data do empréstimo
+SQL_TRIGGERS_REFAZER = [
+    _trigger_refazer('emprestimos_ai', "AFTER INSERT ON emprestimos", "new.data_emprestimo"),
+    _trigger_refazer(
+        'emprestimos_au', "AFTER UPDATE ON emprestimos", "min(old.data_emprestimo, new.data_emprestimo)",
+        """WHEN old.valor_emprestado IS NOT new.valor_emprestado
+             OR old.valor_total IS NOT new.valor_total
+             OR old.data_emprestimo IS NOT new.data_emprestimo
+             OR old.data_vencimento IS NOT new.data_vencimento"""
+    ),
+    _trigger_refazer('emprestimos_ad', "AFTER DELETE ON emprestimos", "old.data_emprestimo"),
+    _trigger_refazer('pagamentos_ai', "AFTER INSERT ON pagamentos", "new.data"),
+    _trigger_refazer('pagamentos_au', "AFTER UPDATE ON pagamentos", "min(old.data, new.data)"),
+    _trigger_refazer('pagamentos_ad', "AFTER DELETE ON pagamentos", "old.data"),
+]
+
+# Estado ao fim de :dia a partir do estado atual: o saldo de cada empréstimo
+# volta somando só os pagamentos feitos depois do dia (busca pelo índice
+# emprestimo_id, data); empréstimos posteriores ao dia ficam de fora.
+# Varre a carteira inteira: só serve de base para o primeiro dia gravado.
+_SQL_ESTADO_NO_DIA = """
+    SELECT
+        TOTAL(valor_emprestado),
+        TOTAL(saldo),
+        TOTAL(CASE WHEN saldo > 0 AND vencimento < :dia THEN saldo ELSE 0 END),
+        TOTAL(CASE WHEN saldo > 0 AND vencimento < :dia THEN 1 ELSE 0 END),
+        TOTAL(CASE WHEN saldo > 0 THEN 1 ELSE 0 END)
+    FROM (
+        SELECT
+            e.valor_emprestado,
+            substr(e.data_vencimento, 1, 10) AS vencimento,
+            e.saldo_devedor + COALESCE((
+                SELECT SUM(p.valor) FROM pagamentos p
+                WHERE p.emprestimo_id = e.id AND p.data >= :dia_seguinte
+            ), 0) AS saldo
+        FROM emprestimos e
+        WHERE e.data_emprestimo < :dia_seguinte
+    )
+"""
+
+# Variação de :dia em relação ao dia anterior. Só mudam os empréstimos criados
+# no dia, os que receberam pagamento no dia e os que venceram na véspera
+# (passam a contar como atrasados); todos saem por índices. Para cada um:
+# contribuição ao fim do dia menos contribuição ao fim da véspera.
+_SQL_VARIACAO_NO_DIA = """
+    WITH tocados(id) AS (
+        SELECT id FROM emprestimos
+        WHERE data_emprestimo >= :dia AND data_emprestimo < :dia_seguinte
+        UNION
+        SELECT emprestimo_id FROM pagamentos
+        WHERE data >= :dia AND data < :dia_seguinte
+        UNION
+        SELECT id FROM emprestimos
+        WHERE data_vencimento >= :dia_anterior AND data_vencimento < :dia
+    ),
+    estado AS (
+        SELECT
+            e.valor_emprestado,
+            e.data_emprestimo < :dia AS existia,
+            substr(e.data_vencimento, 1, 10) AS vencimento,
+            e.saldo_devedor + COALESCE((
+                SELECT SUM(p.valor) FROM pagamentos p
+                WHERE p.emprestimo_id = e.id AND p.data >= :dia
+            ), 0) AS saldo_antes,
+            e.saldo_devedor + COALESCE((
+                SELECT SUM(p.valor) FROM pagamentos p
+                WHERE p.emprestimo_id = e.id AND p.data >= :dia_seguinte
+            ), 0) AS saldo_depois
+        FROM emprestimos e JOIN tocados t ON t.id = e.id
+        WHERE e.data_emprestimo < :dia_seguinte
+    )
+    SELECT
+        TOTAL(CASE WHEN existia THEN 0 ELSE valor_emprestado END),
+        TOTAL(saldo_depois) - TOTAL(CASE WHEN existia THEN saldo_antes ELSE 0 END),
+        TOTAL(CASE WHEN saldo_depois > 0 AND vencimento < :dia THEN saldo_depois ELSE 0 END)
+            - TOTAL(CASE WHEN existia AND saldo_antes > 0 AND vencimento < :dia_anterior
+                         THEN saldo_antes ELSE 0 END),
+        TOTAL(CASE WHEN saldo_depois > 0 AND vencimento < :dia THEN 1 ELSE 0 END)
+            - TOTAL(CASE WHEN existia AND saldo_antes > 0 AND vencimento < :dia_anterior THEN 1 ELSE 0 END),
+        TOTAL(CASE WHEN saldo_depois > 0 THEN 1 ELSE 0 END)
+            - TOTAL(CASE WHEN existia AND saldo_antes > 0 THEN 1 ELSE 0 END)
+    FROM estado
+"""
+
+_SQL_RECEBIDO_NO_DIA = """
+    SELECT TOTAL(valor) FROM pagamentos WHERE data >= :dia AND data < :dia_seguinte
+"""
+
+_SQL_GRAVAR = f"""
+    INSERT OR REPLACE INTO snapshots_carteira (data, {', '.join(CAMPOS_SNAPSHOT)})
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def dias_pendentes(conn, hoje: date = None, refazer_desde: Optional[str] = None) -> List[date]:
+    """
+    Dias a gravar, do último registrado até hoje
+
+    O último dia já gravado volta na lista (pode ter sido gravado no meio do
+    dia); os anteriores só são recalculados a partir de refazer_desde (ver
+    pendencias_refazer), limitado ao snapshot mais antigo. Sem nenhum
+    snapshot, o período começa DIAS_HISTORICO_INICIAL dias atrás (ou no
+    primeiro empréstimo).
+    """
+    hoje = hoje or date.today()
+    primeiro_gravado, ultimo = conn.execute(
+        "SELECT MIN(data), MAX(data) FROM snapshots_carteira").fetchone()
+    if ultimo is not None:
+        inicio = date.fromisoformat(ultimo)
+    else:
+        inicio = hoje - timedelta(days=DIAS_HISTORICO_INICIAL)
+        primeiro = conn.execute("SELECT MIN(substr(data_emprestimo, 1, 10)) FROM emprestimos").fetchone()[0]
+        try:
+            inicio = max(inicio, date.fromisoformat(primeiro)) if primeiro else hoje
+        except ValueError:
+            pass
+    inicio = max(min(inicio, hoje), hoje - timedelta(days=DIAS_HISTORICO_INICIAL))
+    if refazer_desde and primeiro_gravado is not None:
+        try:
+            # O primeiro dia refeito sem véspera gravada sai do estado completo
+            inicio = min(inicio, max(date.fromisoformat(refazer_desde), date.fromisoformat(primeiro_gravado)))
+        except ValueError:
+            pass
+    return [inicio + timedelta(days=i) for i in range((hoje - inicio).days + 1)]
+
+
+def pendencias_refazer(conn) -> tuple:
+    """
+    Anotações de snapshots desatualizados
+
+    Returns:
+        (dia mais antigo a refazer ou None, seq da última anotação lida)
+    """
+    return tuple(conn.execute(
+        "SELECT MIN(dia), COALESCE(MAX(seq), 0) FROM snapshots_refazer").fetchone())
+
+
+def concluir_refazer(conn, ate_seq: int):
+    """Descarta as anotações já refeitas (as feitas durante a gravação ficam)"""
+    conn.execute("DELETE FROM snapshots_refazer WHERE seq <= ?", (ate_seq,))
+
+
+def gravar_snapshot(conn, dia: date):
+    """
+    Calcula e grava o snapshot de um dia (sem abrir nem fechar transação)
+
+    Com o snapshot da véspera gravado, parte dele e aplica só a variação do
+    dia; sem ele (primeiro dia do histórico), calcula a carteira inteira.
+    """
+    params = {
+        'dia': dia.isoformat(),
+        'dia_seguinte': (dia + timedelta(days=1)).isoformat(),
+        'dia_anterior': (dia - timedelta(days=1)).isoformat(),
+    }
+    vespera = conn.execute(f"""
+        SELECT total_emprestado, saldo_devedor, valor_atrasado, qtd_atrasados, emprestimos_ativos
+        FROM snapshots_carteira WHERE data = ?
+    """, (params['dia_anterior'],)).fetchone()
+    if vespera is None:
+        valores = conn.execute(_SQL_ESTADO_NO_DIA, params).fetchone()
+    else:
+        variacao = conn.execute(_SQL_VARIACAO_NO_DIA, params).fetchone()
+        valores = [anterior + delta for anterior, delta in zip(vespera, variacao)]
+    emprestado, saldo, atrasado, qtd_atrasados, ativos = valores
+    recebido = conn.execute(_SQL_RECEBIDO_NO_DIA, params).fetchone()[0]
+    conn.execute(_SQL_GRAVAR, (params['dia'], emprestado, saldo, atrasado, int(qtd_atrasados),
+                               recebido, int(ativos)))
+
+
+def historico(conn, desde: str = None) -> List[dict]:
+    """Snapshots em ordem de data (desde = YYYY-MM-DD inclusivo; None = todos)"""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(f"""
+        SELECT data, {', '.join(CAMPOS_SNAPSHOT)} FROM snapshots_carteira
+        WHERE data >= ? ORDER BY data
+    """, (desde or "",))
+    return [dict(zip(('data',) + CAMPOS_SNAPSHOT, row)) for row in cursor]
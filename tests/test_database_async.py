@@ -0,0 +1,40 @@
+"""
+Testes da primeira carga do cache fora da thread da interface
+"""
+import asyncio
+import threading
+
+from models.database_sqlite import DatabaseSQLite
+from models.database_async import AsyncDatabase
+
+
+def test_tela_de_login_nao_carrega_a_carteira(tmp_path):
+    db = DatabaseSQLite(tmp_path / 'financepro.db', intervalo_flush=None)
+    try:
+        assert db.usuarios == []
+        assert db.lembretes == []
+        assert not db._cache_valido
+    finally:
+        db.fechar()
+
+
+def test_primeira_carga_roda_no_executor(tmp_path):
+    db = DatabaseSQLite(tmp_path / 'financepro.db', intervalo_flush=None)
+    db_async = AsyncDatabase(db)
+    threads = []
+    carregar_cache = db._carregar_cache
+    
+    def carregar_registrando():
+        threads.append(threading.current_thread().name)
+        carregar_cache()
+    
+    db._carregar_cache = carregar_registrando
+    try:
+        db.usuarios
+        asyncio.run(db_async.carregar())
+        assert db._cache_valido
+        assert len(threads) == 1
+        assert threads[0].startswith('financepro-db')
+    finally:
+        db_async.fechar()
+        db.fechar()
@@ -0,0 +1,72 @@
+"""
+Testes da migração JSON → SQLite
+"""
+import json
+import sqlite3
+
+from utils.json_migrator import JSONMigrator
+
+
+def _escrever(diretorio, nome, dados):
+    with open(diretorio / nome, 'w', encoding='utf-8') as f:
+        json.dump(dados, f)
+
+
+def _clientes():
+    return [{
+        'id': 'c1', 'nome': 'Maria', 'cpf_cnpj': '12345678900',
+        'telefone': '11999990000', 'email': 'maria@exemplo.com',
+        'endereco': '', 'data_cadastro': '2024-01-02T10:00:00'
+    }]
+
+
+def _emprestimo(id, **extra):
+    dados = {
+        'id': id, 'cliente_id': 'c1', 'valor_emprestado': 1000.0,
+        'taxa_juros': 0.05, 'data_emprestimo': '2024-01-10',
+        'prazo_meses': 3, 'data_vencimento': '2024-04-09',
+        'valor_total': 1150.0, 'saldo_devedor': 900.0, 'ativo': True,
+        'observacoes': '', 'metodo_calculo': 'simples',
+        'pagamentos': [{'valor': 250.0, 'data': '2024-02-10', 'observacao': ''}],
+    }
+    dados.update(extra)
+    return dados
+
+
+def _emprestimos_no_banco(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return {row[0]: row[1:] for row in conn.execute(
+            "SELECT id, prazo_meses, taxa_juros, saldo_devedor FROM emprestimos")}
+    finally:
+        conn.close()
+
+
+def test_emprestimos_chegam_ao_banco(tmp_path):
+    _escrever(tmp_path, 'clientes.json', _clientes())
+    legado = _emprestimo('e2')
+    del legado['prazo_meses']
+    _escrever(tmp_path, 'emprestimos.json', [_emprestimo('e1'), legado])
+    
+    caminho = tmp_path / 'financepro.db'
+    assert JSONMigrator(tmp_path, caminho).migrar()
+    
+    emprestimos = _emprestimos_no_banco(caminho)
+    assert set(emprestimos) == {'e1', 'e2'}
+    prazo, taxa, saldo = emprestimos['e1']
+    assert prazo == 3
+    assert taxa == 0.05
+    assert saldo == 900.0
+    # JSON antigo sem prazo_meses: derivado do vencimento
+    assert emprestimos['e2'][0] == 3
+
+
+def test_emprestimo_rejeitado_falha_a_migracao(tmp_path):
+    _escrever(tmp_path, 'clientes.json', _clientes())
+    _escrever(tmp_path, 'emprestimos.json', [_emprestimo('e1'), _emprestimo('e3', cliente_id=None)])
+    
+    caminho = tmp_path / 'financepro.db'
+    migrator = JSONMigrator(tmp_path, caminho)
+    assert not migrator.migrar()
+    assert migrator.emprestimos_rejeitados == 1
+    assert set(_emprestimos_no_banco(caminho)) == {'e1'}
@@ -0,0 +1,57 @@
+"""
+Testes da poda do log_alteracoes durante a sessão
+"""
+from models import log_alteracoes
+from models.database_sqlite import DatabaseSQLite
+from models.log_alteracoes import ultimo_seq
+
+
+def _anotar(db, quantidade):
+    with db.pool.conexao() as conn:
+        conn.executemany(
+            "INSERT INTO log_alteracoes (tabela, registro_id) VALUES ('clientes', ?)",
+            [(f'C{i}',) for i in range(quantidade)]
+        )
+        conn.commit()
+
+
+def _contar(db):
+    with db.pool.conexao() as conn:
+        return conn.execute("SELECT COUNT(*) FROM log_alteracoes").fetchone()[0]
+
+
+def test_poda_mantem_as_entradas_recentes(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_alteracoes, 'MAX_ENTRADAS_LOG', 50)
+    monkeypatch.setattr(log_alteracoes, 'FOLGA_PODA', 10)
+    db = DatabaseSQLite(tmp_path / 'financepro.db', intervalo_flush=None)
+    try:
+        _anotar(db, 55)
+        db.verificar_alteracoes_externas()
+        # Excedente abaixo da folga: nada a fazer
+        assert db.podar_log_alteracoes() == 0
+        
+        _anotar(db, 20)
+        db.verificar_alteracoes_externas()
+        assert db.podar_log_alteracoes() == 25
+        assert _contar(db) == 50
+    finally:
+        db.fechar()
+
+
+def test_poda_nao_descarta_o_que_nao_foi_lido(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_alteracoes, 'MAX_ENTRADAS_LOG', 50)
+    monkeypatch.setattr(log_alteracoes, 'FOLGA_PODA', 10)
+    db = DatabaseSQLite(tmp_path / 'financepro.db', intervalo_flush=None)
+    try:
+        _anotar(db, 20)
+        db.verificar_alteracoes_externas()
+        lido = db._seq_visto
+        _anotar(db, 100)
+        
+        db.podar_log_alteracoes()
+        with db.pool.conexao() as conn:
+            menor = conn.execute("SELECT MIN(seq) FROM log_alteracoes").fetchone()[0]
+            assert ultimo_seq(conn) - menor + 1 == 100
+        assert menor == lido + 1
+    finally:
+        db.fechar()
@@ -0,0 +1,48 @@
+"""
+Testes das migrações de esquema
+"""
+import sqlite3
+
+from models import migracoes
+from models.database_sqlite import DatabaseSQLite
+from models.cliente import Cliente
+from models.emprestimo import Emprestimo
+
+
+def test_data_criacao_preenchida_em_lotes(tmp_path, monkeypatch):
+    caminho = tmp_path / 'financepro.db'
+    db = DatabaseSQLite(caminho, intervalo_flush=None)
+    cliente = Cliente('Maria', '12345678900', '11999990000', 'maria@exemplo.com', '')
+    db.adicionar_cliente(cliente)
+    for dia in range(1, 6):
+        db.adicionar_emprestimo(Emprestimo(cliente.id, 100.0 * dia, 5, f'2024-01-0{dia}', 3))
+    db.salvar_dados()
+    db.fechar()
+    
+    # Banco como estava antes da migração 8
+    conn = sqlite3.connect(caminho)
+    conn.execute("ALTER TABLE emprestimos DROP COLUMN data_criacao")
+    conn.execute("PRAGMA user_version = 7")
+    conn.commit()
+    conn.close()
+    
+    preenchidos = []
+    preencher = migracoes.preencher_em_lotes
+    
+    def preencher_contando(conn, *args, **kwargs):
+        kwargs['tamanho'] = 2
+        total = preencher(conn, *args, **kwargs)
+        preenchidos.append(total)
+        return total
+    
+    monkeypatch.setattr(migracoes, 'preencher_em_lotes', preencher_contando)
+    DatabaseSQLite(caminho, intervalo_flush=None).fechar()
+    
+    conn = sqlite3.connect(caminho)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] >= 8
+        linhas = conn.execute("SELECT data_emprestimo, data_criacao FROM emprestimos").fetchall()
+    finally:
+        conn.close()
+    assert preenchidos == [5]
+    assert all(criacao == emprestimo for emprestimo, criacao in linhas)
@@ -0,0 +1,33 @@
+"""
+Testes dos filtros de DatabaseSQLite.resumo
+"""
+from models.database_sqlite import DatabaseSQLite
+from models.cliente import Cliente
+from models.emprestimo import Emprestimo
+
+
+def test_filtro_de_datas_usa_data_de_criacao(tmp_path):
+    db = DatabaseSQLite(tmp_path / 'financepro.db', intervalo_flush=None)
+    try:
+        cliente = Cliente('Maria', '12345678900', '11999990000', 'maria@exemplo.com', '')
+        db.adicionar_cliente(cliente)
+        
+        # Lançado em março com data de empréstimo retroativa (janeiro)
+        retroativo = Emprestimo(cliente.id, 1000.0, 5, '2024-01-10', 3)
+        retroativo.data_criacao = '2024-03-05T09:30:00'
+        db.adicionar_emprestimo(retroativo)
+        
+        # Lançado em janeiro, no dia do empréstimo
+        em_dia = Emprestimo(cliente.id, 500.0, 5, '2024-01-20', 3)
+        em_dia.data_criacao = '2024-01-20T14:00:00'
+        db.adicionar_emprestimo(em_dia)
+        
+        marco = db.resumo({'data_inicio': '2024-03-01', 'data_fim': '2024-03-05'})
+        assert marco.total_emprestimos == 1
+        assert marco.total_emprestado == 1000.0
+        
+        janeiro = db.resumo({'data_inicio': '2024-01-01', 'data_fim': '2024-01-31'})
+        assert janeiro.total_emprestimos == 1
+        assert janeiro.total_emprestado == 500.0
+    finally:
+        db.fechar()
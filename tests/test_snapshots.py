@@ -0,0 +1,92 @@
+"""
+Testes dos snapshots diários da carteira com lançamentos retroativos
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from models.database_sqlite import DatabaseSQLite
+from models.cliente import Cliente
+from models.emprestimo import Emprestimo
+from models.snapshots import CAMPOS_SNAPSHOT, _SQL_ESTADO_NO_DIA
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseSQLite(tmp_path / 'financepro.db', intervalo_flush=None)
+    yield db
+    db.fechar()
+
+
+def _dia(dias_atras: int) -> str:
+    return (date.today() - timedelta(days=dias_atras)).isoformat()
+
+
+def _novo_emprestimo(db, cliente, valor, dias_atras, prazo_meses=3):
+    emprestimo = Emprestimo(cliente.id, valor, 5, _dia(dias_atras), prazo_meses)
+    db.adicionar_emprestimo(emprestimo)
+    return emprestimo
+
+
+def _conferir_com_estado_completo(db):
+    """Cada dia gravado deve bater com o estado calculado do zero"""
+    with db.pool.conexao() as conn:
+        snapshots = db.historico_carteira(dias=400)
+        assert snapshots
+        for snapshot in snapshots:
+            dia = date.fromisoformat(snapshot['data'])
+            esperado = conn.execute(_SQL_ESTADO_NO_DIA, {
+                'dia': dia.isoformat(),
+                'dia_seguinte': (dia + timedelta(days=1)).isoformat(),
+            }).fetchone()
+            obtido = [snapshot[campo] for campo in CAMPOS_SNAPSHOT if campo != 'recebido_dia']
+            assert obtido == pytest.approx(list(esperado)), snapshot['data']
+
+
+@pytest.fixture
+def cliente(db):
+    cliente = Cliente('Maria', '12345678900', '11999990000', 'maria@exemplo.com', '')
+    db.adicionar_cliente(cliente)
+    return cliente
+
+
+def test_emprestimo_retroativo_entra_nos_totais(db, cliente):
+    _novo_emprestimo(db, cliente, 1000.0, 40)
+    db.registrar_snapshots()
+    
+    # Lançado hoje com data de 20 dias atrás
+    _novo_emprestimo(db, cliente, 500.0, 20)
+    db.registrar_snapshots()
+    
+    hoje = db.historico_carteira()[-1]
+    assert hoje['total_emprestado'] == pytest.approx(1500.0)
+    _conferir_com_estado_completo(db)
+
+
+def test_pagamento_retroativo_reduz_o_saldo(db, cliente):
+    emprestimo = _novo_emprestimo(db, cliente, 1000.0, 40)
+    db.registrar_snapshots()
+    saldo_antes = db.historico_carteira()[-1]['saldo_devedor']
+    
+    # Pagamento digitado hoje com a data em que foi recebido
+    db.registrar_pagamento(emprestimo, 300.0, data=_dia(10))
+    db.registrar_snapshots()
+    
+    snapshots = {s['data']: s for s in db.historico_carteira()}
+    assert snapshots[_dia(0)]['saldo_devedor'] == pytest.approx(saldo_antes - 300.0)
+    assert snapshots[_dia(10)]['recebido_dia'] == pytest.approx(300.0)
+    _conferir_com_estado_completo(db)
+
+
+def test_edicao_e_remocao_refazem_os_dias(db, cliente):
+    _novo_emprestimo(db, cliente, 1000.0, 60, prazo_meses=1)
+    outro = _novo_emprestimo(db, cliente, 200.0, 30)
+    db.registrar_snapshots()
+    
+    db.remover_emprestimo(outro)
+    db.registrar_snapshots()
+    assert db.historico_carteira()[-1]['total_emprestado'] == pytest.approx(1000.0)
+    _conferir_com_estado_completo(db)
+    
+    with db.pool.conexao() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM snapshots_refazer").fetchone()[0] == 0
@@ -0,0 +1,174 @@
+"""
+Tabela de amortização (cronograma de parcelas)
+Gera, para cada método de cálculo, as parcelas com vencimento, amortização,
+juros e saldo; os totais do empréstimo (valor total, parcela) saem das
+mesmas regras, então tabela e Emprestimo.calcular_valores sempre batem
+"""
+from collections import namedtuple
+from collections.abc import Sequence
+from datetime import date
+
+from utils.calculos import calcular_juros_compostos, calcular_juros_simples, calcular_parcela_fixa
+
+# Vencimento de cada parcela: mesma aproximação de Emprestimo (30 dias por mês)
+DIAS_POR_PARCELA = 30
+
+METODOS = ('compostos', 'simples', 'price', 'sac')
+
+# Empréstimos antigos sem método gravado foram calculados com juros compostos
+METODO_PADRAO = 'compostos'
+
+
+class Parcela(namedtuple('Parcela', 'numero vencimento_ordinal valor amortizacao juros saldo paga')):
+    """
+    Uma linha do cronograma
+
+    numero começa em 1; saldo é o principal que falta amortizar depois da
+    parcela; paga indica se a parcela já foi coberta pelos pagamentos.
+    """
+    __slots__ = ()
+
+    @property
+    def vencimento(self) -> date:
+        return date.fromordinal(self.vencimento_ordinal)
+
+
+def _normalizar_metodo(metodo: str) -> str:
+    if not metodo:
+        return METODO_PADRAO
+    if metodo not in METODOS:
+        raise ValueError(f"Método de cálculo inválido: {metodo!r} (use {', '.join(METODOS)})")
+    return metodo
+
+
+def totais(metodo: str, capital: float, taxa: float, prazo: int) -> tuple:
+    """
+    Valor total a pagar e valor da (primeira) parcela, sem montar a tabela
+
+    Args:
+        metodo: 'compostos', 'simples', 'price' ou 'sac' (vazio = compostos)
+        capital: Valor emprestado
+        taxa: Taxa mensal em decimal (0.05 = 5%)
+        prazo: Número de parcelas
+
+    Returns:
+        Tupla (valor_total, valor_parcela); no SAC a parcela é a primeira (a maior)
+    """
+    metodo = _normalizar_metodo(metodo)
+    if metodo == 'compostos':
+        total = calcular_juros_compostos(capital, taxa, prazo)
+        return total, total / prazo
+    if metodo == 'simples':
+        total = calcular_juros_simples(capital, taxa, prazo)
+        return total, total / prazo
+    if metodo == 'price':
+        parcela = calcular_parcela_fixa(capital, taxa, prazo)
+        return parcela * prazo, parcela
+    # SAC: amortização constante, juros sobre o saldo (soma de progressão aritmética)
+    amortizacao = capital / prazo
+    return capital + capital * taxa * (prazo + 1) / 2, amortizacao + capital * taxa
+
+
+class Cronograma(Sequence):
+    """
+    Tabela de parcelas de um empréstimo, calculada sob demanda
+
+    Criar o cronograma só guarda os parâmetros (O(1)); cada linha sai de uma
+    fórmula fechada para o saldo antes da parcela, então cronograma[k] e
+    proxima_parcela() não percorrem a tabela. Percorrer a tabela inteira
+    monta as linhas uma vez e as guarda.
+    """
+    __slots__ = ('metodo', 'capital', 'taxa', 'prazo', 'inicio_ordinal', 'parcelas_pagas',
+                 'valor_parcela', 'valor_total', '_amortizacao', '_linhas')
+
+    def __init__(self, metodo: str, capital: float, taxa: float, prazo: int,
+                 inicio_ordinal: int, parcelas_pagas: int = 0):
+        self.metodo = _normalizar_metodo(metodo)
+        self.capital = capital
+        self.taxa = taxa
+        self.prazo = max(int(prazo), 0)
+        self.inicio_ordinal = inicio_ordinal
+        self.parcelas_pagas = parcelas_pagas
+        self.valor_total, self.valor_parcela = totais(self.metodo, capital, taxa, self.prazo) if self.prazo else (0.0, 0.0)
+        self._amortizacao = capital / self.prazo if self.prazo else 0.0
+        self._linhas = None
+
+    def __len__(self):
+        return self.prazo
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(self.prazo))]
+        if self._linhas is not None:
+            return self._linhas[indice]
+        if indice < 0:
+            indice += self.prazo
+        if not 0 <= indice < self.prazo:
+            raise IndexError("parcela fora do cronograma")
+        return self._linha(indice + 1)
+
+    def __iter__(self):
+        if self._linhas is None:
+            self._linhas = [self._linha(numero) for numero in range(1, self.prazo + 1)]
+        return iter(self._linhas)
+
+    def _saldo_antes(self, numero: int) -> float:
+        """Principal em aberto antes da parcela `numero`"""
+        pagas = numero - 1
+        if self.metodo != 'price':
+            # Demais métodos amortizam o principal em partes iguais
+            return self.capital - self._amortizacao * pagas
+        if self.taxa == 0:
+            return self.capital - self.valor_parcela * pagas
+        fator = (1 + self.taxa) ** pagas
+        return self.capital * fator - self.valor_parcela * (fator - 1) / self.taxa
+
+    def _linha(self, numero: int) -> Parcela:
+        saldo = self._saldo_antes(numero)
+        if self.metodo in ('compostos', 'simples'):
+            valor = self.valor_parcela
+            amortizacao = self._amortizacao
+            juros = valor - amortizacao
+        elif self.metodo == 'price':
+            valor = self.valor_parcela
+            juros = saldo * self.taxa
+            amortizacao = valor - juros
+        else:
+            amortizacao = self._amortizacao
+            juros = saldo * self.taxa
+            valor = amortizacao + juros
+        # Resíduo de ponto flutuante: a última parcela zera o saldo
+        saldo = saldo - amortizacao if numero < self.prazo else 0.0
+        return tuple.__new__(Parcela, (numero, self.inicio_ordinal + DIAS_POR_PARCELA * numero, valor,
+                                       amortizacao, juros, saldo, numero <= self.parcelas_pagas))
+
+    def proxima_parcela(self):
+        """Primeira parcela ainda não paga (None se todas estão pagas)"""
+        if self.parcelas_pagas >= self.prazo:
+            return None
+        return self[self.parcelas_pagas]
+
+    @property
+    def total_juros(self) -> float:
+        return self.valor_total - self.capital
+
+
+def gerar_cronograma(metodo: str, capital: float, taxa: float, prazo: int,
+                     inicio_ordinal: int, parcelas_pagas: int = 0) -> Cronograma:
+    """
+    Cronograma de parcelas do empréstimo
+
+    Nos métodos de montante (compostos e simples) as parcelas são iguais e
+    amortizam o principal em partes iguais; o restante de cada parcela é juro.
+    Price tem parcela fixa com juros sobre o saldo; SAC amortização fixa com
+    juros sobre o saldo.
+
+    Args:
+        metodo, capital, taxa, prazo: Como em totais()
+        inicio_ordinal: Data do empréstimo como date.toordinal()
+        parcelas_pagas: Quantas parcelas (da primeira em diante) estão pagas
+
+    Returns:
+        Cronograma (sequência de Parcela, da primeira à última)
+    """
+    return Cronograma(metodo, capital, taxa, prazo, inicio_ordinal, parcelas_pagas)
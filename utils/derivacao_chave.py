@@ -0,0 +1,106 @@
+"""
+Derivação de chaves (PBKDF2) com cache da sessão
+Cada par (senha, salt) é derivado uma única vez por processo; verificação da
+senha mestra, CryptoManager e bancos reabertos (migração, backup) recebem a
+mesma chave sem repetir as 100 mil iterações
+"""
+import hashlib
+import hmac
+import os
+import threading
+import time
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+ITERACOES_PBKDF2 = 100000
+TAMANHO_CHAVE = 32
+
+# Segredo aleatório do processo: o cache é indexado por HMAC da senha, nunca
+# pela senha em si (e o índice não serve para nada fora deste processo)
+_segredo_processo = os.urandom(32)
+
+_chaves = {}
+_lock = threading.Lock()
+
+# Sessão: sem limite por padrão; com duração, chaves não usadas há mais de
+# N segundos são descartadas e a próxima abertura deriva de novo
+_duracao_sessao: Optional[float] = None
+
+
+def _chave_cache(senha: str, salt: bytes, iteracoes: int, tamanho: int) -> tuple:
+    digest = hmac.new(_segredo_processo, senha.encode(), hashlib.sha256).digest()
+    return (digest, bytes(salt), iteracoes, tamanho)
+
+
+def derivar_chave(senha: str, salt: bytes, iteracoes: int = ITERACOES_PBKDF2,
+                  tamanho: int = TAMANHO_CHAVE) -> bytes:
+    """
+    PBKDF2-HMAC-SHA256 da senha, calculado só na primeira vez do processo
+
+    Args:
+        senha: Senha em texto plano
+        salt: Salt da derivação
+        iteracoes: Iterações do PBKDF2
+        tamanho: Tamanho da chave em bytes
+
+    Returns:
+        Chave derivada (mesmo resultado de hashlib.pbkdf2_hmac)
+    """
+    chave = _chave_cache(senha, salt, iteracoes, tamanho)
+    agora = time.monotonic()
+    with _lock:
+        _expirar(agora)
+        guardada = _chaves.get(chave)
+        if guardada is not None:
+            _chaves[chave] = (guardada[0], agora)
+            return guardada[0]
+
+    # Derivação fora do lock: outras threads não ficam presas atrás dela
+    inicio = time.perf_counter()
+    derivada = hashlib.pbkdf2_hmac('sha256', senha.encode(), salt, iteracoes, tamanho)
+    logger.debug(f"Chave derivada em {time.perf_counter() - inicio:.3f}s")
+
+    with _lock:
+        _chaves[chave] = (derivada, agora)
+    return derivada
+
+
+def _expirar(agora: float):
+    """Remove chaves paradas há mais que a duração da sessão (chamar com _lock)"""
+    if _duracao_sessao is None:
+        return
+    vencidas = [c for c, (_, uso) in _chaves.items() if agora - uso > _duracao_sessao]
+    for c in vencidas:
+        del _chaves[c]
+
+
+def definir_duracao_sessao(segundos: Optional[float]):
+    """
+    Define por quanto tempo uma chave sem uso continua desbloqueada
+
+    Args:
+        segundos: Duração em segundos (None = até bloquear_sessao ou o fim do processo)
+    """
+    global _duracao_sessao
+    with _lock:
+        _duracao_sessao = segundos
+
+
+def sessao_desbloqueada(senha: str, salt: bytes, iteracoes: int = ITERACOES_PBKDF2,
+                        tamanho: int = TAMANHO_CHAVE) -> bool:
+    """Verifica se a chave deste par (senha, salt) já está em memória"""
+    chave = _chave_cache(senha, salt, iteracoes, tamanho)
+    with _lock:
+        _expirar(time.monotonic())
+        return chave in _chaves
+
+
+def bloquear_sessao():
+    """Descarta todas as chaves derivadas (logout ou encerramento)"""
+    with _lock:
+        quantidade = len(_chaves)
+        _chaves.clear()
+    if quantidade:
+        logger.info(f"Sessão bloqueada: {quantidade} chave(s) descartada(s)")
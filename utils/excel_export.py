@@ -156,16 +156,17 @@ def _criar_aba_resumo(wb, database):
     EstiloExcel.aplicar_header(cell)
     row += 1
     
-    # Calcular métricas
-    total_clientes = len(database.clientes)
-    total_emprestimos = len(database.emprestimos)
-    emprestimos_ativos = len([e for e in database.emprestimos if e.ativo])
-    emprestimos_quitados = len([e for e in database.emprestimos if not e.ativo])
-    
-    valor_total_emprestado = sum(e.valor_emprestado for e in database.emprestimos)
-    valor_total_receber = sum(e.saldo_devedor for e in database.emprestimos)
+    # Calcular métricas (agregadas no banco)
+    resumo = database.resumo()
+    total_clientes = resumo.total_clientes
+    total_emprestimos = resumo.total_emprestimos
+    emprestimos_ativos = resumo.total_emprestimos - resumo.quitados
+    emprestimos_quitados = resumo.quitados
+    
+    valor_total_emprestado = resumo.total_emprestado
+    valor_total_receber = resumo.saldo_devedor
     valor_total_recebido = valor_total_emprestado - valor_total_receber
-    total_juros = sum(e.total_juros for e in database.emprestimos)
+    total_juros = resumo.total_juros
     
     # Dados
     dados_resumo = [
@@ -216,13 +217,15 @@ def _criar_aba_clientes(wb, database):
     
     ws.row_dimensions[1].height = 20
     
-    # Dados
-    for row, cliente in enumerate(database.clientes, 2):
+    # Dados (campos criptografados decifrados num único lote)
+    clientes = database.clientes
+    sensiveis = database.dados_sensiveis_clientes(clientes)
+    for row, (cliente, (cpf_cnpj, telefone, email)) in enumerate(zip(clientes, sensiveis), 2):
         ws.cell(row, 1).value = cliente.id
         ws.cell(row, 2).value = cliente.nome
-        ws.cell(row, 3).value = cliente.cpf_cnpj
-        ws.cell(row, 4).value = cliente.email
-        ws.cell(row, 5).value = cliente.telefone
+        ws.cell(row, 3).value = cpf_cnpj
+        ws.cell(row, 4).value = email
+        ws.cell(row, 5).value = telefone
         ws.cell(row, 6).value = cliente.endereco
         ws.cell(row, 7).value = cliente.chave_pix
         ws.cell(row, 8).value = formatar_data_br(cliente.data_cadastro)
@@ -264,7 +267,7 @@ def _criar_aba_emprestimos(wb, database):
         cliente = database.get_cliente_por_id(emprestimo.cliente_id)
         cliente_nome = cliente.nome if cliente else "N/A"
         
-        total_pago = emprestimo.valor_total - emprestimo.saldo_devedor
+        total_pago = emprestimo.total_pago
         percentual_pago = (total_pago / emprestimo.valor_total * 100) if emprestimo.valor_total > 0 else 0
         
         status = "Quitado" if emprestimo.saldo_devedor <= 0 else "Ativo"
@@ -393,7 +396,7 @@ def exportar_apenas_emprestimos(database, caminho_saida=None):
         cliente = database.get_cliente_por_id(emprestimo.cliente_id)
         cliente_nome = cliente.nome if cliente else "N/A"
         
-        total_pago = emprestimo.valor_total - emprestimo.saldo_devedor
+        total_pago = emprestimo.total_pago
         percentual_pago = (total_pago / emprestimo.valor_total * 100) if emprestimo.valor_total > 0 else 0
         proxima_parcela = emprestimo.get_proxima_parcela() or "-"
         status = "Quitado" if emprestimo.saldo_devedor <= 0 else "Ativo"
@@ -3,6 +3,7 @@ Script de Migração: JSON → SQLite
 Converte dados existentes do formato JSON para SQLite com segurança
 """
 import json
+import sqlite3
 from pathlib import Path
 from datetime import datetime
 import logging
@@ -11,10 +12,15 @@ from models.database_sqlite import DatabaseSQLite
 from models.cliente import Cliente
 from models.emprestimo import Emprestimo
 from models.usuario import Usuario
+from models.pagamento import Pagamento
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Colunas NOT NULL: registro do JSON sem algum destes campos é rejeitado antes do lote
+CAMPOS_OBRIGATORIOS_CLIENTE = ('id', 'nome', 'cpf_cnpj', 'telefone', 'email', 'data_cadastro')
+CAMPOS_OBRIGATORIOS_EMPRESTIMO = ('id', 'cliente_id', 'data_emprestimo', 'prazo_meses', 'data_vencimento')
+
 
 class JSONMigrator:
     """Migra dados de JSON para SQLite"""
@@ -29,6 +35,7 @@ class JSONMigrator:
         self.json_dir = json_dir
         self.sqlite_path = sqlite_path
         self.senha_mestra = senha_mestra
+        self.emprestimos_rejeitados = 0
     
     def migrar(self) -> bool:
         """
@@ -61,6 +68,12 @@ class JSONMigrator:
             usuarios_migrados = self._migrar_usuarios(db)
             logger.info(f"✓ {usuarios_migrados} usuários migrados")
             
+            db.fechar()
+            
+            if self.emprestimos_rejeitados:
+                logger.error(f"{self.emprestimos_rejeitados} empréstimos não foram migrados (detalhes acima)")
+                return False
+            
             logger.info("=" * 60)
             logger.info("MIGRAÇÃO CONCLUÍDA COM SUCESSO!")
             logger.info("=" * 60)
@@ -101,7 +114,7 @@ class JSONMigrator:
         with open(json_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
-        count = 0
+        clientes = []
         for cliente_data in data:
             try:
                 cliente = Cliente(
@@ -113,13 +126,17 @@ class JSONMigrator:
                 )
                 cliente.id = cliente_data['id']
                 cliente.data_cadastro = cliente_data.get('data_cadastro', datetime.now().isoformat())
-                
-                db.adicionar_cliente(cliente)
-                count += 1
+                self._validar(cliente, CAMPOS_OBRIGATORIOS_CLIENTE)
+                clientes.append(cliente)
             except Exception as e:
                 logger.error(f"Erro ao migrar cliente {cliente_data.get('nome')}: {e}")
         
-        return count
+        # Uma única transação para todos os clientes; roda na inicialização,
+        # então sem pool de processos para cifrar
+        return self._inserir_em_lote(
+            lambda lote: db.adicionar_clientes_em_lote(lote, workers=1),
+            self._sem_repetidos(clientes, "cliente"), "cliente"
+        )
     
     def _migrar_emprestimos(self, db: DatabaseSQLite) -> int:
         """Migra empréstimos do JSON"""
@@ -131,34 +148,100 @@ class JSONMigrator:
         with open(json_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
-        count = 0
+        emprestimos = []
         for emp_data in data:
             try:
+                data_emprestimo = emp_data.get('data_emprestimo', emp_data.get('data_inicio'))
                 emprestimo = Emprestimo(
                     cliente_id=emp_data['cliente_id'],
                     valor_emprestado=float(emp_data['valor_emprestado']),
-                    taxa_juros=float(emp_data['taxa_juros']),
-                    data_emprestimo=emp_data['data_emprestimo'],
+                    # No JSON a taxa está em decimal; o construtor espera percentual
+                    taxa_juros=float(emp_data['taxa_juros']) * 100,
+                    data_emprestimo=data_emprestimo,
+                    prazo_meses=emp_data.get('prazo_meses') or self._prazo_legado(data_emprestimo, emp_data['data_vencimento']),
                     data_vencimento=emp_data['data_vencimento'],
                     metodo_calculo=emp_data.get('metodo_calculo', 'simples')
                 )
                 emprestimo.id = emp_data['id']
+                emprestimo.data_criacao = emp_data.get('data_criacao') or data_emprestimo
                 emprestimo.valor_total = float(emp_data['valor_total'])
                 emprestimo.saldo_devedor = float(emp_data['saldo_devedor'])
                 emprestimo.ativo = emp_data.get('ativo', True)
                 emprestimo.observacoes = emp_data.get('observacoes', '')
-                emprestimo.pagamentos = emp_data.get('pagamentos', [])
-                
-                db.adicionar_emprestimo(emprestimo)
-                
-                # Atualizar pagamentos
-                if emprestimo.pagamentos:
-                    db.atualizar_emprestimo(emprestimo)
-                
-                count += 1
+                emprestimo.pagamentos = [Pagamento.de_dict(pag) for pag in emp_data.get('pagamentos', [])]
+                self._validar(emprestimo, CAMPOS_OBRIGATORIOS_EMPRESTIMO)
+                for pag in emprestimo.pagamentos:
+                    self._validar(pag, ('valor', 'data'))
+                emprestimos.append(emprestimo)
             except Exception as e:
                 logger.error(f"Erro ao migrar empréstimo {emp_data.get('id')}: {e}")
         
+        # Empréstimos e o histórico de pagamentos numa única transação
+        migrados = self._inserir_em_lote(
+            db.adicionar_emprestimos_em_lote,
+            self._sem_repetidos(emprestimos, "empréstimo"), "empréstimo"
+        )
+        self.emprestimos_rejeitados = len(data) - migrados
+        return migrados
+    
+    @staticmethod
+    def _prazo_legado(data_emprestimo: str, data_vencimento: str) -> int:
+        """
+        Prazo de JSON antigo, gravado sem prazo_meses: meses de 30 dias entre
+        empréstimo e vencimento (inverso de Emprestimo._calcular_data_vencimento)
+        """
+        dias = (datetime.fromisoformat(data_vencimento[:10]) - datetime.fromisoformat(data_emprestimo[:10])).days
+        return max(1, round(dias / 30))
+    
+    @staticmethod
+    def _validar(registro, campos: tuple):
+        """Levanta ValueError se algum campo obrigatório estiver vazio"""
+        faltando = [campo for campo in campos
+                    if getattr(registro, campo) is None or (campo == 'id' and not registro.id)]
+        if faltando:
+            raise ValueError(f"campos obrigatórios vazios: {', '.join(faltando)}")
+    
+    @staticmethod
+    def _sem_repetidos(registros: list, descricao: str) -> list:
+        """Mantém o primeiro registro de cada id; os repetidos vão para o log"""
+        vistos = set()
+        unicos = []
+        for registro in registros:
+            if registro.id in vistos:
+                logger.error(f"Erro ao migrar {descricao} {registro.id}: id repetido no JSON")
+                continue
+            vistos.add(registro.id)
+            unicos.append(registro)
+        return unicos
+    
+    @staticmethod
+    def _inserir_em_lote(inserir, registros: list, descricao: str) -> int:
+        """
+        Insere todos numa transação; se o lote for recusado pelo banco, insere
+        um por um e registra no log só os rejeitados
+        
+        Args:
+            inserir: Função de carga em lote do banco (recebe uma lista)
+            registros: Registros já validados
+            descricao: Nome do registro para o log
+        
+        Returns:
+            Quantidade de registros gravados
+        """
+        if not registros:
+            return 0
+        try:
+            return inserir(registros)['linhas']
+        except sqlite3.Error as e:
+            logger.warning(f"Lote de {descricao}s recusado ({e}); inserindo um por um")
+        
+        count = 0
+        for registro in registros:
+            try:
+                inserir([registro])
+                count += 1
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao migrar {descricao} {registro.id}: {e}")
         return count
     
     def _migrar_usuarios(self, db: DatabaseSQLite) -> int:
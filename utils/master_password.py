@@ -4,11 +4,13 @@ Tela para configurar senha na primeira execução
 """
 import customtkinter as ctk
 from tkinter import messagebox
-import hashlib
+import hmac
 import os
 from pathlib import Path
 import logging
 
+from utils.derivacao_chave import derivar_chave
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,7 +41,7 @@ class MasterPasswordManager:
         salt = os.urandom(32)
         
         # Hash da senha com salt
-        pwd_hash = hashlib.pbkdf2_hmac('sha256', senha.encode(), salt, 100000)
+        pwd_hash = derivar_chave(senha, salt)
         
         # Salvar salt + hash
         with open(self.password_file, 'wb') as f:
@@ -67,11 +69,11 @@ class MasterPasswordManager:
         salt = data[:32]
         saved_hash = data[32:]
         
-        # Calcular hash da senha fornecida
-        pwd_hash = hashlib.pbkdf2_hmac('sha256', senha.encode(), salt, 100000)
+        # Calcular hash da senha fornecida (fica no cache da sessão)
+        pwd_hash = derivar_chave(senha, salt)
         
-        # Comparar
-        return pwd_hash == saved_hash
+        # Comparar em tempo constante
+        return hmac.compare_digest(pwd_hash, saved_hash)
 
 
 class MasterPasswordDialog(ctk.CTkToplevel):
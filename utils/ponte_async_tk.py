@@ -0,0 +1,100 @@
+"""
+Ponte entre o mainloop do Tk/customtkinter e um loop asyncio
+O loop asyncio roda na própria thread da interface, em fatias curtas
+agendadas com root.after; corrotinas podem mexer nos widgets depois de cada
+await sem precisar devolver nada para a thread do Tk
+"""
+import asyncio
+from typing import Callable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Intervalo entre fatias do loop enquanto há corrotinas pendentes
+INTERVALO_MS = 10
+
+
+class PonteAsyncTk:
+    """
+    Roda corrotinas junto com o mainloop do Tk
+
+    Uso:
+        ponte = PonteAsyncTk(root)
+
+        async def buscar():
+            resultados = await db_async.buscar_cliente(termo)
+            self.atualizar_lista(resultados)   # de volta na thread do Tk
+
+        ponte.agendar(buscar())
+
+    Sem corrotinas pendentes a ponte não agenda nada: o custo parado é zero.
+    """
+
+    def __init__(self, root, intervalo_ms: int = INTERVALO_MS):
+        """
+        Args:
+            root: Janela principal (CTk ou Tk)
+            intervalo_ms: Espera entre fatias do loop asyncio enquanto há tarefas
+        """
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.loop = asyncio.new_event_loop()
+        self._tarefas = set()
+        self._agendado = None
+
+    def agendar(self, corrotina, ao_falhar: Optional[Callable[[BaseException], None]] = None) -> asyncio.Task:
+        """
+        Agenda uma corrotina no loop da ponte
+
+        Args:
+            corrotina: Corrotina a executar
+            ao_falhar: Chamada (na thread do Tk) com a exceção, se a corrotina
+                falhar; sem ela o erro só vai para o log
+
+        Returns:
+            Task da corrotina (pode ser cancelada)
+        """
+        tarefa = self.loop.create_task(corrotina)
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(lambda t: self._concluida(t, ao_falhar))
+        self._acordar()
+        return tarefa
+
+    def _concluida(self, tarefa: asyncio.Task, ao_falhar):
+        self._tarefas.discard(tarefa)
+        if tarefa.cancelled():
+            return
+        erro = tarefa.exception()
+        if erro is None:
+            return
+        if ao_falhar:
+            ao_falhar(erro)
+        else:
+            logger.error(f"Erro em tarefa assíncrona: {erro}", exc_info=erro)
+
+    def _acordar(self):
+        if self._agendado is None:
+            self._agendado = self.root.after(0, self._fatia)
+
+    def _fatia(self):
+        """Roda o que estiver pronto no loop asyncio e volta para o Tk"""
+        self._agendado = None
+        # stop() agendado antes: run_forever processa uma volta e retorna
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        if self._tarefas:
+            self._agendado = self.root.after(self.intervalo_ms, self._fatia)
+
+    def fechar(self):
+        """Cancela as tarefas pendentes e fecha o loop"""
+        if self._agendado is not None:
+            try:
+                self.root.after_cancel(self._agendado)
+            except Exception:
+                pass
+            self._agendado = None
+        for tarefa in list(self._tarefas):
+            tarefa.cancel()
+        if self._tarefas:
+            self.loop.run_until_complete(asyncio.gather(*self._tarefas, return_exceptions=True))
+        self.loop.close()
@@ -50,6 +50,43 @@ class ClientesView(ctk.CTkFrame):
         # Lista de clientes
         self.lista_frame = ctk.CTkScrollableFrame(main_frame, corner_radius=12, fg_color="transparent")
         self.lista_frame.pack(fill="both", expand=True, padx=12, pady=12)
+        
+        # Modo repositório: lista paginada em vez de todos os clientes
+        if self.database.modo_repositorio:
+            self._cursores = [None]  # Início de cada página já visitada
+            self._cursor_proximo = None
+            self._busca_pagina = None
+            
+            pag_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+            pag_frame.pack(fill="x", padx=12, pady=(0, 12))
+            self.btn_anterior = ctk.CTkButton(pag_frame, text="◀ Anterior", width=110,
+                                              command=self.pagina_anterior)
+            self.btn_anterior.pack(side="left", padx=5)
+            self.label_pagina = ctk.CTkLabel(pag_frame, text="Página 1")
+            self.label_pagina.pack(side="left", padx=10)
+            self.btn_proxima = ctk.CTkButton(pag_frame, text="Próxima ▶", width=110,
+                                             command=self.proxima_pagina)
+            self.btn_proxima.pack(side="left", padx=5)
+    
+    def _carregar_pagina(self):
+        """Busca no repositório a página atual de clientes"""
+        pagina = self.database.repositorio.pagina_clientes(apos=self._cursores[-1],
+                                                           busca=self._busca_pagina)
+        self._cursor_proximo = pagina.cursor_proximo
+        self.label_pagina.configure(text=f"Página {len(self._cursores)}")
+        self.btn_anterior.configure(state="normal" if len(self._cursores) > 1 else "disabled")
+        self.btn_proxima.configure(state="normal" if pagina.tem_proxima else "disabled")
+        return pagina.itens
+    
+    def proxima_pagina(self):
+        if self._cursor_proximo is not None:
+            self._cursores.append(self._cursor_proximo)
+            self.atualizar_lista(forcar=True)
+    
+    def pagina_anterior(self):
+        if len(self._cursores) > 1:
+            self._cursores.pop()
+            self.atualizar_lista(forcar=True)
     
     def atualizar_lista(self, clientes=None, forcar=False):
         # Se já foi carregado e não é forçado, não fazer nada
@@ -60,7 +97,10 @@ class ClientesView(ctk.CTkFrame):
         for widget in self.lista_frame.winfo_children():
             widget.destroy()
         
-        clientes = clientes or self.database.clientes
+        if clientes is None and self.database.modo_repositorio:
+            clientes = self._carregar_pagina()
+        else:
+            clientes = clientes or self.database.clientes
         self._lista_carregada = True
         
         if not clientes:
@@ -110,29 +150,21 @@ class ClientesView(ctk.CTkFrame):
                     font=("Segoe UI", 13, "bold"),
                     text_color="#ffffff").grid(row=0, column=5, columnspan=4, padx=(3, 8), pady=10, sticky="w")
         
-        # Cache de empréstimos por cliente (otimização)
-        self.emprestimos_cache = {}
-        for emp in self.database.emprestimos:
-            if emp.cliente_id not in self.emprestimos_cache:
-                self.emprestimos_cache[emp.cliente_id] = []
-            self.emprestimos_cache[emp.cliente_id].append(emp)
-        
-        # Lista de clientes
+        # Lista de clientes (situação de todos numa consulta só)
+        situacao = self.database.situacao_clientes([c.id for c in clientes])
         for cliente in clientes:
-            self.adicionar_cliente_na_lista(cliente)
+            self.adicionar_cliente_na_lista(cliente, situacao.get(cliente.id, (0, 0, 0.0)))
     
-    def adicionar_cliente_na_lista(self, cliente):
-        # Calcular status do cliente usando cache
-        emprestimos_cliente = self.emprestimos_cache.get(cliente.id, [])
-        emprestimos_ativos = [e for e in emprestimos_cliente if e.ativo and e.saldo_devedor > 0]
+    def adicionar_cliente_na_lista(self, cliente, situacao):
+        # situacao = (qtd_emprestimos, qtd_em_aberto, total_devido)
+        qtd_emprestimos, qtd_em_aberto, total_devido = situacao
         
         # Status visual
-        if emprestimos_ativos:
-            total_devido = sum(e.saldo_devedor for e in emprestimos_ativos)
+        if qtd_em_aberto:
             badge_color = COR_PERIGO
             badge_icon = "●"
             status_text = f"Devendo {formatar_moeda(total_devido)}"
-        elif emprestimos_cliente:
+        elif qtd_emprestimos:
             badge_color = COR_SUCESSO
             badge_icon = "✓"
             status_text = "Em dia"
@@ -195,7 +227,7 @@ class ClientesView(ctk.CTkFrame):
                      row=0, column=7, padx=3, pady=10, sticky="w")
         
         # Botão de cobrança apenas se há dívida
-        if emprestimos_ativos:
+        if qtd_em_aberto:
             ctk.CTkButton(frame, text="📧 Cobrar", width=85, height=32, corner_radius=6,
                          font=("Segoe UI", 11),
                          fg_color=COLOR_BTN_WARNING, hover_color=COLOR_BTN_WARNING_HOVER,
@@ -212,7 +244,12 @@ class ClientesView(ctk.CTkFrame):
     
     def _executar_busca(self):
         termo = self.entry_busca.get().strip()
-        if termo:
+        if self.database.modo_repositorio:
+            # Busca feita no banco, voltando para a primeira página
+            self._busca_pagina = termo or None
+            self._cursores = [None]
+            self.atualizar_lista(forcar=True)
+        elif termo:
             resultados = self.database.buscar_cliente(termo)
             self.atualizar_lista(resultados, forcar=True)
         else:
@@ -304,6 +341,11 @@ class ClientesView(ctk.CTkFrame):
                 messagebox.showerror("Erro", "Preencha todos os campos obrigatórios!")
                 return
             
+            # CPF/CNPJ único (busca pelo índice cego, sem decifrar a base)
+            if self.database.existe_cpf_cnpj(dados['cpf_cnpj'], ignorar_id=cliente.id if cliente else None):
+                messagebox.showerror("Erro", "Já existe um cliente com este CPF/CNPJ!")
+                return
+            
             if cliente:
                 # Editar cliente existente
                 cliente.nome = dados['nome']
@@ -311,6 +353,7 @@ class ClientesView(ctk.CTkFrame):
                 cliente.telefone = dados['telefone']
                 cliente.email = dados['email']
                 cliente.endereco = dados['endereco']
+                self.database.atualizar_cliente(cliente)
                 messagebox.showinfo("Sucesso", "Cliente atualizado com sucesso!")
             else:
                 # Novo cliente
@@ -330,7 +373,7 @@ class ClientesView(ctk.CTkFrame):
     
     def excluir_cliente(self, cliente):
         if messagebox.askyesno("Confirmar", f"Excluir cliente {cliente.nome}?"):
-            self.database.clientes.remove(cliente)
+            self.database.remover_cliente(cliente)
             self.database.salvar_dados()
             self.atualizar_lista(forcar=True)
             messagebox.showinfo("Sucesso", "Cliente excluído com sucesso!")
@@ -365,16 +408,13 @@ class ClientesView(ctk.CTkFrame):
         resumo_frame.pack(fill="x", padx=16, pady=(0, 16))
 
         # Calcular totais
-        emprestimos_cliente = [e for e in self.database.emprestimos if e.cliente_id == cliente.id]
+        emprestimos_cliente = self.database.get_emprestimos_by_cliente(cliente.id)
         emprestimos_ativos = [e for e in emprestimos_cliente if e.ativo]
         emprestimos_quitados = [e for e in emprestimos_cliente if not e.ativo]
         
         total_emprestado = sum(getattr(e, 'valor_emprestado', 0.0) for e in emprestimos_cliente)
         total_devido = sum(getattr(e, 'saldo_devedor', 0.0) for e in emprestimos_ativos)
-        total_pago = sum(
-            sum(float(p.get('valor', 0.0)) for p in getattr(e, 'pagamentos', []))
-            for e in emprestimos_cliente
-        )
+        total_pago = sum(e.total_pago for e in emprestimos_cliente)
 
         # Cards de resumo
         def criar_card_resumo(parent, titulo, valor, cor):
@@ -442,13 +482,10 @@ class ClientesView(ctk.CTkFrame):
                     ctk.CTkLabel(content, text=valores_text, font=FONT_SMALL, 
                                 text_color=COLOR_TEXT_SECONDARY, anchor="w").pack(anchor="w", pady=(4,0))
                     
-                    # Saldo devedor e pagamentos
-                    pagamentos_realizados = len(getattr(emp, 'pagamentos', []))
-                    total_pago_emp = sum(float(p.get('valor', 0.0)) for p in getattr(emp, 'pagamentos', []))
-                    
+                    # Saldo devedor e pagamentos (agregados já calculados)
                     status_text = (f"💰 Devendo: {formatar_moeda(emp.saldo_devedor)} | "
-                                 f"✅ Pago: {formatar_moeda(total_pago_emp)} | "
-                                 f"📊 Parcelas pagas: {pagamentos_realizados}")
+                                 f"✅ Pago: {formatar_moeda(emp.total_pago)} | "
+                                 f"📊 Parcelas pagas: {emp.parcelas_pagas}")
                     ctk.CTkLabel(content, text=status_text, font=FONT_SMALL, 
                                 text_color=COLOR_TEXT_PRIMARY, anchor="w").pack(anchor="w", pady=(4,0))
 
@@ -479,10 +516,9 @@ class ClientesView(ctk.CTkFrame):
                                 font=FONT_NORMAL, text_color=COLOR_TEXT_PRIMARY, 
                                 anchor="w").pack(anchor="w")
                     
-                    pagamentos_realizados = len(getattr(emp, 'pagamentos', []))
                     info_text = (f"Valor original: {formatar_moeda(emp.valor_emprestado)} | "
                                f"Total pago: {formatar_moeda(emp.valor_total)} | "
-                               f"Parcelas: {pagamentos_realizados}")
+                               f"Parcelas: {emp.parcelas_pagas}")
                     ctk.CTkLabel(content, text=info_text, font=FONT_SMALL, 
                                 text_color=COLOR_TEXT_SECONDARY, anchor="w").pack(anchor="w", pady=(4,0))
 
@@ -499,8 +535,8 @@ class ClientesView(ctk.CTkFrame):
         # Somar saldo devedor dos empréstimos deste cliente ESPECIFICAMENTE
         total_devido = 0.0
         emprestimos_cliente = []
-        for emp in getattr(self.database, 'emprestimos', []):
-            if getattr(emp, 'cliente_id', None) == cliente.id and getattr(emp, 'ativo', False):
+        for emp in self.database.get_emprestimos_by_cliente(cliente.id):
+            if getattr(emp, 'ativo', False):
                 saldo = float(getattr(emp, 'saldo_devedor', 0.0))
                 if saldo > 0:
                     total_devido += saldo
@@ -36,7 +36,11 @@ class DashboardView(ctk.CTkFrame):
         ctk.CTkLabel(filtros_frame, text="Cliente:", font=("Segoe UI", 11),
                     text_color=COR_TEXTO).pack(side="left", padx=(0, 8))
         
-        clientes_nomes = ["Todos"] + [c.nome for c in self.database.clientes]
+        # Só id e nome (no modo repositório, uma consulta sem carregar os clientes)
+        self._cliente_por_nome = {}
+        for cliente_id, nome in self.database.nomes_clientes():
+            self._cliente_por_nome.setdefault(nome, cliente_id)
+        clientes_nomes = ["Todos"] + list(self._cliente_por_nome)
         self.cliente_dropdown = ctk.CTkComboBox(filtros_frame, values=clientes_nomes,
                                                width=180, command=self.aplicar_filtros)
         self.cliente_dropdown.set("Todos")
@@ -85,6 +89,7 @@ class DashboardView(ctk.CTkFrame):
             ("🥧 Pizza - Status", "pizza_status"),
             ("🥧 Pizza - Ativos/Inativos", "pizza_ativo"),
             ("📊 Barras - Distribuição", "barras_valores"),
+            ("📈 Histórico", "historico"),
         ]
         
         for label, chart_type in chart_options:
@@ -120,11 +125,8 @@ class DashboardView(ctk.CTkFrame):
         escolha = escolha or self.cliente_dropdown.get()
         if escolha == "Todos":
             self.filtro_cliente = "todos"
-        else:
-            for c in self.database.clientes:
-                if c.nome == escolha:
-                    self.filtro_cliente = c.id
-                    break
+        elif escolha in self._cliente_por_nome:
+            self.filtro_cliente = self._cliente_por_nome[escolha]
         
         # Construir mensagem de filtro
         filtro_msgs = []
@@ -157,52 +159,24 @@ class DashboardView(ctk.CTkFrame):
         self.data_fim.delete(0, 'end')
         self.aplicar_filtros()
     
-    def filtrar_emprestimos(self):
-        """Retorna empréstimos filtrados por cliente e data"""
+    def filtros_resumo(self):
+        """Monta os filtros de cliente e data para DatabaseSQLite.resumo"""
         from datetime import datetime
         
-        # Filtro por cliente
-        if self.filtro_cliente == "todos":
-            emprestimos = self.database.emprestimos
-        else:
-            emprestimos = [e for e in self.database.emprestimos if e.cliente_id == self.filtro_cliente]
-        
-        # Filtro por data
-        data_inicio_str = self.data_inicio.get().strip()
-        data_fim_str = self.data_fim.get().strip()
+        filtros = {}
+        if self.filtro_cliente != "todos":
+            filtros['cliente_id'] = self.filtro_cliente
         
-        if data_inicio_str or data_fim_str:
-            emprestimos_filtrados = []
-            for e in emprestimos:
+        # Datas em DD/MM/AAAA; formato inválido é ignorado
+        for campo, entry in (('data_inicio', self.data_inicio), ('data_fim', self.data_fim)):
+            texto = entry.get().strip()
+            if texto:
                 try:
-                    # Converter data de criação do empréstimo
-                    data_emp = datetime.strptime(e.data_criacao[:10], "%Y-%m-%d")
-                    
-                    # Validar data inicial
-                    if data_inicio_str:
-                        try:
-                            data_inicio = datetime.strptime(data_inicio_str, "%d/%m/%Y")
-                            if data_emp < data_inicio:
-                                continue
-                        except ValueError:
-                            pass  # Ignora formato inválido
-                    
-                    # Validar data final
-                    if data_fim_str:
-                        try:
-                            data_fim = datetime.strptime(data_fim_str, "%d/%m/%Y")
-                            if data_emp > data_fim:
-                                continue
-                        except ValueError:
-                            pass  # Ignora formato inválido
-                    
-                    emprestimos_filtrados.append(e)
-                except:
-                    emprestimos_filtrados.append(e)  # Inclui se não conseguir validar
-            
-            return emprestimos_filtrados
+                    filtros[campo] = datetime.strptime(texto, "%d/%m/%Y").date().isoformat()
+                except ValueError:
+                    pass
         
-        return emprestimos
+        return filtros
     
     def atualizar_dashboard(self):
         """Atualiza stats e gráficos com base nos filtros"""
@@ -241,23 +215,17 @@ class DashboardView(ctk.CTkFrame):
             self.criar_pizza_ativo()
         elif chart_type == "barras_valores":
             self.criar_barras_valores()
+        elif chart_type == "historico":
+            self.criar_historico()
 
     def criar_pizza_status(self):
         """Gráfico de pizza: Empréstimos em diferentes status."""
-        # Filtrar empréstimos
-        emprestimos = self.filtrar_emprestimos()
-        
-        ativos = len([e for e in emprestimos if e.ativo])
-        inativos = len([e for e in emprestimos if not e.ativo])
+        # Contagens calculadas no banco
+        resumo = self.database.resumo(self.filtros_resumo())
         
-        try:
-            todos_atrasados = self.database.get_overdue_emprestimos()
-            # Filtrar atrasados pelos empréstimos já filtrados
-            emprestimos_ids = set(e.id for e in emprestimos)
-            todos_atrasados = [e for e in todos_atrasados if e.id in emprestimos_ids]
-            atrasados = len(todos_atrasados)
-        except:
-            atrasados = 0
+        ativos = resumo.ativos
+        inativos = resumo.inativos
+        atrasados = resumo.atrasados
 
         dados = [ativos - atrasados, atrasados, inativos] if ativos > 0 else [0, 0, 1]
         labels = ["Ativo (em dia)", "Atrasado", "Inativo"]
@@ -279,11 +247,11 @@ class DashboardView(ctk.CTkFrame):
 
     def criar_pizza_ativo(self):
         """Gráfico de pizza: Ativos vs Inativos."""
-        # Filtrar empréstimos
-        emprestimos = self.filtrar_emprestimos()
+        # Contagens calculadas no banco
+        resumo = self.database.resumo(self.filtros_resumo())
         
-        ativos = len([e for e in emprestimos if e.ativo])
-        inativos = len([e for e in emprestimos if not e.ativo])
+        ativos = resumo.ativos
+        inativos = resumo.inativos
 
         dados = [ativos, inativos] if (ativos + inativos) > 0 else [1]
         labels = [f"Ativos ({ativos})", f"Inativos ({inativos})"]
@@ -307,29 +275,8 @@ class DashboardView(ctk.CTkFrame):
 
     def criar_barras_valores(self):
         """Gráfico de barras: Distribuição de valores de empréstimos."""
-        # Filtrar empréstimos
-        emprestimos = self.filtrar_emprestimos()
-        
-        faixas = {
-            "0-500": 0,
-            "500-1k": 0,
-            "1k-5k": 0,
-            "5k-10k": 0,
-            "10k+": 0
-        }
-
-        for emp in emprestimos:
-            valor = getattr(emp, 'valor_emprestado', 0.0)
-            if valor < 500:
-                faixas["0-500"] += 1
-            elif valor < 1000:
-                faixas["500-1k"] += 1
-            elif valor < 5000:
-                faixas["1k-5k"] += 1
-            elif valor < 10000:
-                faixas["5k-10k"] += 1
-            else:
-                faixas["10k+"] += 1
+        # Histograma por faixa de valor calculado no banco (GROUP BY)
+        faixas = self.database.resumo(self.filtros_resumo()).faixas_valor
 
         fig = Figure(figsize=(10, 4), dpi=100, facecolor="#ffffff")
         ax = fig.add_subplot(111)
@@ -355,6 +302,31 @@ class DashboardView(ctk.CTkFrame):
         fig.tight_layout()
         self._renderizar_grafico(fig)
 
+    def criar_historico(self):
+        """Gráfico de linhas: evolução da carteira (snapshots diários)."""
+        # Uma linha por dia gravada pelo banco; não depende dos filtros
+        historico = self.database.historico_carteira(dias=180)
+        datas = [datetime.fromisoformat(h['data']) for h in historico]
+
+        fig = Figure(figsize=(10, 4), dpi=100, facecolor="#ffffff")
+        ax = fig.add_subplot(111)
+        ax.plot(datas, [h['saldo_devedor'] for h in historico], color=COR_INFO,
+                linewidth=2, label="Saldo devedor")
+        ax.plot(datas, [h['valor_atrasado'] for h in historico], color=COR_PERIGO,
+                linewidth=2, label="Em atraso")
+        ax.bar(datas, [h['recebido_dia'] for h in historico], color=COR_SUCESSO,
+               alpha=0.6, label="Recebido no dia")
+
+        ax.set_ylabel("Valor (R$)", color=COR_TEXTO, fontsize=11)
+        ax.set_title("Evolução da Carteira (todos os clientes)", fontsize=13, fontweight='bold',
+                    color=COR_TEXTO, pad=20)
+        ax.tick_params(axis='x', rotation=45, colors=COR_TEXTO)
+        ax.tick_params(axis='y', colors=COR_TEXTO)
+        ax.legend(loc="upper left", fontsize=9)
+
+        fig.tight_layout()
+        self._renderizar_grafico(fig)
+
     def _renderizar_grafico(self, fig):
         """Renderiza figura matplotlib no canvas do CTk com fade-in suave."""
         canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
@@ -375,23 +347,17 @@ class DashboardView(ctk.CTkFrame):
         for widget in self.stats_frame.winfo_children():
             widget.destroy()
         
-        # Filtrar empréstimos
-        emprestimos_filtrados = self.filtrar_emprestimos()
+        # Totais calculados no banco
+        resumo = self.database.resumo(self.filtros_resumo())
         
         if self.filtro_cliente == "todos":
-            clientes_unicos = set(e.cliente_id for e in emprestimos_filtrados)
-            total_clientes = len(clientes_unicos)
+            total_clientes = resumo.clientes_com_emprestimo
         else:
             total_clientes = 1
         
-        # Calcular totais
-        total_emprestado = sum(getattr(e, 'valor_emprestado', 0.0) for e in emprestimos_filtrados)
-        total_owed = sum(getattr(e, 'saldo_devedor', 0.0) for e in emprestimos_filtrados)
-        total_paid = sum(
-            float(p.get('valor', 0.0))
-            for e in emprestimos_filtrados
-            for p in getattr(e, 'pagamentos', [])
-        )
+        total_emprestado = resumo.total_emprestado
+        total_owed = resumo.saldo_devedor
+        total_paid = resumo.total_pago
         
         # Criar cards
         def make_card(parent, title_text, value_text, icon=""):
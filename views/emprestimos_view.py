@@ -74,6 +74,21 @@ class EmprestimosView(ctk.CTkFrame):
         self.tree.tag_configure("overdue", foreground="#e74c3c", font=("Segoe UI", 10, "bold"))  # Vermelho negrito - Atrasado
         self.tree.tag_configure("quitado", foreground="#10b981", font=("Segoe UI", 10, "bold"))  # Verde escuro negrito - Quitado
 
+        # Modo repositório: tabela paginada em vez de todos os empréstimos
+        if self.database.modo_repositorio:
+            self._cursores = [None]  # Início de cada página já visitada
+            self._cursor_proximo = None
+            self._busca_pagina = None
+            
+            pag_frame = ctk.CTkFrame(main_card, fg_color="transparent")
+            pag_frame.pack(fill="x", padx=12, pady=(0,12))
+            self.btn_anterior = ctk.CTkButton(pag_frame, text="◀ Anterior", width=110, command=self.pagina_anterior)
+            self.btn_anterior.pack(side="left", padx=6)
+            self.label_pagina = ctk.CTkLabel(pag_frame, text="Página 1", text_color=COR_TEXTO)
+            self.label_pagina.pack(side="left", padx=10)
+            self.btn_proxima = ctk.CTkButton(pag_frame, text="Próxima ▶", width=110, command=self.proxima_pagina)
+            self.btn_proxima.pack(side="left", padx=6)
+
         # Action buttons frame
         button_frame = ctk.CTkFrame(self, fg_color="transparent")
         button_frame.pack(padx=20, pady=12, fill="x")
@@ -88,11 +103,17 @@ class EmprestimosView(ctk.CTkFrame):
         for item in self.tree.get_children():
             self.tree.delete(item)
         
-        # Get all emprestimos
-        emps = list(self.database.emprestimos)
+        search_text = self.search_entry.get().strip().lower() if hasattr(self, 'search_entry') else ""
+        
+        if self.database.modo_repositorio:
+            # Página atual, com o filtro por nome aplicado no banco
+            emps = self._carregar_pagina(search_text or None)
+            search_text = ""
+        else:
+            # Get all emprestimos
+            emps = list(self.database.emprestimos)
         
         # Filter by client name search
-        search_text = self.search_entry.get().strip().lower() if hasattr(self, 'search_entry') else ""
         if search_text:
             filtered_emps = []
             for emp in emps:
@@ -130,6 +151,29 @@ class EmprestimosView(ctk.CTkFrame):
             
             self.tree.insert("", "end", values=(emp.id, cliente_nome, valor_emprestado_text, saldo_text, status), tags=(tag,))
 
+    def _carregar_pagina(self, busca):
+        """Busca no repositório a página atual de empréstimos"""
+        if busca != self._busca_pagina:
+            # Filtro mudou: voltar para a primeira página
+            self._busca_pagina = busca
+            self._cursores = [None]
+        pagina = self.database.repositorio.pagina_emprestimos(apos=self._cursores[-1], busca_cliente=busca)
+        self._cursor_proximo = pagina.cursor_proximo
+        self.label_pagina.configure(text=f"Página {len(self._cursores)}")
+        self.btn_anterior.configure(state="normal" if len(self._cursores) > 1 else "disabled")
+        self.btn_proxima.configure(state="normal" if pagina.tem_proxima else "disabled")
+        return pagina.itens
+
+    def proxima_pagina(self):
+        if self._cursor_proximo is not None:
+            self._cursores.append(self._cursor_proximo)
+            self.atualizar_tabela()
+
+    def pagina_anterior(self):
+        if len(self._cursores) > 1:
+            self._cursores.pop()
+            self.atualizar_tabela()
+
     def buscar(self):
         # placeholder: keep simple
         pass
@@ -137,7 +181,8 @@ class EmprestimosView(ctk.CTkFrame):
     def novo_emprestimo(self):
         """Modal simplificado e amigável para novo empréstimo com preview."""
         # Validar se há clientes
-        if not self.database.clientes:
+        nomes_clientes = self.database.nomes_clientes()
+        if not nomes_clientes:
             messagebox.showerror("Erro", "Nenhum cliente cadastrado.\nCadastre um cliente primeiro em 👥 Clientes.")
             return
 
@@ -155,7 +200,7 @@ class EmprestimosView(ctk.CTkFrame):
 
         # Cliente
         ctk.CTkLabel(main_frame, text="👤 Cliente:", font=("Segoe UI", 11, "bold"), text_color=COR_TEXTO).pack(anchor="w", padx=16, pady=(0,6))
-        clientes_choices = [f"{c.id} - {c.nome}" for c in self.database.clientes]
+        clientes_choices = [f"{cliente_id} - {nome}" for cliente_id, nome in nomes_clientes]
         cliente_var = ctk.StringVar(value=clientes_choices[0] if clientes_choices else "")
         cliente_menu = ctk.CTkOptionMenu(main_frame, values=clientes_choices, variable=cliente_var, 
                                          font=("Segoe UI", 11), dropdown_font=("Segoe UI", 10), fg_color=COR_PRIMARIA)
@@ -342,7 +387,7 @@ class EmprestimosView(ctk.CTkFrame):
             return
         
         emp_id = values[0]
-        emprestimo = next((e for e in self.database.emprestimos if e.id == emp_id), None)
+        emprestimo = self.database.get_emprestimo_por_id(emp_id)
         if emprestimo is None:
             messagebox.showerror("Erro", "Empréstimo não encontrado")
             return
@@ -423,7 +468,7 @@ class EmprestimosView(ctk.CTkFrame):
                     data_str = datetime.now().date().isoformat()
 
                 # Registrar pagamento
-                emprestimo.registrar_pagamento(valor, data=data_str)
+                self.database.registrar_pagamento(emprestimo, valor, data=data_str)
                 self.database.salvar_dados()
 
                 # Feedback baseado no saldo resultante
@@ -456,7 +501,7 @@ class EmprestimosView(ctk.CTkFrame):
             messagebox.showerror("Erro", "Seleção inválida")
             return
         emp_id = values[0]
-        emprestimo = next((e for e in self.database.emprestimos if e.id == emp_id), None)
+        emprestimo = self.database.get_emprestimo_por_id(emp_id)
         if emprestimo is None:
             messagebox.showerror("Erro", "Empréstimo não encontrado")
             return
@@ -610,7 +655,7 @@ class EmprestimosView(ctk.CTkFrame):
 
                 # Registrar pagamento
                 try:
-                    emprestimo.registrar_pagamento(valor, data=data)
+                    self.database.registrar_pagamento(emprestimo, valor, data=data)
                     self.database.salvar_dados()
                     
                     # Saldo DEPOIS do pagamento
@@ -673,7 +718,7 @@ class EmprestimosView(ctk.CTkFrame):
         item = self.tree.item(selected[0])
         values = item.get('values', [])
         emp_id = values[0] if values else None
-        emprestimo = next((e for e in self.database.emprestimos if e.id == emp_id), None)
+        emprestimo = self.database.get_emprestimo_por_id(emp_id)
         if emprestimo is None:
             messagebox.showerror("Erro", "Empréstimo não encontrado")
             return
@@ -698,7 +743,7 @@ class EmprestimosView(ctk.CTkFrame):
 
         if messagebox.askyesno("Confirmar Deleção", msg):
             try:
-                self.database.emprestimos.remove(emprestimo)
+                self.database.remover_emprestimo(emprestimo)
                 self.database.salvar_dados()
                 self.atualizar_tabela()
                 messagebox.showinfo("Sucesso", "✓ Empréstimo removido com sucesso!")
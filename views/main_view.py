@@ -1,4 +1,5 @@
 import customtkinter as ctk
+import queue
 from theme_colors import *
 
 # Usar cores do tema
@@ -6,6 +7,9 @@ SIDEBAR_BG = COR_SIDEBAR
 CONTENT_BG = COR_CARD
 ACCENT = COR_PRIMARIA
 
+# Intervalo (ms) com que a thread do Tk confere alterações externas avisadas
+INTERVALO_ALTERACOES_MS = 500
+
 class MainView:
     def __init__(self, root, database, license_manager=None):
         self.root = root
@@ -13,9 +17,17 @@ class MainView:
         self.license_manager = license_manager  # Adicionar license_manager
         self.view_cache = {}  # Cache para views já carregadas
         self.current_view = None
+        self.view_atual = None
         
         self.criar_layout()
         self.mostrar_dashboard()
+        
+        # Dados gravados por outro processo (outra instância, scripts): redesenhar a tela.
+        # O aviso chega na thread de gravação periódica; o Tk só é tocado pela
+        # thread principal, que esvazia a fila
+        self._alteracoes_externas = queue.SimpleQueue()
+        self.database.adicionar_ouvinte_alteracoes(self._alteracoes_externas.put)
+        self.root.after(INTERVALO_ALTERACOES_MS, self._conferir_alteracoes_externas)
     
     def criar_layout(self):
         # Configurar grid
@@ -87,6 +99,34 @@ class MainView:
         view = view_cls(self.main_frame, self.database)
         view.pack(fill="both", expand=True)
         self.current_view = view_name
+        self.view_atual = view
+    
+    def _conferir_alteracoes_externas(self):
+        """Redesenha a tela se chegou aviso de alteração externa (roda na thread do Tk)"""
+        houve = False
+        while True:
+            try:
+                self._alteracoes_externas.get_nowait()
+            except queue.Empty:
+                break
+            houve = True
+        if houve:
+            self._atualizar_view_atual()
+        self.root.after(INTERVALO_ALTERACOES_MS, self._conferir_alteracoes_externas)
+    
+    def _atualizar_view_atual(self):
+        """Recarrega os dados da tela visível (após alterações externas no banco)"""
+        view = self.view_atual
+        if view is None or not view.winfo_exists():
+            return
+        if self.current_view == 'clientes':
+            view.atualizar_lista(forcar=True)
+        elif self.current_view == 'emprestimos':
+            view.atualizar_tabela()
+        elif self.current_view == 'dashboard':
+            view.atualizar_dashboard()
+        elif self.current_view == 'notificacoes':
+            view.atualizar_lista()
     
     def mostrar_dashboard(self):
         self._carregar_view('dashboard', 'DashboardView', 'views.dashboard_view')
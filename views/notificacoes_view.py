@@ -9,6 +9,9 @@ from theme_colors import *
 CARD_BG = COR_CARD
 ACCENT = COR_PERIGO
 
+# Janela da seção "vencendo em breve"
+DIAS_A_VENCER = 7
+
 class NotificacoesView(ctk.CTkFrame):
     def __init__(self, parent, database):
         super().__init__(parent)
@@ -63,9 +66,6 @@ class NotificacoesView(ctk.CTkFrame):
             atrasados = []
         
         if atrasados:
-            # Cache de clientes para performance
-            clientes_cache = {c.id: c.nome for c in self.database.clientes}
-            
             # Seção de atrasados
             secao = ctk.CTkLabel(self.scroll_frame, text="⚠️ Empréstimos Atrasados", 
                                font=("Segoe UI", 16, "bold"), text_color=COR_PERIGO)
@@ -73,7 +73,8 @@ class NotificacoesView(ctk.CTkFrame):
             
             for emp in atrasados:
                 total_notif += 1
-                nome = clientes_cache.get(emp.cliente_id, str(emp.cliente_id))
+                cliente = self.database.get_cliente_por_id(emp.cliente_id)
+                nome = cliente.nome if cliente else str(emp.cliente_id)
                 
                 # Card de notificação simplificado
                 card = ctk.CTkFrame(self.scroll_frame, corner_radius=8, 
@@ -88,6 +89,33 @@ class NotificacoesView(ctk.CTkFrame):
                            font=("Segoe UI", 11), text_color=COR_TEXTO,
                            anchor="w").pack(anchor="w", padx=10, pady=6)
         
+        # Empréstimos que vencem nos próximos dias (índice por vencimento)
+        a_vencer = []
+        try:
+            a_vencer = self.database.get_emprestimos_a_vencer(DIAS_A_VENCER)
+        except Exception:
+            a_vencer = []
+        
+        if a_vencer:
+            secao = ctk.CTkLabel(self.scroll_frame, text=f"⏰ Vencendo em até {DIAS_A_VENCER} dias", 
+                               font=("Segoe UI", 16, "bold"), text_color=COR_ALERTA)
+            secao.pack(anchor="w", padx=16, pady=(16, 8))
+            
+            for emp in a_vencer:
+                total_notif += 1
+                cliente = self.database.get_cliente_por_id(emp.cliente_id)
+                nome = cliente.nome if cliente else str(emp.cliente_id)
+                
+                card = ctk.CTkFrame(self.scroll_frame, corner_radius=8, 
+                                   fg_color="#fffbeb",
+                                   border_width=1, border_color=COR_ALERTA)
+                card.pack(fill="x", padx=16, pady=4)
+                
+                ctk.CTkLabel(card, 
+                           text=f"🟡 {nome} | {str(emp.data_vencimento)[:10]} | R$ {emp.saldo_devedor:.2f}", 
+                           font=("Segoe UI", 11), text_color=COR_TEXTO,
+                           anchor="w").pack(anchor="w", padx=10, pady=6)
+        
         # Lembretes genéricos
         lembretes = self.database.lembretes if hasattr(self.database, 'lembretes') else []
         